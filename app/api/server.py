@@ -0,0 +1,289 @@
+import argparse
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from app import config
+from app.utils.dataset import get_dataset
+from app.utils.view import FilteredView
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+class ResponseCache:
+    """
+    Small thread-safe LRU of encoded responses keyed by data version and
+    request, so repeated requests between ingests skip the computation.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def size_bytes(self):
+        with self._lock:
+            return sum(len(body) for body in self._entries.values())
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _view(schema, params):
+    """
+    Build the filtered view of a request, like the dashboard's sidebar
+    filters; a missing date bound defaults to the first or last order date.
+    """
+    start = pd.Timestamp(params["start"][0]) if "start" in params else None
+    end = pd.Timestamp(params["end"][0]) if "end" in params else None
+    date_range = None
+    if start is not None or end is not None:
+        dates = schema.fact["Order.Date"]
+        date_range = (
+            dates.min() if start is None else start,
+            dates.max() if end is None else end,
+        )
+    return FilteredView(
+        schema,
+        countries=params.get("country", []),
+        categories=params.get("category", []),
+        date_range=date_range,
+    )
+
+
+def _top_n(params):
+    # Without "n" the request shares its cache entry with the dashboard.
+    return {"top_n": int(params["n"][0])} if "n" in params else {}
+
+
+def _int_param(params, name, default):
+    return int(params[name][0]) if name in params else default
+
+
+# Endpoints read the dashboard's outputs (see `app.tabs.computations`) through
+# the view, so both return the same numbers from the same cache entries.
+
+
+def sales_by_country(view, params):
+    sales = view.output("sales_by", column="Country")
+    return sales.rename(columns={"Total Sales": "Sales"})
+
+
+def sales_by_category(view, params):
+    sales = view.output("sales_by", column="Category")
+    return sales.rename(columns={"Total Sales": "Sales"})
+
+
+def sales_over_time(view, params):
+    sales = view.output("sales_over_time")
+    return sales.rename(columns={"Date": "Order.Date", "Total Sales": "Sales"})
+
+
+def top_products(view, params):
+    value_column = params.get("by", ["Sales"])[0]
+    if value_column not in ("Sales", "Profit"):
+        raise ValueError("'by' must be Sales or Profit")
+    return view.output("top_products", value_column=value_column, **_top_n(params))
+
+
+def top_customers(view, params):
+    return view.output("top_customers", **_top_n(params))
+
+
+def rfm_segments(view, params):
+    return view.output("customer_rfm").astype({"Segment": str})
+
+
+def order_values(view, params):
+    return view.output("order_value")
+
+
+def forecast(view, params):
+    return view.output(
+        "sales_forecast",
+        periods=_int_param(params, "periods", 30),
+        granularity=params.get("granularity", ["Daily"])[0],
+    )
+
+
+ENDPOINTS = {
+    "/sales-by-country": sales_by_country,
+    "/sales-by-category": sales_by_category,
+    "/sales-over-time": sales_over_time,
+    "/top-products": top_products,
+    "/top-customers": top_customers,
+    "/rfm-segments": rfm_segments,
+    "/order-values": order_values,
+    "/forecast": forecast,
+}
+
+
+def encode(frame, media_type):
+    """
+    Serialize a result frame as JSON records or an Arrow IPC stream.
+
+    Parameters:
+        frame (pd.DataFrame): The endpoint result.
+        media_type (str): "application/json" or the Arrow stream media type.
+
+    Returns:
+        bytes: The encoded body.
+    """
+    if media_type == ARROW_MEDIA_TYPE:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+    return frame.to_json(orient="records", date_format="iso").encode("utf-8")
+
+
+class AggregateRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SalesDashboardAPI/1.0"
+    protocol_version = "HTTP/1.1"
+    cache = ResponseCache()
+    data_dir = config.DATA_DIR
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/health":
+            schema = get_dataset(self.data_dir)
+            self._send_json(
+                HTTPStatus.OK,
+                {"status": "ok", "rows": len(schema.fact), "version": schema.version},
+            )
+            return
+
+        if url.path == "/debug/memory":
+            from app.utils.memory import memory_report
+
+            self._send_json(HTTPStatus.OK, memory_report(get_dataset(self.data_dir)))
+            return
+
+        endpoint = ENDPOINTS.get(url.path)
+        if endpoint is None:
+            self._send_json(
+                HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint {url.path}"}
+            )
+            return
+
+        params = parse_qs(url.query)
+        requested_format = params.pop("format", ["json"])[0]
+        wants_arrow = requested_format == "arrow" or ARROW_MEDIA_TYPE in (
+            self.headers.get("Accept", "")
+        )
+        media_type = ARROW_MEDIA_TYPE if wants_arrow else "application/json"
+
+        # The body is computed on a pinned copy of the schema, so it belongs
+        # to the version named in its ETag.
+        schema = get_dataset(self.data_dir).pinned()
+        request_key = f"{url.path}?{sorted(params.items())}|{media_type}"
+        etag = '"{}-{}"'.format(
+            schema.version,
+            hashlib.sha1(request_key.encode("utf-8")).hexdigest()[:16],
+        )
+        if etag in self.headers.get("If-None-Match", ""):
+            self._send(HTTPStatus.NOT_MODIFIED, b"", media_type, etag)
+            return
+
+        body = self.cache.get(etag)
+        if body is None:
+            try:
+                body = encode(endpoint(_view(schema, params), params), media_type)
+            except (ValueError, KeyError) as e:
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+                return
+            except Exception as e:
+                self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+                return
+            self.cache.put(etag, body)
+        self._send(HTTPStatus.OK, body, media_type, etag)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send(self, status, body, media_type, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", media_type)
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_api_server(host="127.0.0.1", port=8600, data_dir=config.DATA_DIR):
+    """
+    Start the aggregate API on a background thread of the current process.
+
+    Calling it again returns the already running server, so the dashboard can
+    call it on every rerun.
+
+    Parameters:
+        host (str): Interface to bind.
+        port (int): Port to listen on.
+        data_dir (str): Directory of the shared dataset.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+    global _server
+    with _server_lock:
+        if _server is None:
+            AggregateRequestHandler.data_dir = data_dir
+            _server = ThreadingHTTPServer((host, port), AggregateRequestHandler)
+            _server.daemon_threads = True
+            threading.Thread(
+                target=_server.serve_forever, name="aggregate-api", daemon=True
+            ).start()
+    return _server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve dashboard aggregates over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--data-dir", default=config.DATA_DIR)
+    args = parser.parse_args()
+
+    AggregateRequestHandler.data_dir = args.data_dir
+    get_dataset(args.data_dir)
+    server = ThreadingHTTPServer((args.host, args.port), AggregateRequestHandler)
+    server.daemon_threads = True
+    print(f"Serving aggregates on http://{args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
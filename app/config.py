@@ -0,0 +1,99 @@
+import os
+
+DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", "data")
+
+# Seconds between polls of the append-only order and sales files; 0 disables
+# live ingestion.
+INGEST_INTERVAL = float(os.environ.get("DASHBOARD_INGEST_INTERVAL", "5"))
+
+# Order and sales rows wait for their counterpart in the other file for at most
+# INGEST_PENDING_TTL seconds, and at most INGEST_PENDING_ROWS rows of each wait
+# at once (the oldest are dropped first).
+INGEST_PENDING_TTL = float(os.environ.get("DASHBOARD_INGEST_PENDING_TTL", "3600"))
+INGEST_PENDING_ROWS = int(os.environ.get("DASHBOARD_INGEST_PENDING_ROWS", "100000"))
+
+# Port for the in-process aggregate API started alongside the dashboard; 0
+# leaves it off. `python -m app.api.server` runs it standalone instead.
+API_HOST = os.environ.get("DASHBOARD_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("DASHBOARD_API_PORT", "0"))
+
+# Most memory the shared cache of tab outputs and figures may hold; the least
+# recently used entries are evicted beyond it.
+CACHE_MEMORY_MB = float(os.environ.get("DASHBOARD_CACHE_MEMORY_MB", "512"))
+
+# Warm the computation cache in background threads at server start: the
+# default view plus single-filter views for the WARM_TOP_N most used countries
+# and categories, until the cache holds WARM_MEMORY_MB.
+WARM_ENABLED = os.environ.get("DASHBOARD_WARM_ENABLED", "1") == "1"
+WARM_TOP_N = int(os.environ.get("DASHBOARD_WARM_TOP_N", "5"))
+WARM_THREADS = int(os.environ.get("DASHBOARD_WARM_THREADS", "2"))
+WARM_MEMORY_MB = float(os.environ.get("DASHBOARD_WARM_MEMORY_MB", "256"))
+WARM_FORECAST = os.environ.get("DASHBOARD_WARM_FORECAST", "1") == "1"
+
+# Where filter usage counts are kept between restarts; the warmer ranks
+# countries and categories by them.
+USAGE_FILE = os.environ.get("DASHBOARD_USAGE_FILE", ".cache/filter_usage.json")
+
+# Count deep DataFrame copies made by each rerun and show them in the sidebar.
+DEBUG_COPIES = os.environ.get("DASHBOARD_DEBUG_COPIES", "0") == "1"
+
+# Per-rerun stage timings: a Prometheus text file rewritten after every rerun
+# and a JSON lines log appended to; empty leaves them off.
+METRICS_PROMETHEUS_FILE = os.environ.get("DASHBOARD_METRICS_PROMETHEUS_FILE", "")
+METRICS_JSONL_FILE = os.environ.get("DASHBOARD_METRICS_JSONL_FILE", "")
+
+# Where admin-requested rerun profiles (speedscope, collapsed stacks and top
+# functions) are written.
+PROFILE_DIR = os.environ.get("DASHBOARD_PROFILE_DIR", ".cache/profiles")
+
+# Trace Python allocations with tracemalloc so admins can diff the top
+# allocating lines between reruns. Slows every allocation down; off by default.
+TRACEMALLOC = os.environ.get("DASHBOARD_TRACEMALLOC", "0") == "1"
+
+# Most bcrypt password checks run at once; logins beyond this many wait their
+# turn instead of all hashing at once.
+AUTH_THREADS = int(os.environ.get("DASHBOARD_AUTH_THREADS", "4"))
+
+# Seconds a login stays valid for a client that reconnects with its session
+# token.
+SESSION_TTL = float(os.environ.get("DASHBOARD_SESSION_TTL", "43200"))
+
+# Filter selections with at most TOP_K_EXACT_ROWS fact rows are computed
+# exactly; larger ones merge per-day sketches instead (top products and
+# customers keep SKETCH_CAPACITY items per day, country and category). The same
+# threshold applies to every sketch-backed output, not only the top-K rankings.
+# 0 always uses the sketches.
+TOP_K_EXACT_ROWS = int(os.environ.get("DASHBOARD_TOP_K_EXACT_ROWS", "100000"))
+SKETCH_CAPACITY = int(os.environ.get("DASHBOARD_SKETCH_CAPACITY", "64"))
+
+# Most product pairs drawn in the co-purchase network, heaviest first.
+NETWORK_MAX_EDGES = int(os.environ.get("DASHBOARD_NETWORK_MAX_EDGES", "2000"))
+
+# Market basket rules multiply BASKET_PARTITION_ORDERS orders at a time, on up
+# to BASKET_THREADS threads.
+BASKET_THREADS = int(os.environ.get("DASHBOARD_BASKET_THREADS", "4"))
+BASKET_PARTITION_ORDERS = int(
+    os.environ.get("DASHBOARD_BASKET_PARTITION_ORDERS", "100000")
+)
+# Association rules need at least BASKET_MIN_ORDERS orders containing both
+# items, however low the minimum support is set.
+BASKET_MIN_ORDERS = int(os.environ.get("DASHBOARD_BASKET_MIN_ORDERS", "10"))
+
+# Weekly sales of each country and category are flagged as anomalies when their
+# robust z-score against the previous ANOMALY_BASELINE_WEEKS weeks reaches
+# ANOMALY_THRESHOLD.
+ANOMALY_THRESHOLD = float(os.environ.get("DASHBOARD_ANOMALY_THRESHOLD", "3.5"))
+ANOMALY_BASELINE_WEEKS = int(os.environ.get("DASHBOARD_ANOMALY_BASELINE_WEEKS", "8"))
+
+
+def configure_pandas():
+    """
+    Set the pandas options the app relies on. Called by every entry point
+    that loads data, before the first frame is built.
+    """
+    import pandas as pd
+
+    # Filtered fact frames and cached outputs are shared between tabs, sessions
+    # and threads. With copy-on-write, a write to any of them copies only the
+    # touched column instead of leaking into the shared frame.
+    pd.set_option("mode.copy_on_write", True)
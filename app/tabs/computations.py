@@ -0,0 +1,666 @@
+"""
+Data behind each dashboard tab, free of any Streamlit calls so it can be reused
+by headless consumers such as the report generator and the cache warmer.
+
+Every output takes a `FilteredView` and is registered in `OUTPUTS`; callers
+normally go through `view.output(name)` so results are cached. Derived fact
+columns are registered in `FEATURES` and read with `view.feature(name)`
+instead of being written into the shared filtered frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+from app.utils.data_processing import (
+    aggregate_sales_by_column,
+    calculate_order_frequency,
+    calculate_order_value,
+    calculate_rfm,
+    calculate_rfm_segments,
+    calculate_top_values,
+    month_to_season,
+    preprocess_sales_data,
+)
+from app import config
+from app.utils.anomalies import detect_anomalies
+from app.utils.basket import association_rules, basket_matrix
+from app.utils.co_purchase import (
+    co_purchase_edges,
+    co_purchase_matrix,
+    network_layout,
+    product_names,
+)
+from app.utils.metric_utils import calculate_repeat_purchase_rate
+from app.utils.metrics import stage_metrics
+from app.utils.sketches import centroid_quantiles
+from app.utils.view import FilteredView
+
+
+def month(view):
+    return view.fact["Order.Date"].dt.month
+
+
+def season(view):
+    return month_to_season(view.feature("Month"))
+
+
+FEATURES = {"Month": month, "Season": season}
+
+
+def daily_sales(view):
+    """
+    Slice the materialized daily sales aggregate for the view's filters.
+
+    Returns:
+        pd.DataFrame: Rows of (Order.Date, Country, Category, Sales, Profit, Lines).
+    """
+    return (
+        view.schema.aggregates["daily_sales"]
+        .select(
+            {"Country": view.countries, "Category": view.categories},
+            date_range=view.date_range,
+        )
+        .reset_index()
+    )
+
+
+def sales_over_time(view):
+    sales = aggregate_sales_by_column(
+        view.output("daily_sales"), group_by="Order.Date", value_column="Sales"
+    )
+    return sales.rename(columns={"Order.Date": "Date", "Sales": "Total Sales"})
+
+
+def comparison_window(date_range, comparison):
+    """
+    Return the comparison window of a date range and the offset that maps its
+    days onto the range.
+
+    Parameters:
+        date_range (tuple): Inclusive (start, end) timestamps.
+        comparison (str): "Previous period" (the equally long window just
+            before) or "Last year" (the same dates a year earlier).
+
+    Returns:
+        tuple: ((start, end), offset).
+    """
+    start, end = date_range
+    if comparison == "Previous period":
+        offset = end - start + pd.Timedelta(days=1)
+    elif comparison == "Last year":
+        offset = pd.DateOffset(years=1)
+    else:
+        raise ValueError(f"Unknown comparison: {comparison}")
+    return (start - offset, end - offset), offset
+
+
+def sales_comparison(view, comparison):
+    """
+    Daily sales of the selected range and of its comparison window, computed
+    in one pass over the materialized daily aggregate.
+
+    Rows covering both windows are selected once and tagged with a window code
+    (1: selected range, 2: comparison window, 3: both, when a long range
+    overlaps its last year) before a single group-by on code and date.
+
+    Parameters:
+        view (FilteredView): The filtered view.
+        comparison (str): See `comparison_window`.
+
+    Returns:
+        pd.DataFrame: "Window" ("Current" or the comparison name), "Date"
+        (comparison days shifted onto the selected range), "Order Date",
+        "Sales", "Profit" and "Lines"; None without a date range.
+    """
+    if view.date_range is None:
+        return None
+    start, end = view.date_range
+    (previous_start, previous_end), offset = comparison_window(
+        view.date_range, comparison
+    )
+    daily = view.schema.aggregates["daily_sales"].select(
+        segment_filters(view), (min(start, previous_start), max(end, previous_end))
+    )
+    dates = daily.index.get_level_values("Order.Date")
+    codes = ((dates >= start) & (dates <= end)).astype(np.int8) + 2 * (
+        (dates >= previous_start) & (dates <= previous_end)
+    ).astype(np.int8)
+    by_code = (
+        daily.groupby([codes, dates])[["Sales", "Profit", "Lines"]]
+        .sum()
+        .rename_axis(["Code", "Order Date"])
+        .reset_index()
+        # Days in both windows are grouped after the others; keep each window
+        # in date order for the line chart.
+        .sort_values("Order Date", kind="stable")
+    )
+    current = by_code[(by_code["Code"] & 1).astype(bool)]
+    previous = by_code[(by_code["Code"] & 2).astype(bool)]
+    return pd.concat(
+        [
+            current.assign(Window="Current", Date=current["Order Date"]),
+            previous.assign(Window=comparison, Date=previous["Order Date"] + offset),
+        ],
+        ignore_index=True,
+    )[["Window", "Date", "Order Date", "Sales", "Profit", "Lines"]]
+
+
+def comparison_kpis(view, comparison):
+    """
+    Sales KPIs of the selected range and of its comparison window.
+
+    Returns:
+        pd.DataFrame: "Total Sales", "Average Sales (per Day)" and "Order
+        Lines" indexed by window ("Current" and `comparison`); None without a
+        date range.
+    """
+    sales = view.output("sales_comparison", comparison=comparison)
+    if sales is None:
+        return None
+    kpis = sales.groupby("Window").agg(
+        **{
+            "Total Sales": ("Sales", "sum"),
+            "Average Sales (per Day)": ("Sales", "mean"),
+            "Order Lines": ("Lines", "sum"),
+        }
+    )
+    return kpis.reindex(["Current", comparison])
+
+
+def sales_by(view, column):
+    sales = aggregate_sales_by_column(
+        view.output("daily_sales"), group_by=column, value_column="Sales"
+    )
+    return sales.rename(columns={"Sales": "Total Sales"})
+
+
+def is_large(view):
+    """
+    Whether the view has more than `config.TOP_K_EXACT_ROWS` fact rows and
+    should be summarized approximately.
+    """
+    return view.output("daily_sales")["Lines"].sum() > config.TOP_K_EXACT_ROWS
+
+
+def sketch_for(view, name):
+    """
+    Return the registered sketch aggregate `name` when the view is large
+    enough to read from it (see `is_large`), otherwise None.
+    """
+    aggregate = view.schema.aggregates.get(name)
+    if aggregate is None or not is_large(view):
+        return None
+    return aggregate
+
+
+def segment_filters(view):
+    return {"Country": view.countries, "Category": view.categories}
+
+
+def distinct_counts(view):
+    """
+    Count the distinct orders and customers of the view, from HyperLogLog
+    sketches for large selections.
+
+    Returns:
+        dict: "Unique Orders", "Unique Customers" and "Relative Error", the
+        relative standard error of the counts (0.0 when they are exact).
+    """
+    orders = sketch_for(view, "distinct_orders")
+    customers = sketch_for(view, "distinct_customers")
+    if orders is None or customers is None:
+        return {
+            "Unique Orders": view.fact["Order.ID"].nunique(),
+            "Unique Customers": view.fact["Customer.Code"].nunique(),
+            "Relative Error": 0.0,
+        }
+    return {
+        "Unique Orders": orders.count(segment_filters(view), view.date_range),
+        "Unique Customers": customers.count(segment_filters(view), view.date_range),
+        "Relative Error": max(orders.relative_error, customers.relative_error),
+    }
+
+
+def repeat_purchase_rate(view):
+    """
+    Percentage of the view's customers with more than one order line, from a
+    customer sample sketch for large selections.
+
+    Returns:
+        dict: "Repeat Purchase Rate" and "Repeat Rate Error", the standard
+        error of the rate in percentage points (0.0 when it is exact).
+    """
+    sketch = sketch_for(view, "repeat_purchases")
+    if sketch is None:
+        customers = view.schema.join_labels(view.fact, ["Customer.Name"])
+        return {
+            "Repeat Purchase Rate": calculate_repeat_purchase_rate(customers),
+            "Repeat Rate Error": 0.0,
+        }
+    rate, error = sketch.estimate(segment_filters(view), view.date_range)
+    return {"Repeat Purchase Rate": rate, "Repeat Rate Error": error}
+
+
+def sales_kpis(view):
+    # Range totals are two prefix-sum lookups per (country, category) segment,
+    # however long the history is.
+    prefix_sums = view.schema.aggregates["prefix_sums"]
+    totals = prefix_sums.totals(segment_filters(view), view.date_range)
+    days = prefix_sums.active_days(segment_filters(view), view.date_range)
+    return {
+        "Total Sales": totals["Sales"],
+        "Average Sales (per Day)": totals["Sales"] / days if days else float("nan"),
+        "Order Lines": totals["Lines"],
+        **view.output("distinct_counts"),
+        **view.output("repeat_purchase_rate"),
+    }
+
+
+def moving_averages(view):
+    return view.schema.aggregates["prefix_sums"].moving_averages(
+        segment_filters(view), view.date_range
+    )
+
+
+def trailing_sales(view):
+    """
+    Sales of the last 7, 30 and 90 days of the selected range and of the
+    windows just before them.
+
+    Returns:
+        pd.DataFrame: "Days", "Sales", "Previous Sales" and "Change", the
+        relative change (NaN without previous sales).
+    """
+    end = view.date_range[1] if view.date_range else None
+    windows = view.schema.aggregates["prefix_sums"].window_totals(
+        segment_filters(view), end
+    )
+    windows = windows[["Days", "Sales", "Previous Sales"]]
+    previous = windows["Previous Sales"].where(windows["Previous Sales"] != 0)
+    return windows.assign(Change=windows["Sales"] / previous - 1)
+
+
+def sales_anomalies(view):
+    """
+    Weeks in which a country and category sold far more or less than in the
+    weeks before (see `detect_anomalies`), for the view's countries,
+    categories and dates.
+
+    Every series is scored in one pass per data version, shared by all filter
+    selections, which only pick rows of the result.
+
+    Returns:
+        pd.DataFrame: See `detect_anomalies`.
+    """
+    if view.key == ((), (), None):
+        return detect_anomalies(
+            view.schema.aggregates["prefix_sums"],
+            window=config.ANOMALY_BASELINE_WEEKS,
+            threshold=config.ANOMALY_THRESHOLD,
+        )
+    anomalies = FilteredView(view.schema, cache=view.cache).output("sales_anomalies")
+    mask = np.ones(len(anomalies), dtype=bool)
+    for level, values in segment_filters(view).items():
+        if values:
+            mask &= anomalies[level].isin(values).to_numpy()
+    if view.date_range:
+        mask &= anomalies["Week Ending"].between(*view.date_range).to_numpy()
+    return anomalies[mask].reset_index(drop=True)
+
+
+def top_values(view, group_by, value_column, sketch, top_n=10):
+    """
+    Rank the top `top_n` `group_by` labels of the view by `value_column`.
+
+    Large selections (see `sketch_for`) merge the `sketch` heavy-hitter
+    aggregate instead of grouping the filtered rows; the result then carries
+    `attrs["error_bound"]`.
+
+    Returns:
+        pd.DataFrame: Columns `group_by` and `value_column`, largest first.
+    """
+    aggregate = sketch_for(view, sketch)
+    if aggregate is not None and aggregate.value_column == value_column:
+        return aggregate.top(
+            segment_filters(view), date_range=view.date_range, top_n=top_n
+        )
+    return calculate_top_values(
+        view.fact,
+        group_by=group_by,
+        value_column=value_column,
+        sort_by=value_column,
+        top_n=top_n,
+        schema=view.schema,
+    )
+
+
+def approximation_note(ranking):
+    """
+    Describe the error of an approximate ranking from `top_values`.
+
+    Returns:
+        str or None: A caption for sketch-based rankings, None for exact ones.
+    """
+    if "error_bound" not in ranking.attrs:
+        return None
+    return (
+        "Approximate ranking from heavy-hitter sketches: listed totals may be "
+        f"understated by up to ${ranking.attrs['error_bound']:,.0f}."
+    )
+
+
+def top_products(view, value_column="Sales", top_n=10):
+    return top_values(view, "Product Name", value_column, "top_products", top_n)
+
+
+def category_treemap(view):
+    return view.schema.aggregate(view.fact, ["Category", "Sub-Category"], "Sales")
+
+
+def most_sold_category_by_country(view):
+    country_category_sales = view.output("sales_heatmap")
+    return country_category_sales.loc[
+        country_category_sales.groupby("Country")["Sales"].idxmax()
+    ]
+
+
+def seasonal_sales(view):
+    filtered_df = view.fact.assign(Season=view.feature("Season"))
+    return view.schema.aggregate(filtered_df, ["Season", "Category"], "Sales")
+
+
+def co_purchase_layout(view):
+    """
+    Layout of the co-purchase network of all orders, computed once per data
+    version and shared by every filter selection.
+
+    Returns:
+        pd.DataFrame: "x" and "y" of every co-purchased product, indexed by
+        Product.ID.
+    """
+    if view.key != ((), (), None):
+        return FilteredView(view.schema, cache=view.cache).output("co_purchase_layout")
+    matrix, labels = co_purchase_matrix(view.fact, view.schema)
+    linked = np.flatnonzero(matrix.getnnz(axis=1))
+    return pd.DataFrame(
+        network_layout(matrix[linked][:, linked]),
+        columns=["x", "y"],
+        index=labels.take(linked),
+    )
+
+
+def co_purchase_network(view, min_orders=1):
+    """
+    Product pairs bought together in at least `min_orders` of the view's
+    orders, at most `config.NETWORK_MAX_EDGES` of the heaviest.
+
+    Returns:
+        pd.DataFrame: "Source", "Target" (Product.IDs), "Orders" and the
+        "Source Product" and "Target Product" names.
+    """
+    matrix, labels = co_purchase_matrix(view.fact, view.schema)
+    edges = co_purchase_edges(matrix, min_orders, config.NETWORK_MAX_EDGES)
+    edges = edges.assign(
+        Source=labels.take(edges["Source"]), Target=labels.take(edges["Target"])
+    )
+    names = product_names(view.schema)
+    return edges.assign(
+        **{
+            "Source Product": names.reindex(edges["Source"]).to_numpy(),
+            "Target Product": names.reindex(edges["Target"]).to_numpy(),
+        }
+    )
+
+
+def basket_rules(view, level="Product", min_support=0.0001):
+    """
+    Association rules between the products (or `level` labels, e.g.
+    "Sub-Category") bought in the view's orders.
+
+    Returns:
+        pd.DataFrame: See `association_rules`.
+    """
+    matrix, labels = basket_matrix(view.fact, view.schema, level)
+    return association_rules(
+        matrix,
+        labels,
+        min_support,
+        min_orders=config.BASKET_MIN_ORDERS,
+        partition_orders=config.BASKET_PARTITION_ORDERS,
+        threads=config.BASKET_THREADS,
+    )
+
+
+def top_customers(view, top_n=10):
+    return top_values(view, "Customer.Name", "Sales", "top_customers", top_n)
+
+
+def customer_rfm(view):
+    # RFM metrics cover the view's rows; segments come from each customer's
+    # lifetime metrics, so they do not shift with the filters.
+    max_date = view.fact["Order.Date"].max()
+    rfm = calculate_rfm(view.fact, max_date, schema=view.schema)
+    segmentation = view.schema.aggregates.get("customer_segments")
+    if segmentation is None:
+        return calculate_rfm_segments(rfm, approximate=is_large(view))
+    return rfm.assign(Segment=segmentation.segments(view.schema, rfm["Customer.Name"]))
+
+
+# The customer drill-down reads the "customer_history" index directly: a lookup
+# is cheaper than a cache entry, and it covers a customer's whole history
+# whatever the filters. The product picker does the same with "product_series".
+CUSTOMER_LINE_LABELS = ["Product Name", "Category", "Sub-Category"]
+CUSTOMER_LINE_COLUMNS = [
+    "Order.ID",
+    "Order.Date",
+    *CUSTOMER_LINE_LABELS,
+    "Sales",
+    "Profit",
+    "Ship.Mode",
+]
+
+
+def customer_search(view, query, limit=50):
+    """
+    Find customers whose name or ID has a word starting with each word of the
+    query.
+
+    Returns:
+        pd.DataFrame: The matching customers' dimension rows plus
+        "Customer.Code" and lifetime "Sales", largest first.
+    """
+    history = view.schema.aggregates["customer_history"]
+    codes = history.search(query, limit)
+    return view.schema.customers.iloc[codes].assign(
+        **{
+            "Customer.Code": codes,
+            "Sales": history.totals["Sales"].to_numpy()[codes],
+        }
+    )
+
+
+def customer_profile(view, code):
+    """
+    A customer's lifetime totals and RFM position, and their order lines.
+
+    Returns:
+        tuple: (dict, see `CustomerHistory.profile`; pd.DataFrame of the
+        order lines with product labels, newest first).
+    """
+    history = view.schema.aggregates["customer_history"]
+    lines = view.schema.join_labels(history.history(code), CUSTOMER_LINE_LABELS)
+    return history.profile(code), lines.iloc[::-1][CUSTOMER_LINE_COLUMNS]
+
+
+def product_search(view, query, limit=50):
+    """
+    Find products of the view's categories with a word starting with each
+    word of the query.
+
+    Returns:
+        pd.Index: Product names by descending total sales.
+    """
+    return view.schema.aggregates["product_series"].search(
+        query, view.categories, limit
+    )
+
+
+def product_sales_trend(view, product):
+    """
+    Daily sales of one product for the view's filters, sliced from the
+    per-product series instead of scanning the filtered rows.
+
+    Returns:
+        pd.DataFrame: "Order.Date" and "Sales".
+    """
+    return view.schema.aggregates["product_series"].series(
+        product, segment_filters(view), view.date_range
+    )
+
+
+def sales_heatmap(view):
+    return view.schema.aggregate(view.fact, ["Country", "Category"], "Sales")
+
+
+def region_sales(view):
+    region_sales = view.schema.aggregate(view.fact, "Country", "Sales")
+    region_sales.columns = ["Country", "Total Sales"]
+    return region_sales
+
+
+def shipping_costs(view):
+    shipping_costs = view.schema.aggregate(
+        view.fact, "Country", "Shipping.Cost", agg_func="mean"
+    )
+    shipping_costs.columns = ["Country", "Average Shipping Cost"]
+    return shipping_costs
+
+
+def regional_product_sales(view):
+    regional_product_sales = view.schema.aggregate(
+        view.fact, ["Country", "Product.ID"], "Sales"
+    )
+    regional_product_sales.columns = ["Country", "Product ID", "Regional Product Sales"]
+    return regional_product_sales
+
+
+def region_profit(view):
+    region_profit = view.schema.aggregate(view.fact, "Country", "Profit")
+    region_profit.columns = ["Country", "Total Profit"]
+    return region_profit
+
+
+def region_monthly_sales(view):
+    filtered_df = view.fact.assign(Month=view.feature("Month"))
+    region_monthly_sales = view.schema.aggregate(
+        filtered_df, ["Country", "Month"], "Sales"
+    )
+    region_monthly_sales.columns = ["Country", "Month", "Monthly Sales"]
+    return region_monthly_sales
+
+
+def order_frequency(view):
+    return calculate_order_frequency(view.orders, schema=view.schema)
+
+
+def order_value(view):
+    return calculate_order_value(view.orders)
+
+
+def order_value_digest(view):
+    """
+    Merge the order value t-digests of a large selection (see `sketch_for`).
+
+    Returns:
+        pd.DataFrame or None: "Mean" and "Weight" centroids, or None when the
+        order values are computed exactly instead.
+    """
+    sketch = sketch_for(view, "order_value_quantiles")
+    if sketch is None:
+        return None
+    return sketch.centroids(segment_filters(view), view.date_range)
+
+
+def order_value_summary(view):
+    """
+    Average, median, 90th and 99th percentile order value, from the order
+    value digest for large selections.
+
+    Returns:
+        dict: The four values plus "Approximate".
+    """
+    quantiles = [0.5, 0.9, 0.99]
+    digest = view.output("order_value_digest")
+    if digest is None:
+        order_value = view.output("order_value")["Order Value"]
+        average = order_value.mean()
+        values = order_value.quantile(quantiles).to_numpy()
+    else:
+        sales = view.output("daily_sales")["Sales"].sum()
+        average = sales / view.output("distinct_counts")["Unique Orders"]
+        values = centroid_quantiles(digest, quantiles)
+    return {
+        "Average Order Value": average,
+        "Median": values[0],
+        "90th Percentile": values[1],
+        "99th Percentile": values[2],
+        "Approximate": digest is not None,
+    }
+
+
+def sales_history(view, granularity="Daily"):
+    return preprocess_sales_data(
+        view.fact,
+        date_column="Order.Date",
+        sales_column="Sales",
+        granularity=granularity,
+    )
+
+
+def sales_forecast(view, periods=30, granularity="Daily"):
+    from scripts.forecasting.sales_forecasting import forecast_sales_prophet
+
+    history = view.output("sales_history", granularity=granularity)
+    with stage_metrics.stage("forecast", rows_in=len(history)) as record:
+        forecast = forecast_sales_prophet(history, periods)
+        record.rows_out = len(forecast)
+    return forecast
+
+
+OUTPUTS = {
+    output.__name__: output
+    for output in [
+        daily_sales,
+        sales_over_time,
+        sales_by,
+        distinct_counts,
+        repeat_purchase_rate,
+        sales_kpis,
+        sales_comparison,
+        comparison_kpis,
+        moving_averages,
+        trailing_sales,
+        sales_anomalies,
+        top_products,
+        category_treemap,
+        most_sold_category_by_country,
+        seasonal_sales,
+        co_purchase_layout,
+        co_purchase_network,
+        basket_rules,
+        top_customers,
+        customer_rfm,
+        sales_heatmap,
+        region_sales,
+        shipping_costs,
+        regional_product_sales,
+        region_profit,
+        region_monthly_sales,
+        order_frequency,
+        order_value,
+        order_value_digest,
+        order_value_summary,
+        sales_history,
+        sales_forecast,
+    ]
+}
@@ -1,120 +1,101 @@
-import pandas as pd
 import streamlit as st
-from app.utils.visualizations import (
-    create_pie_chart,
-    create_bar_chart,
-    create_scatter_plot,
+from app.tabs.computations import (
+    approximation_note,
+    customer_profile,
+    customer_search,
 )
 
 
-def render_customer_insights(filtered_df):
-    filtered_df["Order.Date"] = pd.to_datetime(filtered_df["Order.Date"])
-    max_date = filtered_df["Order.Date"].max()
-
+def render_customer_insights(view):
     st.subheader("Top Customers by Sales")
-    customer_sales = (
-        filtered_df.groupby("Customer.Name")["Sales"]
-        .sum()
-        .reset_index()
-        .sort_values("Sales", ascending=False)
-        .head(10)
-    )
+    customer_sales = view.output("top_customers")
+    note = approximation_note(customer_sales)
+    if note:
+        st.caption(note)
 
     if st.session_state["role"] == "admin":
         with st.expander("View Top Customers by Sales"):
             st.dataframe(customer_sales)
 
-    st.plotly_chart(
-        create_bar_chart(
-            customer_sales,
-            x="Customer.Name",
-            y="Sales",
-            title="Top Customers by Sales",
-            labels={"Customer.Name": "Customer Name", "Sales": "Sales ($)"},
-        ),
+    # Clicking a bar opens that customer in the drill-down below.
+    selection = st.plotly_chart(
+        view.figure("top_customers_chart"),
         use_container_width=True,
+        on_select="rerun",
+        selection_mode="points",
+        key="top_customers_selection",
     )
+    clicked = [point["x"] for point in selection.selection.points]
 
-    st.subheader("Customer Lifetime Value (CLV)")
-    customer_clv = (
-        filtered_df.groupby("Customer.Name")["Sales"]
-        .sum()
-        .reset_index()
-        .rename(columns={"Sales": "CLV"})
-        .sort_values("CLV", ascending=False)
-        .head(10)
+    st.subheader("Customer Drill-Down")
+    query = st.text_input(
+        "Search Customers",
+        value=clicked[0] if clicked else "",
+        placeholder="Name or customer ID",
     )
+    matches = customer_search(view, query)
+    if matches.empty:
+        st.info("No customers match the search.")
+    else:
+        labels = dict(
+            zip(
+                matches["Customer.Code"],
+                matches["Customer.Name"]
+                + " ("
+                + matches["Customer.ID"]
+                + ", "
+                + matches["Country"]
+                + ")",
+            )
+        )
+        code = st.selectbox("Customer", list(labels), format_func=labels.get)
+        profile, lines = customer_profile(view, code)
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Lifetime Sales", f"${profile['Sales']:,.2f}")
+        col2.metric("Lifetime Profit", f"${profile['Profit']:,.2f}")
+        col3.metric("Orders", profile["Orders"])
+        col4.metric("Customer Since", f"{profile['First Order']:%Y-%m-%d}")
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric(
+            "Recency",
+            f"{profile['Recency']} days",
+            help=f"At least as recent as {profile['Recency Rank']:.0%} of customers.",
+        )
+        col2.metric(
+            "Frequency",
+            f"{profile['Lines']} lines",
+            help=f"At least as frequent as {profile['Frequency Rank']:.0%} of customers.",
+        )
+        col3.metric(
+            "Monetary Rank",
+            f"{profile['Monetary Rank']:.0%}",
+            help="Share of customers this customer spent at least as much as.",
+        )
+
+        st.caption("All orders of the customer, regardless of the sidebar filters.")
+        st.dataframe(lines, hide_index=True)
 
+    st.subheader("Customer Lifetime Value (CLV)")
     if st.session_state["role"] == "admin":
         with st.expander("View Customer Lifetime Value"):
-            st.dataframe(customer_clv)
+            st.dataframe(customer_sales.rename(columns={"Sales": "CLV"}))
 
-    st.plotly_chart(
-        create_bar_chart(
-            customer_clv,
-            x="Customer.Name",
-            y="CLV",
-            title="Top Customers by Lifetime Value",
-            labels={"Customer.Name": "Customer Name", "CLV": "Lifetime Value ($)"},
-        ),
-        use_container_width=True,
-    )
+    st.plotly_chart(view.figure("customer_clv_chart"), use_container_width=True)
 
     st.subheader("RFM Analysis")
-    rfm = (
-        filtered_df.groupby("Customer.Name")
-        .agg(
-            Recency=("Order.Date", lambda x: (max_date - x.max()).days),
-            Frequency=("Order.ID", "count"),
-            Monetary=("Sales", "sum"),
-        )
-        .reset_index()
-    )
-
-    rfm["RFM_Score"] = rfm["Recency"] + rfm["Frequency"] + rfm["Monetary"]
-    rfm["RFM_Score_rank"] = rfm["RFM_Score"].rank(method="first")
-
-    try:
-        rfm["Segment"] = pd.qcut(
-            rfm["RFM_Score_rank"],
-            q=4,
-            labels=["Low-Value", "Mid-Value", "High-Value", "Top-Value"],
-        )
-    except ValueError:
-        rfm["Segment"] = "Single Segment"
+    rfm = view.output("customer_rfm")
 
     if st.session_state["role"] == "admin":
         with st.expander("View RFM Metrics"):
             st.dataframe(rfm.head(10))
 
-    st.plotly_chart(
-        create_scatter_plot(
-            rfm,
-            x="Recency",
-            y="Frequency",
-            size="Monetary",
-            color="Monetary",
-            title="RFM Analysis: Recency vs Frequency",
-            labels={
-                "Recency": "Recency (Days)",
-                "Frequency": "Frequency",
-                "Monetary": "Monetary Value ($)",
-            },
-        ),
-        use_container_width=True,
-    )
+    st.plotly_chart(view.figure("rfm_scatter"), use_container_width=True)
 
     st.subheader("Customer Segmentation")
-
     if st.session_state["role"] == "admin":
         with st.expander("View Customer Segments"):
             st.dataframe(rfm[["Customer.Name", "Segment"]].head(10))
 
-    st.plotly_chart(
-        create_pie_chart(
-            rfm,
-            names="Segment",
-            title="Customer Segmentation by RFM Score",
-        ),
-        use_container_width=True,
-    )
+    st.plotly_chart(view.figure("segment_pie"), use_container_width=True)
@@ -0,0 +1,342 @@
+"""
+Figures shown on the dashboard tabs, built from the cached outputs of a
+`FilteredView`. Callers normally go through `view.figure(name)` so each figure
+is built once per filter selection and data version.
+"""
+
+from app.utils.co_purchase import product_names
+from app.utils.visualizations import (
+    create_bar_chart,
+    create_bar_chart_grouped,
+    create_category_choropleth,
+    create_choropleth_map,
+    create_forecast_plot,
+    create_heatmap,
+    create_histogram,
+    create_line_chart,
+    create_network_graph,
+    create_pie_chart,
+    create_regional_bar_chart,
+    create_scatter_plot,
+    create_treemap,
+)
+
+
+def sales_over_time_chart(view, comparison=None):
+    # With a comparison, the comparison window is overlaid as a second line
+    # shifted onto the selected dates.
+    labels = {"Date": "Order Date", "Total Sales": "Sales ($)", "Window": ""}
+    if comparison is not None:
+        sales = view.output("sales_comparison", comparison=comparison)
+        if sales is not None:
+            return create_line_chart(
+                sales.rename(columns={"Sales": "Total Sales"}),
+                x="Date",
+                y="Total Sales",
+                title="Sales Over Time",
+                labels=labels,
+                color="Window",
+            )
+    return create_line_chart(
+        view.output("sales_over_time"),
+        x="Date",
+        y="Total Sales",
+        title="Sales Over Time",
+        labels=labels,
+    )
+
+
+def moving_average_chart(view):
+    return create_line_chart(
+        view.output("moving_averages"),
+        x="Date",
+        y=["Sales", "7-Day Average", "30-Day Average", "90-Day Average"],
+        title="Daily Sales and Moving Averages",
+        labels={"Date": "Order Date", "value": "Sales ($)", "variable": ""},
+        line_width=2,
+    )
+
+
+def category_sales_chart(view):
+    return create_bar_chart(
+        view.output("sales_by", column="Category"),
+        x="Category",
+        y="Total Sales",
+        title="Sales by Product Category",
+        labels={"Category": "Product Category", "Total Sales": "Sales ($)"},
+        text="Total Sales",
+    )
+
+
+def country_sales_chart(view):
+    return create_bar_chart(
+        view.output("sales_by", column="Country"),
+        x="Country",
+        y="Total Sales",
+        title="Sales by Country",
+        labels={"Country": "Country", "Total Sales": "Sales ($)"},
+        text="Total Sales",
+    )
+
+
+def country_sales_map(view):
+    return create_choropleth_map(
+        view.output("sales_by", column="Country"),
+        locations="Country",
+        locationmode="country names",
+        color="Total Sales",
+        title="Sales Distribution Across Countries",
+        labels={"Country": "Country", "Total Sales": "Sales ($)"},
+    )
+
+
+def top_products_chart(view, value_column="Sales"):
+    title = (
+        "Top-Selling Products by Sales"
+        if value_column == "Sales"
+        else "Most Profitable Products"
+    )
+    return create_bar_chart_grouped(
+        view.output("top_products", value_column=value_column),
+        x="Product Name",
+        y=[value_column],
+        title=title,
+        labels={"Product Name": "Product", value_column: f"{value_column} ($)"},
+    )
+
+
+def category_treemap_chart(view):
+    return create_treemap(
+        view.output("category_treemap"),
+        path=["Category", "Sub-Category"],
+        values="Sales",
+    )
+
+
+def co_purchase_chart(view, min_orders=1):
+    return create_network_graph(
+        view.output("co_purchase_network", min_orders=min_orders),
+        view.output("co_purchase_layout"),
+        source="Source",
+        target="Target",
+        weight="Orders",
+        title="Products Bought Together",
+        names=product_names(view.schema),
+    )
+
+
+def most_sold_category_map(view):
+    return create_category_choropleth(
+        view.output("most_sold_category_by_country"),
+        locations="Country",
+        color="Category",
+        title="Most Sold Product Category by Country",
+        labels={"Category": "Product Category"},
+    )
+
+
+def seasonal_sales_chart(view):
+    return create_bar_chart_grouped(
+        view.output("seasonal_sales"),
+        x="Season",
+        y=["Sales"],
+        title="Seasonal Sales by Category",
+        labels={
+            "Season": "Season",
+            "Sales": "Total Sales ($)",
+            "Category": "Product Category",
+        },
+        color="Category",
+    )
+
+
+def top_customers_chart(view):
+    return create_bar_chart(
+        view.output("top_customers"),
+        x="Customer.Name",
+        y="Sales",
+        title="Top Customers by Sales",
+        labels={"Customer.Name": "Customer Name", "Sales": "Sales ($)"},
+    )
+
+
+def customer_clv_chart(view):
+    return create_bar_chart(
+        view.output("top_customers").rename(columns={"Sales": "CLV"}),
+        x="Customer.Name",
+        y="CLV",
+        title="Top Customers by Lifetime Value",
+        labels={"Customer.Name": "Customer Name", "CLV": "Lifetime Value ($)"},
+    )
+
+
+def rfm_scatter(view):
+    return create_scatter_plot(
+        view.output("customer_rfm"),
+        x="Recency",
+        y="Frequency",
+        size="Monetary",
+        color="Monetary",
+        title="RFM Analysis: Recency vs Frequency",
+        labels={
+            "Recency": "Recency (Days)",
+            "Frequency": "Frequency",
+            "Monetary": "Monetary Value ($)",
+        },
+    )
+
+
+def segment_pie(view):
+    return create_pie_chart(
+        view.output("customer_rfm"),
+        names="Segment",
+        title="Customer Segments by RFM Cluster",
+    )
+
+
+def sales_heatmap_chart(view):
+    return create_heatmap(
+        view.output("sales_heatmap"), x="Country", y="Category", values="Sales"
+    )
+
+
+def region_sales_chart(view):
+    return create_regional_bar_chart(
+        view.output("region_sales"),
+        x="Country",
+        y="Total Sales",
+        title="Total Sales by Country",
+        labels={"Country": "Country", "Total Sales": "Sales ($)"},
+    )
+
+
+def shipping_costs_chart(view):
+    return create_regional_bar_chart(
+        view.output("shipping_costs"),
+        x="Country",
+        y="Average Shipping Cost",
+        title="Average Shipping Cost by Country",
+        labels={"Country": "Country", "Average Shipping Cost": "Cost ($)"},
+    )
+
+
+def regional_preferences_chart(view):
+    return create_regional_bar_chart(
+        view.output("regional_product_sales"),
+        x="Country",
+        y="Regional Product Sales",
+        color="Product ID",
+        title="Top-Selling Products by Country",
+        labels={"Country": "Country", "Regional Product Sales": "Sales ($)"},
+        barmode="stack",
+    )
+
+
+def region_profit_chart(view):
+    return create_regional_bar_chart(
+        view.output("region_profit"),
+        x="Country",
+        y="Total Profit",
+        title="Total Profit by Country",
+        labels={"Country": "Country", "Total Profit": "Profit ($)"},
+    )
+
+
+def region_seasonality_chart(view):
+    return create_line_chart(
+        view.output("region_monthly_sales"),
+        x="Month",
+        y="Monthly Sales",
+        color="Country",
+        title="Monthly Sales by Country",
+        labels={"Month": "Month", "Monthly Sales": "Sales ($)"},
+    )
+
+
+def anomaly_chart(view):
+    # One marker per flagged week and market, sized by how far it departs
+    # from the weeks before.
+    anomalies = view.output("sales_anomalies")
+    anomalies = anomalies.assign(
+        Market=anomalies["Country"] + " / " + anomalies["Category"],
+        Direction=anomalies["Score"].lt(0).map({True: "Drop", False: "Spike"}),
+        Strength=anomalies["Score"].abs(),
+    )
+    return create_scatter_plot(
+        anomalies,
+        x="Week Ending",
+        y="Market",
+        size="Strength",
+        color="Direction",
+        title="Sales Anomalies by Country and Category",
+        labels={"Week Ending": "Week Ending", "Market": "", "Strength": "|Score|"},
+    )
+
+
+def order_frequency_histogram(view):
+    return create_histogram(
+        view.output("order_frequency"),
+        x="Order Count",
+        title="Distribution of Order Frequency",
+        labels={"Order Count": "Number of Orders", "count": "Number of Customers"},
+    )
+
+
+def order_value_histogram(view):
+    # Large selections plot the centroids of the merged order value digest,
+    # each counted by the orders it stands for.
+    digest = view.output("order_value_digest")
+    labels = {"Order Value": "Order Value ($)", "count": "Number of Orders"}
+    if digest is not None:
+        return create_histogram(
+            digest.rename(columns={"Mean": "Order Value"}),
+            x="Order Value",
+            title="Distribution of Order Values",
+            labels=labels,
+            weights="Weight",
+        )
+    return create_histogram(
+        view.output("order_value"),
+        x="Order Value",
+        title="Distribution of Order Values",
+        labels=labels,
+    )
+
+
+def sales_forecast_chart(view, periods=30, granularity="Daily"):
+    return create_forecast_plot(
+        view.output("sales_history", granularity=granularity),
+        view.output("sales_forecast", periods=periods, granularity=granularity),
+        title=f"Sales Forecast ({granularity})",
+    )
+
+
+FIGURES = {
+    figure.__name__: figure
+    for figure in [
+        sales_over_time_chart,
+        moving_average_chart,
+        category_sales_chart,
+        country_sales_chart,
+        country_sales_map,
+        top_products_chart,
+        category_treemap_chart,
+        co_purchase_chart,
+        most_sold_category_map,
+        seasonal_sales_chart,
+        top_customers_chart,
+        customer_clv_chart,
+        rfm_scatter,
+        segment_pie,
+        sales_heatmap_chart,
+        region_sales_chart,
+        shipping_costs_chart,
+        regional_preferences_chart,
+        region_profit_chart,
+        region_seasonality_chart,
+        anomaly_chart,
+        order_frequency_histogram,
+        order_value_histogram,
+        sales_forecast_chart,
+    ]
+}
@@ -1,10 +1,71 @@
 import streamlit as st
-import pandas as pd
-from app.utils.auth_utils import check_credentials
+import streamlit.components.v1 as components
+from app.utils.auth_utils import check_credentials, session_tokens, user_store
 
+# Name of the cookie holding the session token. It is never put in the URL,
+# where browser history, shared links, referrers and proxy logs would keep it.
+SESSION_COOKIE = "dashboard_session"
 
-def load_users():
-    return pd.read_csv("data/users.csv")
+
+def log_in(user):
+    st.session_state["logged_in"] = True
+    st.session_state["username"] = user["username"]
+    st.session_state["name"] = user["name"]
+    st.session_state["surname"] = user["surname"]
+    st.session_state["role"] = user["role"]
+
+
+def restore_session():
+    # Links from before tokens moved to a cookie may still carry one.
+    if "session" in st.query_params:
+        del st.query_params["session"]
+    # A reloading or reconnecting browser sends its token cookie; a valid token
+    # logs it back in without checking the password again. The cookies are the
+    # ones the session started with, so a token ended in this session is
+    # skipped.
+    token = st.context.cookies.get(SESSION_COOKIE)
+    if token is None or token == st.session_state.get("ended_session"):
+        return
+    username = session_tokens.resolve(token)
+    user = user_store.get(username) if username is not None else None
+    if user is None:
+        st.session_state["ended_session"] = token
+        st.session_state["session_cookie"] = ""
+        return
+    log_in(user)
+    st.session_state["session_token"] = token
+
+
+def log_out():
+    token = st.session_state.pop("session_token", None)
+    if token is not None:
+        session_tokens.revoke(token)
+        st.session_state["ended_session"] = token
+    st.session_state["session_cookie"] = ""
+    st.session_state["logged_in"] = False
+
+
+def write_session_cookie():
+    """
+    Set (or, after a logout, delete) the session cookie in the browser when a
+    login or logout asked for it.
+
+    Streamlit cannot set cookies from the server, so a zero-height component,
+    which shares the app's origin, writes it on the app's document.
+    """
+    token = st.session_state.pop("session_cookie", None)
+    if token is None:
+        return
+    max_age = int(session_tokens.ttl) if token else 0
+    components.html(
+        "<script>"
+        "const page = window.parent;"
+        f"page.document.cookie = '{SESSION_COOKIE}={token}; Max-Age={max_age}; "
+        "Path=/; SameSite=Strict' + "
+        "(page.location.protocol === 'https:' ? '; Secure' : '');"
+        "</script>",
+        height=0,
+    )
 
 
 def render_login_tab():
@@ -12,16 +73,14 @@ def render_login_tab():
     st.header("Login")
     username = st.text_input("Username")
     password = st.text_input("Password", type="password")
-    users_df = load_users()
 
     if st.button("Login"):
-        user = check_credentials(username, password, users_df)
+        user = check_credentials(username, password)
         if user is not None:
-            st.session_state["logged_in"] = True
-            st.session_state["username"] = username
-            st.session_state["name"] = user["name"]
-            st.session_state["surname"] = user["surname"]
-            st.session_state["role"] = user["role"]
+            log_in(user)
+            token = session_tokens.issue(username)
+            st.session_state["session_token"] = token
+            st.session_state["session_cookie"] = token
 
             st.success("Logged in successfully!")
             st.rerun()
@@ -1,140 +1,129 @@
 import streamlit as st
-from app.utils.data_processing import calculate_top_values, add_season_column
-from app.utils.visualizations import create_bar_chart_grouped, create_treemap
-import plotly.express as px
+from app import config
+from app.tabs.computations import (
+    approximation_note,
+    product_search,
+    product_sales_trend,
+)
+from app.utils.visualizations import create_bar_chart_grouped
 
 
-def render_product_performance(filtered_df):
-    if "Product Name" in filtered_df.columns:
+def render_product_performance(view):
+    filtered_df, schema = view.fact, view.schema
+
+    if schema.has_column(filtered_df, "Product Name"):
         st.subheader("Top-Selling Products by Sales")
-        product_sales = calculate_top_values(
-            filtered_df, group_by="Product Name", value_column="Sales", sort_by="Sales"
-        )
+        product_sales = view.output("top_products", value_column="Sales")
+        note = approximation_note(product_sales)
+        if note:
+            st.caption(note)
 
         if st.session_state["role"] == "admin":
             with st.expander("View Top-Selling Products Data"):
                 st.dataframe(product_sales)
 
-        st.plotly_chart(
-            create_bar_chart_grouped(
-                product_sales,
-                x="Product Name",
-                y=["Sales"],
-                title="Top-Selling Products by Sales",
-                labels={"Product Name": "Product", "Sales": "Sales ($)"},
-            )
-        )
+        st.plotly_chart(view.figure("top_products_chart", value_column="Sales"))
+
         st.subheader("Sales Distribution by Product Category and Subcategory")
-        treemap_data = (
-            filtered_df.groupby(["Category", "Sub-Category"])["Sales"]
-            .sum()
-            .reset_index()
-        )
-        treemap_fig = create_treemap(
-            treemap_data,
-            path=["Category", "Sub-Category"],
-            values="Sales",
-        )
-        st.plotly_chart(treemap_fig, use_container_width=True)
+        st.plotly_chart(view.figure("category_treemap_chart"), use_container_width=True)
+
         st.subheader("Most Profitable Products")
-        product_profit = calculate_top_values(
-            filtered_df,
-            group_by="Product Name",
-            value_column="Profit",
-            sort_by="Profit",
-        )
+        product_profit = view.output("top_products", value_column="Profit")
 
         if st.session_state["role"] == "admin":
             with st.expander("View Product Profitability Data"):
                 st.dataframe(product_profit)
 
-        st.plotly_chart(
-            create_bar_chart_grouped(
-                product_profit,
-                x="Product Name",
-                y=["Profit"],
-                title="Most Profitable Products",
-                labels={"Product Name": "Product", "Profit": "Profit ($)"},
-            )
-        )
+        st.plotly_chart(view.figure("top_products_chart", value_column="Profit"))
 
         st.subheader("Product Sales Trends Over Time")
-        selected_product = st.selectbox(
-            "Select a Product", filtered_df["Product Name"].unique()
-        )
-        product_trend = (
-            filtered_df[filtered_df["Product Name"] == selected_product]
-            .groupby("Order.Date")["Sales"]
-            .sum()
-            .reset_index()
-        )
-
-        st.plotly_chart(
-            create_bar_chart_grouped(
-                product_trend,
-                x="Order.Date",
-                y=["Sales"],
-                title=f"Sales Trends for {selected_product}",
-                labels={"Order.Date": "Date", "Sales": "Sales ($)"},
-            )
-        )
+        query = st.text_input("Search Products", placeholder="Product name")
+        products = product_search(view, query)
+        if products.empty:
+            st.info("No products match the search.")
+        else:
+            selected_product = st.selectbox("Select a Product", products)
+            product_trend = product_sales_trend(view, selected_product)
+
+            if product_trend.empty:
+                st.info(f"No sales of {selected_product} for the selected filters.")
+            else:
+                st.plotly_chart(
+                    create_bar_chart_grouped(
+                        product_trend,
+                        x="Order.Date",
+                        y=["Sales"],
+                        title=f"Sales Trends for {selected_product}",
+                        labels={"Order.Date": "Date", "Sales": "Sales ($)"},
+                    )
+                )
 
-        if "Category" in filtered_df.columns and "Country" in filtered_df.columns:
+        if schema.has_column(filtered_df, "Category") and schema.has_column(
+            filtered_df, "Country"
+        ):
             st.subheader("Most Sold Product Category by Country")
-
-            country_category_sales = (
-                filtered_df.groupby(["Country", "Category"])["Sales"]
-                .sum()
-                .reset_index()
-            )
-
-            most_sold_category_by_country = country_category_sales.loc[
-                country_category_sales.groupby("Country")["Sales"].idxmax()
-            ]
+            most_sold_category_by_country = view.output("most_sold_category_by_country")
 
             if st.session_state["role"] == "admin":
                 with st.expander("View Most Sold Categories by Country"):
                     st.dataframe(most_sold_category_by_country)
 
-            fig = px.choropleth(
-                most_sold_category_by_country,
-                locations="Country",
-                locationmode="country names",
-                color="Category",
-                title="Most Sold Product Category by Country",
-                labels={"Category": "Product Category"},
-                color_discrete_sequence=px.colors.qualitative.Plotly,
-                template="plotly_white",
+            st.plotly_chart(
+                view.figure("most_sold_category_map"), use_container_width=True
             )
-            fig.update_layout(title={"x": 0.5})
-            st.plotly_chart(fig, use_container_width=True)
 
-        if "Category" in filtered_df.columns:
-            st.subheader("Seasonal Sales by Category")
-            filtered_df = add_season_column(filtered_df, date_column="Order.Date")
-            seasonal_sales = (
-                filtered_df.groupby(["Season", "Category"])["Sales"].sum().reset_index()
+        st.subheader("Products Bought Together")
+        min_orders = st.slider("Minimum Shared Orders", 1, 10, 1)
+        network = view.output("co_purchase_network", min_orders=min_orders)
+
+        if st.session_state["role"] == "admin":
+            with st.expander("View Co-Purchase Data"):
+                st.dataframe(network)
+
+        if network.empty:
+            st.info("No products were bought together in the selected orders.")
+        else:
+            st.plotly_chart(
+                view.figure("co_purchase_chart", min_orders=min_orders),
+                use_container_width=True,
+            )
+
+        st.subheader("Association Rules")
+        col1, col2 = st.columns(2)
+        level = col1.radio("Items", ["Product", "Sub-Category"], horizontal=True)
+        min_support = col2.select_slider(
+            "Minimum Support",
+            options=[0.0001, 0.0005, 0.001, 0.005, 0.01],
+            format_func=lambda support: f"{support:.2%}",
+        )
+        rules = view.output("basket_rules", level=level, min_support=min_support)
+
+        if rules.empty:
+            st.info(
+                "No item pairs reach the minimum support in the selected orders "
+                f"(and at least {config.BASKET_MIN_ORDERS} shared orders)."
             )
+        else:
+            top_rules = rules.head(20)
+            st.dataframe(
+                top_rules.assign(Support=top_rules["Support"] * 100),
+                hide_index=True,
+                column_config={
+                    "Support": st.column_config.NumberColumn(format="%.3f%%"),
+                    "Confidence": st.column_config.NumberColumn(format="%.2f"),
+                    "Lift": st.column_config.NumberColumn(format="%.1f"),
+                },
+            )
+
+        if schema.has_column(filtered_df, "Category"):
+            st.subheader("Seasonal Sales by Category")
+            seasonal_sales = view.output("seasonal_sales")
 
             if st.session_state["role"] == "admin":
                 with st.expander("View Seasonal Sales by Category"):
                     st.dataframe(seasonal_sales)
 
-            st.plotly_chart(
-                create_bar_chart_grouped(
-                    seasonal_sales,
-                    x="Season",
-                    y=["Sales"],
-                    title="Seasonal Sales by Category",
-                    labels={
-                        "Season": "Season",
-                        "Sales": "Total Sales ($)",
-                        "Category": "Product Category",
-                    },
-                    color="Category",
-                )
-            )
-
+            st.plotly_chart(view.figure("seasonal_sales_chart"))
         else:
             st.warning("The 'Category' column is missing in the dataset.")
     else:
@@ -1,25 +1,10 @@
 import streamlit as st
-import pandas as pd
-from app.utils.visualizations import (
-    create_regional_bar_chart,
-    create_line_chart,
-    create_heatmap,
-)
 
 
-def render_regional_analysis(filtered_df):
-
+def render_regional_analysis(view):
     st.subheader("Sales Heatmap by Country and Category")
-    heatmap_data = (
-        filtered_df.groupby(["Country", "Category"])["Sales"].sum().reset_index()
-    )
-    heatmap_fig = create_heatmap(
-        heatmap_data,
-        x="Country",
-        y="Category",
-        values="Sales",
-    )
-    st.plotly_chart(heatmap_fig, use_container_width=True)
+    st.plotly_chart(view.figure("sales_heatmap_chart"), use_container_width=True)
+
     analysis_type = st.selectbox(
         "Select Analysis Type",
         options=[
@@ -28,118 +13,73 @@ def render_regional_analysis(filtered_df):
             "Regional Preferences",
             "Regional Profitability",
             "Regional Seasonality",
+            "Sales Anomalies",
         ],
     )
 
     if analysis_type == "Region Sales":
         st.subheader("Region Sales Analysis")
-        region_sales = filtered_df.groupby("Country")["Sales"].sum().reset_index()
-        region_sales.columns = ["Country", "Total Sales"]
+        region_sales = view.output("region_sales")
 
         if st.session_state["role"] == "admin":
             with st.expander("View Total Sales by Country"):
                 st.dataframe(region_sales)
 
-        st.plotly_chart(
-            create_regional_bar_chart(
-                region_sales,
-                x="Country",
-                y="Total Sales",
-                title="Total Sales by Country",
-                labels={"Country": "Country", "Total Sales": "Sales ($)"},
-            ),
-            use_container_width=True,
-        )
+        st.plotly_chart(view.figure("region_sales_chart"), use_container_width=True)
 
     elif analysis_type == "Shipping Cost":
         st.subheader("Shipping Cost Analysis")
-        shipping_costs = (
-            filtered_df.groupby("Country")["Shipping.Cost"].mean().reset_index()
-        )
-        shipping_costs.columns = ["Country", "Average Shipping Cost"]
+        shipping_costs = view.output("shipping_costs")
 
         if st.session_state["role"] == "admin":
             with st.expander("View Average Shipping Cost by Country"):
                 st.dataframe(shipping_costs)
 
-        st.plotly_chart(
-            create_regional_bar_chart(
-                shipping_costs,
-                x="Country",
-                y="Average Shipping Cost",
-                title="Average Shipping Cost by Country",
-                labels={"Country": "Country", "Average Shipping Cost": "Cost ($)"},
-            ),
-            use_container_width=True,
-        )
+        st.plotly_chart(view.figure("shipping_costs_chart"), use_container_width=True)
 
     elif analysis_type == "Regional Preferences":
         st.subheader("Regional Preferences Analysis")
-        regional_product_sales = (
-            filtered_df.groupby(["Country", "Product.ID"])["Sales"].sum().reset_index()
-        )
-        regional_product_sales.columns = [
-            "Country",
-            "Product ID",
-            "Regional Product Sales",
-        ]
+        regional_product_sales = view.output("regional_product_sales")
 
         if st.session_state["role"] == "admin":
             with st.expander("View Top-Selling Products by Country"):
                 st.dataframe(regional_product_sales)
 
         st.plotly_chart(
-            create_regional_bar_chart(
-                regional_product_sales,
-                x="Country",
-                y="Regional Product Sales",
-                color="Product ID",
-                title="Top-Selling Products by Country",
-                labels={"Country": "Country", "Regional Product Sales": "Sales ($)"},
-                barmode="stack",
-            ),
-            use_container_width=True,
+            view.figure("regional_preferences_chart"), use_container_width=True
         )
 
     elif analysis_type == "Regional Profitability":
         st.subheader("Regional Profitability Analysis")
-        region_profit = filtered_df.groupby("Country")["Profit"].sum().reset_index()
-        region_profit.columns = ["Country", "Total Profit"]
+        region_profit = view.output("region_profit")
+
         if st.session_state["role"] == "admin":
             with st.expander("View Total Profit by Country"):
                 st.dataframe(region_profit)
 
-        st.plotly_chart(
-            create_regional_bar_chart(
-                region_profit,
-                x="Country",
-                y="Total Profit",
-                title="Total Profit by Country",
-                labels={"Country": "Country", "Total Profit": "Profit ($)"},
-            ),
-            use_container_width=True,
-        )
+        st.plotly_chart(view.figure("region_profit_chart"), use_container_width=True)
 
     elif analysis_type == "Regional Seasonality":
         st.subheader("Regional Seasonality Analysis")
-        filtered_df["Month"] = pd.to_datetime(filtered_df["Order.Date"]).dt.month
-        region_monthly_sales = (
-            filtered_df.groupby(["Country", "Month"])["Sales"].sum().reset_index()
-        )
-        region_monthly_sales.columns = ["Country", "Month", "Monthly Sales"]
+        region_monthly_sales = view.output("region_monthly_sales")
 
         if st.session_state["role"] == "admin":
             with st.expander("View Monthly Sales by Country"):
                 st.dataframe(region_monthly_sales)
 
         st.plotly_chart(
-            create_line_chart(
-                region_monthly_sales,
-                x="Month",
-                y="Monthly Sales",
-                color="Country",
-                title="Monthly Sales by Country",
-                labels={"Month": "Month", "Monthly Sales": "Sales ($)"},
-            ),
-            use_container_width=True,
+            view.figure("region_seasonality_chart"), use_container_width=True
         )
+
+    elif analysis_type == "Sales Anomalies":
+        st.subheader("Sales Anomalies by Country and Category")
+        anomalies = view.output("sales_anomalies")
+
+        if st.session_state["role"] == "admin":
+            with st.expander("View Anomalous Weeks"):
+                st.dataframe(anomalies)
+
+        if anomalies.empty:
+            st.info("No unusual weekly sales in the selected countries and categories.")
+        else:
+            st.plotly_chart(view.figure("anomaly_chart"), use_container_width=True)
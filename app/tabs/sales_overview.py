@@ -1,24 +1,16 @@
+import math
+
 import streamlit as st
-from ..utils.data_processing import aggregate_sales_by_column
-from app.utils.visualizations import (
-    create_line_chart,
-    create_bar_chart,
-    create_choropleth_map,
-)
 
 
-def render_sales_overview(filtered_df):
+def render_sales_overview(view):
+    filtered_df, schema = view.fact, view.schema
 
     if st.session_state["role"] == "admin":
         with st.expander("View Filtered Data"):
-            st.dataframe(filtered_df)
+            st.dataframe(schema.materialize(filtered_df))
 
-    sales_over_time = aggregate_sales_by_column(
-        filtered_df, group_by="Order.Date", value_column="Sales"
-    )
-    sales_over_time.rename(
-        columns={"Order.Date": "Date", "Sales": "Total Sales"}, inplace=True
-    )
+    sales_over_time = view.output("sales_over_time")
 
     if sales_over_time.empty:
         st.error("No sales data available for the selected filters.")
@@ -28,83 +20,130 @@ def render_sales_overview(filtered_df):
         with st.expander("Aggregated Sales Data"):
             st.dataframe(sales_over_time)
 
-    total_sales = sales_over_time["Total Sales"].sum()
-    avg_sales = sales_over_time["Total Sales"].mean()
-    total_orders = len(filtered_df)
+    kpis = view.output("sales_kpis")
+    total_sales = kpis["Total Sales"]
+    avg_sales = kpis["Average Sales (per Day)"]
+    order_lines = kpis["Order Lines"]
+    count_help = (
+        f"HyperLogLog estimate, relative standard error {kpis['Relative Error']:.1%}"
+        if kpis["Relative Error"]
+        else None
+    )
+
+    comparison = st.session_state.get("comparison", "None")
+    comparison = None if comparison == "None" else comparison
+    deltas = {}
+    if comparison is not None:
+        comparison_kpis = view.output("comparison_kpis", comparison=comparison)
+        if comparison_kpis is not None:
+            previous = comparison_kpis.loc[comparison]
+            deltas = {
+                name: (
+                    f"{value / previous[name] - 1:+.1%} vs {comparison.lower()}"
+                    if previous[name]
+                    else None
+                )
+                for name, value in [
+                    ("Total Sales", total_sales),
+                    ("Average Sales (per Day)", avg_sales),
+                    ("Order Lines", order_lines),
+                ]
+            }
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric(
+            "Total Sales", f"${total_sales:,.2f}", delta=deltas.get("Total Sales")
+        )
+    with col2:
+        st.metric(
+            "Average Sales (per Day)",
+            f"${avg_sales:,.2f}",
+            delta=deltas.get("Average Sales (per Day)"),
+        )
+    with col3:
+        st.metric("Order Lines", order_lines, delta=deltas.get("Order Lines"))
 
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Total Sales", f"${total_sales:,.2f}")
+        st.metric("Unique Orders", kpis["Unique Orders"], help=count_help)
     with col2:
-        st.metric("Average Sales (per Day)", f"${avg_sales:,.2f}")
+        st.metric("Unique Customers", kpis["Unique Customers"], help=count_help)
     with col3:
-        st.metric("Total Orders", total_orders)
+        st.metric(
+            "Repeat Purchase Rate",
+            f"{kpis['Repeat Purchase Rate']:.1f}%",
+            help=(
+                "Customers with more than one order line, estimated from a sample "
+                f"(standard error {kpis['Repeat Rate Error']:.1f} points)"
+                if kpis["Repeat Rate Error"]
+                else "Customers with more than one order line"
+            ),
+        )
+
+    st.subheader("Recent Sales")
+    trailing_sales = view.output("trailing_sales")
+    for column, window in zip(st.columns(3), trailing_sales.itertuples()):
+        change = None if math.isnan(window.Change) else f"{window.Change:+.1%}"
+        column.metric(
+            f"Last {window.Days} Days",
+            f"${window.Sales:,.2f}",
+            delta=change,
+            help=f"Compared with the {window.Days} days before.",
+        )
+    st.plotly_chart(view.figure("moving_average_chart"), use_container_width=True)
+
+    st.subheader("Sales Anomalies")
+    anomalies = view.output("sales_anomalies")
+    if anomalies.empty:
+        st.info("No unusual weekly sales in the selected countries and categories.")
+    else:
+        # Call out drops in the last week of the selection, which need action.
+        last_week = anomalies["Week Ending"].max()
+        drops = anomalies[
+            (anomalies["Week Ending"] == last_week) & (anomalies["Score"] < 0)
+        ]
+        if not drops.empty and (sales_over_time["Date"].max() - last_week).days < 7:
+            st.warning(
+                f"Sales dropped sharply in the week ending {last_week:%Y-%m-%d} "
+                "for: " + ", ".join(drops["Country"] + " / " + drops["Category"])
+            )
+        recent = anomalies.head(20)
+        st.dataframe(
+            recent.assign(Change=recent["Change"] * 100),
+            hide_index=True,
+            column_config={
+                "Week Ending": st.column_config.DateColumn(format="YYYY-MM-DD"),
+                "Sales": st.column_config.NumberColumn(format="$%.2f"),
+                "Expected Sales": st.column_config.NumberColumn(format="$%.2f"),
+                "Change": st.column_config.NumberColumn(format="%+.0f%%"),
+                "Score": st.column_config.NumberColumn(format="%.1f"),
+            },
+        )
+        st.caption(
+            "Weeks whose sales in a country and category are far from the median "
+            "of the weeks before, in robust (median absolute deviation) units."
+        )
 
     if (sales_over_time["Total Sales"] == 0).any():
         st.warning("Sales are 0 for one or more days in the selected date range.")
 
     if sales_over_time["Date"].nunique() > 1:
+        # Without a comparison the figure shares its cache entry with the warmer.
+        params = {"comparison": comparison} if comparison else {}
         st.plotly_chart(
-            create_line_chart(
-                sales_over_time,
-                x="Date",
-                y="Total Sales",
-                title="Sales Over Time",
-                labels={"Date": "Order Date", "Total Sales": "Sales ($)"},
-            ),
-            use_container_width=True,
+            view.figure("sales_over_time_chart", **params), use_container_width=True
         )
     else:
         st.info(
             "All sales occur on the same date. Cannot plot a meaningful Sales Over Time graph."
         )
 
-    if "Category" in filtered_df.columns:
-        category_sales = aggregate_sales_by_column(
-            filtered_df, group_by="Category", value_column="Sales"
-        )
-        category_sales.rename(columns={"Sales": "Total Sales"}, inplace=True)
+    if schema.has_column(filtered_df, "Category"):
+        st.plotly_chart(view.figure("category_sales_chart"), use_container_width=True)
 
-        st.plotly_chart(
-            create_bar_chart(
-                category_sales,
-                x="Category",
-                y="Total Sales",
-                title="Sales by Product Category",
-                labels={"Category": "Product Category", "Total Sales": "Sales ($)"},
-                text="Total Sales",
-            ),
-            use_container_width=True,
-        )
-
-    if "Country" in filtered_df.columns:
-        country_sales = aggregate_sales_by_column(
-            filtered_df, group_by="Country", value_column="Sales"
-        )
-        country_sales.rename(columns={"Sales": "Total Sales"}, inplace=True)
-
-        st.plotly_chart(
-            create_bar_chart(
-                country_sales,
-                x="Country",
-                y="Total Sales",
-                title="Sales by Country",
-                labels={"Country": "Country", "Total Sales": "Sales ($)"},
-                text="Total Sales",
-            ),
-            use_container_width=True,
-        )
-
-        st.plotly_chart(
-            create_choropleth_map(
-                country_sales,
-                locations="Country",
-                locationmode="country names",
-                color="Total Sales",
-                title="Sales Distribution Across Countries",
-                labels={"Country": "Country", "Total Sales": "Sales ($)"},
-            ),
-            use_container_width=True,
-        )
+    if schema.has_column(filtered_df, "Country"):
+        st.plotly_chart(view.figure("country_sales_chart"), use_container_width=True)
+        st.plotly_chart(view.figure("country_sales_map"), use_container_width=True)
     else:
         st.warning("The 'Country' column is missing in the dataset.")
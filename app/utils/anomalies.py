@@ -0,0 +1,129 @@
+"""
+Sales anomaly detection over every (country, category) daily sales series at
+once.
+
+The series are the rows of the `PrefixSums` cumulative arrays, so the whole
+panel is one 2-D NumPy array. Each series is summed into weeks (most markets
+do not sell every day), and every week is scored against the weeks before it
+with a robust z-score: the distance from the median of the trailing weeks in
+units of their median absolute deviation. All series and weeks are scored in
+one vectorized pass; its cost grows with series times weeks, not with rows.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+ANOMALY_COLUMNS = [
+    "Week Ending",
+    "Country",
+    "Category",
+    "Sales",
+    "Expected Sales",
+    "Change",
+    "Score",
+]
+
+
+def period_totals(cumulative, period=7):
+    """
+    Sum daily series into consecutive periods ending on the last calendar day.
+
+    Parameters:
+        cumulative (np.ndarray): (series, days + 1) cumulative sums with a
+            leading zero column, as kept by `PrefixSums`.
+        period (int): Days per period; leading days that do not fill a whole
+            period are dropped.
+
+    Returns:
+        tuple: (np.ndarray of the last day index of each period,
+        (series, periods) np.ndarray of totals).
+    """
+    ends = np.arange(cumulative.shape[1] - 1, period - 1, -period)[::-1]
+    return ends - 1, cumulative[:, ends] - cumulative[:, ends - period]
+
+
+def rolling_median(windows):
+    """
+    Median over the last (short) axis of an array of windows. Sorting the
+    windows outright is faster than `np.median` or `np.partition`, which pay
+    a per-window overhead.
+    """
+    size = windows.shape[-1]
+    middle = [(size - 1) // 2, size // 2]
+    return np.sort(windows, axis=-1)[..., middle].mean(axis=-1)
+
+
+def robust_scores(values, window=8, min_scale=0.25):
+    """
+    Score every value of a panel of series against the `window` values before
+    it in the same series.
+
+    Values are square-rooted first, which evens out the variance of count-like
+    data such as weekly sales, then scored as
+    (value - median) / (1.4826 * MAD). The scale is at least `min_scale` times
+    the median, so series that barely vary are not flagged for small changes
+    and a drop to zero scores at most -1 / `min_scale`.
+
+    Parameters:
+        values (np.ndarray): (series, periods) non-negative values.
+        window (int): Trailing periods forming the baseline.
+        min_scale (float): Smallest scale relative to the baseline median.
+
+    Returns:
+        tuple: (series, periods - window) arrays of the baseline medians (in
+        the original units) and the scores, NaN where the baseline median is
+        zero.
+    """
+    roots = np.sqrt(np.clip(values, 0, None))
+    baseline = sliding_window_view(roots[:, :-1], window, axis=1)
+    median = rolling_median(baseline)
+    deviation = rolling_median(np.abs(baseline - median[..., None]))
+    scale = np.maximum(1.4826 * deviation, min_scale * median)
+    scores = np.full(median.shape, np.nan)
+    active = median > 0
+    scores[active] = (roots[:, window:][active] - median[active]) / scale[active]
+    return median**2, scores
+
+
+def detect_anomalies(prefix_sums, period=7, window=8, threshold=3.5, min_scale=0.25):
+    """
+    Flag the weeks whose sales in a (country, category) segment depart
+    sharply from the segment's preceding weeks.
+
+    Parameters:
+        prefix_sums (PrefixSums): Cumulative daily sums per segment, with a
+            "Sales" column.
+        period (int): Days per period (see `period_totals`).
+        window (int): Trailing periods forming the baseline.
+        threshold (float): Smallest absolute score flagged.
+        min_scale (float): See `robust_scores`.
+
+    Returns:
+        pd.DataFrame: One row per flagged period with "Week Ending", "Country",
+        "Category", "Sales", "Expected Sales", "Change" (relative to the
+        expected sales) and "Score", most recent first.
+    """
+    if prefix_sums.sums is None:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    ends, totals = period_totals(prefix_sums.sums["Sales"], period)
+    if totals.shape[1] <= window:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    expected, scores = robust_scores(totals, window, min_scale)
+    rows, periods = np.nonzero(np.abs(np.nan_to_num(scores)) >= threshold)
+    actual = totals[:, window:][rows, periods]
+    expected = expected[rows, periods]
+    anomalies = pd.DataFrame(
+        {
+            "Week Ending": prefix_sums.dates[ends[window:][periods]],
+            "Country": prefix_sums.segments.get_level_values("Country")[rows],
+            "Category": prefix_sums.segments.get_level_values("Category")[rows],
+            "Sales": actual,
+            "Expected Sales": expected,
+            "Change": actual / expected - 1,
+            "Score": scores[rows, periods],
+        }
+    )
+    return anomalies.sort_values(
+        ["Week Ending", "Score"], ascending=[False, True], kind="stable"
+    ).reset_index(drop=True)
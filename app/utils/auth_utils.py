@@ -1,35 +1,123 @@
+import csv
+import os
+import secrets
+import threading
+import time
+
 import bcrypt
-import pandas as pd
 
+from app import config
+
+
+class UserStore:
+    """
+    In-memory index of the users file keyed by username. The file is re-read
+    only when its modification time or size changes.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._users = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        """
+        Look up a user.
+
+        Parameters:
+            username (str): The username.
+
+        Returns:
+            dict or None: The user's row (username, password, role, name,
+            surname), or None for an unknown username.
+        """
+        stat = os.stat(self.file_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if signature != self._signature:
+                with open(self.file_path, newline="") as file:
+                    self._users = {row["username"]: row for row in csv.DictReader(file)}
+                self._signature = signature
+            return self._users.get(username)
+
+
+class SessionTokens:
+    """
+    Tokens of authenticated sessions, so a client that reconnects with its
+    token is logged back in without another bcrypt check.
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def issue(self, username):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = {
+                key: value for key, value in self._tokens.items() if value[1] > now
+            }
+            self._tokens[token] = (username, now + self.ttl)
+        return token
+
+    def resolve(self, token):
+        """
+        Return the username a token was issued to, or None when the token is
+        unknown or expired.
+        """
+        with self._lock:
+            username, expires = self._tokens.get(token, (None, 0))
+            if expires <= time.monotonic():
+                self._tokens.pop(token, None)
+                return None
+            return username
+
+    def revoke(self, token):
+        with self._lock:
+            self._tokens.pop(token, None)
 
-def load_users(file_path="data/users.csv"):
+
+user_store = UserStore(os.path.join(config.DATA_DIR, "users.csv"))
+session_tokens = SessionTokens(config.SESSION_TTL)
+
+# bcrypt is deliberately slow (~0.2 s per check) and releases the GIL, so a
+# check runs on the logging-in session's own script thread while other sessions
+# keep rerunning. The semaphore caps how many checks run at once, so a burst of
+# logins cannot take every core from the sessions already using the dashboard.
+_bcrypt_slots = threading.BoundedSemaphore(config.AUTH_THREADS)
+
+
+def verify_password(password, hashed_password):
     """
-    Load user credentials from a CSV file.
+    Check a password against its bcrypt hash, waiting for a free bcrypt slot.
 
     Parameters:
-        file_path (str): Path to the users CSV file.
+        password (str): The password provided by the user.
+        hashed_password (str): The stored bcrypt hash.
 
     Returns:
-        pd.DataFrame: DataFrame containing user credentials.
+        bool: Whether the password matches.
     """
-    return pd.read_csv(file_path)
+    with _bcrypt_slots:
+        return bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8"))
 
 
-def check_credentials(username, password, users_df):
+def check_credentials(username, password, users=user_store):
     """
     Check if the provided username and password are valid.
 
     Parameters:
         username (str): The username provided by the user.
         password (str): The password provided by the user.
-        users_df (pd.DataFrame): DataFrame containing user credentials.
+        users (UserStore): The user index to check against.
 
     Returns:
-        pd.Series or None: The user's data if the credentials are valid, otherwise None.
+        dict or None: The user's data if the credentials are valid, otherwise None.
     """
-    user = users_df[users_df["username"] == username]
-    if not user.empty:
-        hashed_password = user.iloc[0]["password"]
-        if bcrypt.checkpw(password.encode("utf-8"), hashed_password.encode("utf-8")):
-            return user.iloc[0]  # Return the user's data as a Series
+    user = users.get(username)
+    if user is not None and verify_password(password, user["password"]):
+        return user
     return None
@@ -0,0 +1,137 @@
+"""
+Market basket analysis: association rules between items (products or a
+product attribute such as sub-category) bought in the same orders.
+
+Orders are rows of a binary CSR order-by-item matrix. Pair counts are the
+sparse product of its transpose with itself, computed per partition of orders
+on a thread pool (SciPy releases the GIL in sparse products) and summed.
+Items below the minimum support are dropped before multiplying, since no
+pair containing them can reach it.
+"""
+
+import functools
+import operator
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.utils.co_purchase import distinct_pairs, product_names
+
+RULE_COLUMNS = ["Antecedent", "Consequent", "Orders", "Support", "Confidence", "Lift"]
+
+
+def basket_matrix(fact, schema, level="Product"):
+    """
+    Build the binary order-by-item matrix of the fact rows.
+
+    An order counts each `Product.ID` once, through its first line: product
+    dimension rows that repeat a Product.ID join to several lines of one
+    order, possibly under different names or sub-categories.
+
+    Parameters:
+        fact (pd.DataFrame): Fact rows.
+        schema (StarSchema): Star schema the rows belong to.
+        level (str): "Product" (Product.ID) or a product attribute, e.g.
+            "Sub-Category".
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, pd.Index of item labels; product
+        names at the "Product" level).
+    """
+    from scipy import sparse
+
+    orders, order_ids = pd.factorize(fact["Order.ID"])
+    products = schema.row_codes(fact, "Product.ID").to_numpy()
+    product_ids = schema.labels("Product.ID")
+    _, first = np.unique(
+        orders.astype(np.int64) * len(product_ids) + products, return_index=True
+    )
+    if level == "Product":
+        items = products[first]
+        labels = pd.Index(product_names(schema).reindex(product_ids).to_numpy())
+    else:
+        items = schema.row_codes(fact, level).to_numpy()[first]
+        labels = schema.labels(level)
+    rows, columns = distinct_pairs(orders[first], items, len(labels))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+        shape=(len(order_ids), len(labels)),
+    )
+    return matrix, labels
+
+
+def pair_counts(matrix, partition_orders=100000, threads=1):
+    """
+    Count the orders containing each pair of items.
+
+    Parameters:
+        matrix (scipy.sparse.csr_matrix): Binary order-by-item matrix.
+        partition_orders (int): Orders per partition.
+        threads (int): Partitions multiplied at once.
+
+    Returns:
+        scipy.sparse.csr_matrix: Symmetric item-by-item counts; the diagonal
+        holds the orders of each item.
+    """
+    partitions = [
+        matrix[start : start + partition_orders]
+        for start in range(0, max(matrix.shape[0], 1), partition_orders)
+    ]
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        counts = pool.map(lambda part: (part.T @ part).tocsr(), partitions)
+        return functools.reduce(operator.add, counts)
+
+
+def association_rules(
+    matrix, labels, min_support=0.001, min_orders=1, partition_orders=100000, threads=1
+):
+    """
+    Derive pairwise association rules from an order-by-item matrix.
+
+    Parameters:
+        matrix (scipy.sparse.csr_matrix): Binary order-by-item matrix.
+        labels (pd.Index): Item labels by column.
+        min_support (float): Minimum share of orders containing both items.
+        min_orders (int): Minimum number of orders containing both items,
+            whatever the share.
+        partition_orders (int): Orders per partition (see `pair_counts`).
+        threads (int): Partitions multiplied at once.
+
+    Returns:
+        pd.DataFrame: One row per rule "Antecedent -> Consequent" with the
+        shared "Orders", "Support", "Confidence" and "Lift", by descending
+        lift and support.
+    """
+    from scipy import sparse
+
+    total_orders = matrix.shape[0]
+    item_orders = np.asarray(matrix.sum(axis=0)).ravel()
+    min_orders = max(min_support * total_orders, min_orders, 1)
+    frequent = np.flatnonzero(item_orders >= min_orders)
+    if total_orders == 0 or len(frequent) < 2:
+        return pd.DataFrame(columns=RULE_COLUMNS)
+
+    counts = pair_counts(matrix[:, frequent].tocsr(), partition_orders, threads)
+    upper = sparse.triu(counts, k=1).tocoo()
+    keep = upper.data >= min_orders
+    first = frequent[upper.row[keep]]
+    second = frequent[upper.col[keep]]
+    antecedents = np.concatenate([first, second])
+    consequents = np.concatenate([second, first])
+    together = np.tile(upper.data[keep], 2)
+
+    confidence = together / item_orders[antecedents]
+    rules = pd.DataFrame(
+        {
+            "Antecedent": labels.take(antecedents),
+            "Consequent": labels.take(consequents),
+            "Orders": together,
+            "Support": together / total_orders,
+            "Confidence": confidence,
+            "Lift": confidence * total_orders / item_orders[consequents],
+        }
+    )
+    return rules.sort_values(
+        ["Lift", "Support"], ascending=False, kind="stable"
+    ).reset_index(drop=True)
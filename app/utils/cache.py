@@ -0,0 +1,162 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app import config
+
+
+def estimate_size(value):
+    """
+    Estimate the memory held by a cached value.
+
+    Parameters:
+        value: A DataFrame, Series, Index, NumPy array, Plotly figure, dict,
+            list or tuple of those, or scalar.
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(estimate_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if hasattr(value, "to_plotly_json") and hasattr(value, "layout"):
+        # A figure holds its data in the arrays of its traces.
+        return sum(estimate_size(trace.to_plotly_json()) for trace in value.data)
+    if isinstance(value, (str, bytes, int, float)):
+        return sys.getsizeof(value)
+    return 64
+
+
+class ComputationCache:
+    """
+    Process-wide LRU of computed tab outputs and figures, bounded by entry
+    count and by estimated bytes.
+
+    Keys carry the source the value was computed from (a schema's
+    `cache_token`) and its data version, so entries built before an ingest, or
+    from another schema at the same version, are never served; a source's
+    entries are dropped as soon as a newer version of it is stored.
+    Each value is sized once with `estimate_size` when it is stored, and the
+    least recently used entries are evicted until the cache fits
+    `max_bytes`. A value larger than the whole budget is returned uncached.
+    """
+
+    def __init__(self, max_entries=2048, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._bytes = 0
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, version, compute, source=None):
+        """
+        Return the cached value for `key`, computing and storing it on a miss.
+
+        Parameters:
+            key (tuple): Hashable cache key (without the source and version).
+            version (int): Data version the value is computed from.
+            compute (callable): Zero-argument function producing the value.
+            source (hashable, optional): Identity of the data, e.g. a schema's
+                `cache_token`.
+
+        Returns:
+            The cached or freshly computed value.
+        """
+        full_key = (source, version, key)
+        with self._lock:
+            if full_key in self._entries:
+                self._entries.move_to_end(full_key)
+                self.hits += 1
+                return self._entries[full_key]
+            self.misses += 1
+
+        value = compute()
+        size = estimate_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value
+
+        with self._lock:
+            latest = self._versions.get(source)
+            if latest is None or version > latest:
+                self._drop_older_than(source, version)
+                self._versions[source] = version
+            if full_key in self._entries:
+                self._remove(full_key)
+            self._entries[full_key] = value
+            self._sizes[full_key] = size
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return value
+
+    def contains(self, key, version, source=None):
+        with self._lock:
+            return (source, version, key) in self._entries
+
+    def _remove(self, full_key):
+        del self._entries[full_key]
+        self._bytes -= self._sizes.pop(full_key)
+
+    def _drop_older_than(self, source, version):
+        for full_key in [k for k in self._entries if k[0] == source and k[1] < version]:
+            self._remove(full_key)
+
+    def size_bytes(self):
+        """
+        Return the estimated memory held by all entries.
+
+        Returns:
+            int: Approximate size in bytes.
+        """
+        with self._lock:
+            return self._bytes
+
+    def entry_sizes(self):
+        """
+        Return the estimated size of every entry.
+
+        Returns:
+            list: (key, bytes) pairs, least recently used first.
+        """
+        with self._lock:
+            return [(full_key[2], self._sizes[full_key]) for full_key in self._entries]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self._versions = {}
+
+
+computation_cache = ComputationCache(max_bytes=int(config.CACHE_MEMORY_MB * 2**20))
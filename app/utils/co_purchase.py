@@ -0,0 +1,224 @@
+"""
+Product co-purchase network: products are linked by the number of orders that
+contain both of them.
+
+Products are keyed by `Product.ID`. The product dimension can list one
+`Product.ID` under several names, and each such row joins to its own fact
+line, so the fact table holds repeated lines of one product in an order.
+Orders are reduced to their distinct (order, product) pairs first, so those
+repeats never count as a co-purchase.
+
+Everything works on sparse matrices over product ID codes, so the cost grows
+with the number of order lines and co-purchased pairs rather than with the
+square of the number of products.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def distinct_pairs(orders, items, item_count):
+    """
+    Reduce (order, item) code pairs to the distinct pairs.
+
+    Parameters:
+        orders (np.ndarray): Order code of every line.
+        items (np.ndarray): Item code of every line.
+        item_count (int): Number of distinct item codes.
+
+    Returns:
+        tuple: (np.ndarray of order codes, np.ndarray of item codes), one
+        entry per distinct pair.
+    """
+    pairs = np.unique(orders.astype(np.int64) * item_count + items)
+    return pairs // item_count, pairs % item_count
+
+
+def order_product_matrix(fact, schema):
+    """
+    Build the binary order-by-product incidence matrix of the fact rows.
+
+    Parameters:
+        fact (pd.DataFrame): Fact rows.
+        schema (StarSchema): Star schema the rows belong to.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix, 1 where the order contains the
+        product; pd.Index of the Product.ID of every column).
+    """
+    from scipy import sparse
+
+    orders, order_ids = pd.factorize(fact["Order.ID"])
+    labels = schema.labels("Product.ID")
+    rows, columns = distinct_pairs(
+        orders, schema.row_codes(fact, "Product.ID").to_numpy(), len(labels)
+    )
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, columns)),
+        shape=(len(order_ids), len(labels)),
+    )
+    return matrix, labels
+
+
+def co_purchase_matrix(fact, schema):
+    """
+    Count the orders shared by every pair of products.
+
+    Parameters:
+        fact (pd.DataFrame): Fact rows.
+        schema (StarSchema): Star schema the rows belong to.
+
+    Returns:
+        tuple: (scipy.sparse.csr_matrix of symmetric product-by-product
+        counts with a zero diagonal, pd.Index of the Product.ID of every
+        row and column).
+    """
+    incidence, labels = order_product_matrix(fact, schema)
+    matrix = (incidence.T @ incidence).tocsr()
+    matrix.setdiag(0)
+    matrix.eliminate_zeros()
+    return matrix, labels
+
+
+def product_names(schema):
+    """
+    Name each Product.ID by the first product dimension row listing it.
+
+    Parameters:
+        schema (StarSchema): The star schema.
+
+    Returns:
+        pd.Series: Product names indexed by Product.ID.
+    """
+    products = schema.products.drop_duplicates("Product.ID")
+    return pd.Series(
+        products["Product Name"].to_numpy(), index=products["Product.ID"].to_numpy()
+    )
+
+
+def co_purchase_edges(matrix, min_orders=1, max_edges=None):
+    """
+    List the product pairs bought together in at least `min_orders` orders.
+
+    Parameters:
+        matrix (scipy.sparse.csr_matrix): Output of `co_purchase_matrix`.
+        min_orders (int): Minimum number of shared orders.
+        max_edges (int, optional): Keep only this many of the heaviest pairs.
+
+    Returns:
+        pd.DataFrame: "Source", "Target" (row and column codes of
+        `matrix`) and "Orders", heaviest first.
+    """
+    from scipy import sparse
+
+    upper = sparse.triu(matrix, k=1).tocoo()
+    keep = upper.data >= min_orders
+    edges = pd.DataFrame(
+        {
+            "Source": upper.row[keep],
+            "Target": upper.col[keep],
+            "Orders": upper.data[keep],
+        }
+    ).sort_values("Orders", ascending=False, kind="stable")
+    if max_edges is not None:
+        edges = edges.head(max_edges)
+    return edges.reset_index(drop=True)
+
+
+def spectral_layout(matrix, seed=0):
+    """
+    Place the nodes of a weighted graph in 2-D by regularized spectral
+    embedding.
+
+    The coordinates are the two leading non-trivial eigenvectors of the
+    normalized adjacency matrix, regularized with the average degree so
+    disconnected components do not collapse onto one point. Each Lanczos step
+    is one sparse matrix-vector product, so the cost grows with the number of
+    edges; spring layouts compare every pair of nodes on every iteration.
+
+    Parameters:
+        matrix (scipy.sparse.csr_matrix): Symmetric adjacency matrix.
+        seed (int): Seed of the Lanczos start vector, for stable layouts.
+            Graphs of up to 200 nodes are solved densely instead.
+
+    Returns:
+        np.ndarray: (nodes, 2) positions scaled to [-1, 1].
+    """
+    from scipy.sparse.linalg import LinearOperator, eigsh
+
+    size = matrix.shape[0]
+    if size < 3:
+        return np.zeros((size, 2))
+    degrees = np.asarray(matrix.sum(axis=1), dtype=np.float64).ravel()
+    regularization = degrees.mean()
+    scale = 1 / np.sqrt(degrees + regularization)
+
+    if size <= 200:
+        dense = matrix.toarray() + regularization / size
+        values, vectors = np.linalg.eigh(scale[:, None] * dense * scale[None, :])
+    else:
+
+        def matvec(vector):
+            vector = np.asarray(vector).ravel() * scale
+            return scale * (matrix @ vector + regularization / size * vector.sum())
+
+        operator = LinearOperator((size, size), matvec=matvec, dtype=np.float64)
+        start = np.random.default_rng(seed).random(size)
+        # A layout needs little precision; a loose tolerance cuts the
+        # iterations several-fold on large components.
+        values, vectors = eigsh(operator, k=3, which="LA", v0=start, tol=1e-3, ncv=20)
+    leading = np.argsort(values)[::-1][1:3]
+    positions = vectors[:, leading] * scale[:, None]
+    positions -= positions.mean(axis=0)
+    return positions / np.abs(positions).max(axis=0).clip(min=1e-12)
+
+
+def network_layout(matrix, circle_size=10, seed=0):
+    """
+    Lay out a graph one connected component at a time and pack the
+    components in rows, largest first.
+
+    Components of up to `circle_size` nodes are drawn as circles; larger ones
+    use `spectral_layout`. Each component gets a cell whose width grows with
+    the square root of its size.
+
+    Parameters:
+        matrix (scipy.sparse.csr_matrix): Symmetric adjacency matrix.
+        circle_size (int): Largest component drawn as a circle.
+        seed (int): Seed passed to `spectral_layout`.
+
+    Returns:
+        np.ndarray: (nodes, 2) positions scaled to [-1, 1].
+    """
+    from scipy.sparse.csgraph import connected_components
+
+    if matrix.shape[0] == 0:
+        return np.zeros((0, 2))
+    count, components = connected_components(matrix, directed=False)
+    sizes = np.bincount(components, minlength=count)
+    by_component = np.argsort(components, kind="stable")
+    firsts = np.cumsum(sizes) - sizes
+    ranks = np.empty(len(components), dtype=np.int64)
+    ranks[by_component] = np.arange(len(components)) - firsts[components[by_component]]
+    angles = 2 * np.pi * ranks / sizes[components]
+    positions = np.column_stack([np.cos(angles), np.sin(angles)])
+    positions[sizes[components] == 1] = 0
+    for component in np.flatnonzero(sizes > circle_size):
+        nodes = np.flatnonzero(components == component)
+        positions[nodes] = spectral_layout(matrix[nodes][:, nodes], seed)
+
+    radii = np.sqrt(sizes)
+    width = 2 * np.sqrt((radii**2).sum())
+    offsets = np.zeros((count, 2))
+    x = y = row_height = 0.0
+    for component in np.argsort(-sizes, kind="stable"):
+        diameter = 2 * radii[component]
+        if x > 0 and x + diameter > width:
+            x, y, row_height = 0.0, y - row_height, 0.0
+        offsets[component] = (x + radii[component], y - radii[component])
+        x += diameter
+        row_height = max(row_height, diameter)
+
+    positions = positions * 0.8 * radii[components][:, None] + offsets[components]
+    positions -= (positions.max(axis=0) + positions.min(axis=0)) / 2
+    return positions / np.abs(positions).max().clip(min=1e-12)
@@ -0,0 +1,103 @@
+import logging
+import threading
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Pandas minor releases whose private `Block.copy` and
+# `BlockManager._iset_split_block` have the signatures wrapped below. Other
+# releases leave the counter disabled rather than patch internals that may
+# have changed.
+SUPPORTED_PANDAS = ("2.1", "2.2")
+
+
+def pandas_supported(version=pd.__version__):
+    return ".".join(version.split(".")[:2]) in SUPPORTED_PANDAS
+
+
+class CopyCounter:
+    """
+    Debug counter of deep pandas copies, per thread.
+
+    `install` wraps the two places pandas copies column data: `Block.copy`
+    (explicit `.copy()` and most implicit copies) and the block split that
+    copy-on-write performs before writing into a shared frame. Both are pandas
+    internals, so the counter only installs on `SUPPORTED_PANDAS`. Streamlit
+    runs each rerun on its session's script thread, so resetting at the start
+    of a rerun and reading at its end gives the copies made by that rerun
+    alone.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._installed = False
+        self._lock = threading.Lock()
+
+    @property
+    def installed(self):
+        return self._installed
+
+    def install(self):
+        """
+        Start counting; safe to call more than once.
+
+        Returns:
+            bool: Whether copies are being counted, i.e. False on a pandas
+            release the counter does not support.
+        """
+        with self._lock:
+            if self._installed:
+                return True
+            if not pandas_supported():
+                logger.warning(
+                    "Copy counting supports pandas %s only, not %s; leaving it off.",
+                    " and ".join(SUPPORTED_PANDAS),
+                    pd.__version__,
+                )
+                return False
+            from pandas.core.internals.blocks import Block
+            from pandas.core.internals.managers import BlockManager
+
+            original_copy = Block.copy
+            original_split = BlockManager._iset_split_block
+            counter = self
+
+            def counting_copy(block, deep=True):
+                if deep:
+                    counter._record(block.values.nbytes)
+                return original_copy(block, deep=deep)
+
+            def counting_split(manager, blkno_l, blk_locs, value=None, refs=None):
+                # Count the shared block being split, also when the caller
+                # sets the new values itself (`value` is None).
+                counter._record(manager.blocks[blkno_l].values.nbytes)
+                return original_split(manager, blkno_l, blk_locs, value, refs)
+
+            Block.copy = counting_copy
+            BlockManager._iset_split_block = counting_split
+            self._installed = True
+            return True
+
+    def _record(self, nbytes):
+        self._local.copies = getattr(self._local, "copies", 0) + 1
+        self._local.bytes = getattr(self._local, "bytes", 0) + nbytes
+
+    def reset(self):
+        self._local.copies = 0
+        self._local.bytes = 0
+
+    def snapshot(self):
+        """
+        Return the copies counted on this thread since the last `reset`.
+
+        Returns:
+            dict: "copies" (int) and "bytes" (int).
+        """
+        return {
+            "copies": getattr(self._local, "copies", 0),
+            "bytes": getattr(self._local, "bytes", 0),
+        }
+
+
+copy_counter = CopyCounter()
@@ -1,41 +1,97 @@
+import numpy as np
 import pandas as pd
 
-
-def calculate_rfm(filtered_df, max_date):
+SEASONS = {
+    12: "Winter",
+    1: "Winter",
+    2: "Winter",
+    3: "Spring",
+    4: "Spring",
+    5: "Spring",
+    6: "Summer",
+    7: "Summer",
+    8: "Summer",
+    9: "Fall",
+    10: "Fall",
+    11: "Fall",
+}
+
+
+def calculate_rfm(filtered_df, max_date, schema=None):
     """
     Calculate RFM metrics for customer segmentation.
 
     Parameters:
         filtered_df (pd.DataFrame): Filtered DataFrame containing customer data.
         max_date (datetime): Maximum order date in the dataset.
+        schema (StarSchema, optional): Star schema used to group on customer codes.
 
     Returns:
         pd.DataFrame: DataFrame with RFM metrics (Recency, Frequency, Monetary).
     """
+    keys = schema.keys(filtered_df, "Customer.Name") if schema else "Customer.Name"
     rfm = (
-        filtered_df.groupby("Customer.Name")
+        filtered_df.groupby(keys)
         .agg(
-            Recency=("Order.Date", lambda x: (max_date - x.max()).days),
+            Recency=("Order.Date", "max"),
             Frequency=("Order.ID", "count"),
             Monetary=("Sales", "sum"),
         )
         .reset_index()
     )
+    rfm["Recency"] = (pd.Timestamp(max_date) - pd.to_datetime(rfm["Recency"])).dt.days
+    if schema:
+        rfm = schema.decode(rfm, "Customer.Name")
+    return rfm
+
+
+def calculate_rfm_segments(rfm, approximate=False):
+    """
+    Score RFM metrics and split customers into four value segments.
+
+    Parameters:
+        rfm (pd.DataFrame): DataFrame returned by `calculate_rfm`.
+        approximate (bool): Cut the scores at quartiles estimated with a
+            t-digest instead of ranking every customer.
+
+    Returns:
+        pd.DataFrame: A copy of the RFM frame with score, "Segment" and, when
+        exact, rank columns.
+    """
+    rfm = rfm.assign(RFM_Score=rfm["Recency"] + rfm["Frequency"] + rfm["Monetary"])
+    labels = ["Low-Value", "Mid-Value", "High-Value", "Top-Value"]
+
+    try:
+        if approximate:
+            from app.utils.sketches import digest_quantiles
+
+            cut_points = digest_quantiles(rfm["RFM_Score"], [0.25, 0.5, 0.75])
+            rfm["Segment"] = pd.cut(
+                rfm["RFM_Score"],
+                bins=[-np.inf, *cut_points, np.inf],
+                labels=labels,
+            )
+        else:
+            rfm["RFM_Score_rank"] = rfm["RFM_Score"].rank(method="first")
+            rfm["Segment"] = pd.qcut(rfm["RFM_Score_rank"], q=4, labels=labels)
+    except ValueError:
+        rfm["Segment"] = "Single Segment"
     return rfm
 
 
-def calculate_order_frequency(filtered_df):
+def calculate_order_frequency(filtered_df, schema=None):
     """
-    Calculate the frequency of orders for each customer.
+    Calculate the number of distinct orders of each customer.
 
     Parameters:
-        filtered_df (pd.DataFrame): The filtered DataFrame containing order data.
+        filtered_df (pd.DataFrame): Order lines or order-level rows.
+        schema (StarSchema, optional): Star schema used to group on customer codes.
 
     Returns:
         pd.DataFrame: DataFrame with columns 'Customer ID' and 'Order Count'.
     """
-    order_frequency = (
-        filtered_df.groupby("Customer.ID")["Order.ID"].count().reset_index()
+    order_frequency = calculate_aggregated_values(
+        filtered_df, "Customer.ID", "Order.ID", agg_func="nunique", schema=schema
     )
     order_frequency.columns = ["Customer ID", "Order Count"]
     return order_frequency
@@ -46,7 +102,7 @@ def calculate_order_value(filtered_df):
     Calculate the value of each order.
 
     Parameters:
-        filtered_df (pd.DataFrame): The filtered DataFrame containing sales data.
+        filtered_df (pd.DataFrame): Order lines or order-level rows with "Sales".
 
     Returns:
         pd.DataFrame: DataFrame with columns 'Order ID' and 'Order Value'.
@@ -56,27 +112,36 @@ def calculate_order_value(filtered_df):
     return order_value
 
 
-def calculate_top_values(filtered_df, group_by, value_column, sort_by, top_n=10):
+def calculate_top_values(
+    filtered_df, group_by, value_column, sort_by, top_n=10, schema=None
+):
     """
     Calculate the top values for a specific group.
 
+    With a schema the ranking runs on attribute codes and only the top rows
+    are decoded to labels.
+
     Parameters:
         filtered_df (pd.DataFrame): Filtered DataFrame containing data.
         group_by (str): Column to group by.
         value_column (str): Column to calculate the sum for.
         sort_by (str): Column to sort by.
         top_n (int): Number of top rows to return.
+        schema (StarSchema, optional): Star schema used to group on codes.
 
     Returns:
         pd.DataFrame: DataFrame with top values.
     """
+    keys = schema.keys(filtered_df, group_by) if schema else group_by
     grouped_data = (
-        filtered_df.groupby(group_by)[value_column]
+        filtered_df.groupby(keys)[value_column]
         .sum()
         .reset_index()
         .sort_values(sort_by, ascending=False)
         .head(top_n)
     )
+    if schema:
+        grouped_data = schema.decode(grouped_data, group_by)
     return grouped_data
 
 
@@ -89,25 +154,28 @@ def add_season_column(filtered_df, date_column):
         date_column (str): Name of the date column.
 
     Returns:
-        pd.DataFrame: DataFrame with an additional season column.
+        pd.DataFrame: A copy of the DataFrame with "Month" and "Season" columns.
     """
+    month = pd.to_datetime(filtered_df[date_column]).dt.month
+    return filtered_df.assign(Month=month, Season=month_to_season(month))
 
-    def get_season(month):
-        if month in [12, 1, 2]:
-            return "Winter"
-        elif month in [3, 4, 5]:
-            return "Spring"
-        elif month in [6, 7, 8]:
-            return "Summer"
-        elif month in [9, 10, 11]:
-            return "Fall"
 
-    filtered_df["Month"] = pd.to_datetime(filtered_df[date_column]).dt.month
-    filtered_df["Season"] = filtered_df["Month"].apply(get_season)
-    return filtered_df
+def month_to_season(month):
+    """
+    Map month numbers to meteorological seasons.
 
+    Parameters:
+        month (pd.Series): Month numbers (1-12).
 
-def calculate_aggregated_values(filtered_df, group_by, value_column, agg_func="sum"):
+    Returns:
+        pd.Series: "Winter", "Spring", "Summer" or "Fall" for each month.
+    """
+    return month.map(SEASONS)
+
+
+def calculate_aggregated_values(
+    filtered_df, group_by, value_column, agg_func="sum", schema=None
+):
     """
     Calculate aggregated values for a specific column grouped by another column.
 
@@ -116,10 +184,13 @@ def calculate_aggregated_values(filtered_df, group_by, value_column, agg_func="s
         group_by (list): List of columns to group by.
         value_column (str): Column to aggregate.
         agg_func (str): Aggregation function (default is "sum").
+        schema (StarSchema, optional): Star schema used to group on codes.
 
     Returns:
         pd.DataFrame: DataFrame with aggregated values.
     """
+    if schema:
+        return schema.aggregate(filtered_df, group_by, value_column, agg_func)
     aggregated_data = (
         filtered_df.groupby(group_by)[value_column].agg(agg_func).reset_index()
     )
@@ -135,10 +206,9 @@ def add_month_column(filtered_df, date_column):
         date_column (str): Name of the date column.
 
     Returns:
-        pd.DataFrame: DataFrame with an additional month column.
+        pd.DataFrame: A copy of the DataFrame with a "Month" column.
     """
-    filtered_df["Month"] = pd.to_datetime(filtered_df[date_column]).dt.month
-    return filtered_df
+    return filtered_df.assign(Month=pd.to_datetime(filtered_df[date_column]).dt.month)
 
 
 def preprocess_sales_data(data, date_column, sales_column, granularity="Daily"):
@@ -154,9 +224,8 @@ def preprocess_sales_data(data, date_column, sales_column, granularity="Daily"):
     Returns:
         pd.DataFrame: Aggregated sales data with columns "ds" (date) and "y" (sales).
     """
-    data[date_column] = pd.to_datetime(data[date_column])
-
-    sales_over_time = data.groupby(date_column)[sales_column].sum().reset_index()
+    dates = pd.to_datetime(data[date_column])
+    sales_over_time = data.groupby(dates)[sales_column].sum().reset_index()
     sales_over_time.columns = ["ds", "y"]
 
     if granularity == "Weekly":
@@ -195,7 +264,7 @@ def calculate_forecast(data, periods=30, freq="D"):
     return forecast[["ds", "yhat"]].tail(periods)
 
 
-def aggregate_sales_by_column(filtered_df, group_by, value_column):
+def aggregate_sales_by_column(filtered_df, group_by, value_column, schema=None):
     """
     Aggregate sales data by a specific column.
 
@@ -203,9 +272,12 @@ def aggregate_sales_by_column(filtered_df, group_by, value_column):
         filtered_df (pd.DataFrame): The filtered DataFrame containing sales data.
         group_by (str): Column to group by.
         value_column (str): Column containing sales data.
+        schema (StarSchema, optional): Star schema used to group on codes.
 
     Returns:
         pd.DataFrame: Aggregated sales data.
     """
+    if schema:
+        return schema.aggregate(filtered_df, group_by, value_column)
     aggregated_data = filtered_df.groupby(group_by, as_index=False)[value_column].sum()
     return aggregated_data
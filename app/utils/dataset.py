@@ -0,0 +1,131 @@
+import threading
+
+from app import config
+
+# Loaded datasets by data directory. The data stack (pandas and the star
+# schema) is imported on first load, so importing this module stays cheap.
+_datasets = {}
+_datasets_lock = threading.Lock()
+_preloading = set()
+
+
+def register_default_aggregates(schema):
+    """
+    Register the aggregates the dashboard reads instead of scanning facts.
+
+    Parameters:
+        schema (StarSchema): The loaded star schema.
+    """
+    from app.utils.materialized import (
+        CustomerHistory,
+        MaterializedAggregate,
+        OrderFacts,
+        PrefixSums,
+        ProductSeries,
+    )
+    from app.utils.segmentation import CustomerSegmentation
+    from app.utils.sketches import (
+        DistinctCount,
+        HeavyHitters,
+        OrderValueQuantiles,
+        RepeatPurchases,
+    )
+
+    schema.register_aggregate(
+        "daily_sales",
+        MaterializedAggregate(
+            ["Order.Date", "Country", "Category"],
+            ["Sales", "Profit"],
+            count_column="Lines",
+        ),
+    )
+    schema.register_aggregate(
+        "prefix_sums", PrefixSums(["Sales", "Profit"], count_column="Lines")
+    )
+    schema.register_aggregate("orders", OrderFacts())
+    schema.register_aggregate("customer_history", CustomerHistory())
+    schema.register_aggregate("product_series", ProductSeries())
+    for name, item in [
+        ("top_products", "Product Name"),
+        ("top_customers", "Customer.Name"),
+    ]:
+        schema.register_aggregate(
+            name, HeavyHitters(item, "Sales", capacity=config.SKETCH_CAPACITY)
+        )
+    for name, item in [
+        ("distinct_orders", "Order.ID"),
+        ("distinct_customers", "Customer.ID"),
+    ]:
+        schema.register_aggregate(name, DistinctCount(item))
+    schema.register_aggregate("repeat_purchases", RepeatPurchases("Customer.Name"))
+    schema.register_aggregate("order_value_quantiles", OrderValueQuantiles("Sales"))
+    schema.register_aggregate("customer_segments", CustomerSegmentation())
+
+
+def get_dataset(data_dir=config.DATA_DIR):
+    """
+    Load the shared, process-wide dataset.
+
+    Every Streamlit session (and any other consumer in the same process) gets
+    the same star schema, its materialized aggregates and, when enabled, the
+    background ingestor that keeps them current. Concurrent first calls load
+    the data once.
+
+    Parameters:
+        data_dir (str): Directory containing the CSV files.
+
+    Returns:
+        StarSchema: The shared star schema.
+    """
+    with _datasets_lock:
+        if data_dir not in _datasets:
+            from app.utils.ingestion import start_ingestor
+            from app.utils.star_schema import load_star_schema
+
+            config.configure_pandas()
+            schema = load_star_schema(data_dir)
+            register_default_aggregates(schema)
+            if config.INGEST_INTERVAL > 0:
+                schema.ingestor = start_ingestor(
+                    schema, data_dir=data_dir, interval=config.INGEST_INTERVAL
+                )
+            _datasets[data_dir] = schema
+        return _datasets[data_dir]
+
+
+def dataset_loaded(data_dir=config.DATA_DIR):
+    """
+    Return whether `get_dataset(data_dir)` would return without loading.
+    """
+    return data_dir in _datasets
+
+
+def clear_datasets():
+    """
+    Forget the loaded datasets so the next `get_dataset` call reloads them.
+    """
+    with _datasets_lock:
+        _datasets.clear()
+        _preloading.clear()
+
+
+def preload_dataset(data_dir=config.DATA_DIR, on_loaded=None):
+    """
+    Start loading the shared dataset on a background thread, once per process,
+    so it is ready by the time the first user has logged in.
+
+    Parameters:
+        data_dir (str): Directory containing the CSV files.
+        on_loaded (callable, optional): Called with the schema once loaded.
+    """
+    with _datasets_lock:
+        if data_dir in _datasets or data_dir in _preloading:
+            return
+        _preloading.add(data_dir)
+
+    def load():
+        schema = get_dataset(data_dir)
+        if on_loaded is not None:
+            on_loaded(schema)
+
+    threading.Thread(target=load, name="dataset-preload", daemon=True).start()
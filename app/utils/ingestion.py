@@ -0,0 +1,366 @@
+import io
+import logging
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app import config
+from app.utils.star_schema import CUSTOMER_ATTRIBUTES, MONEY_COLUMNS, PRODUCT_ATTRIBUTES
+
+logger = logging.getLogger(__name__)
+
+ORDER_COLUMNS = ["Order.ID", "Customer.ID", "Product.ID", "Order.Date"]
+SALES_COLUMNS = ["Order.ID", *MONEY_COLUMNS, "Ship.Mode"]
+
+
+def _extend(pending, rows):
+    if pending.empty:
+        return rows
+    if rows.empty:
+        return pending
+    return pd.concat([pending, rows])
+
+
+class CsvTail:
+    """
+    Incremental reader for an append-only CSV file.
+
+    Only complete lines written after the remembered byte offset are returned,
+    so a writer that is half-way through a line is picked up on the next poll.
+    """
+
+    def __init__(self, path, from_end=True):
+        self.path = Path(path)
+        self.header = None
+        self.offset = 0
+        if self.path.exists():
+            with open(self.path, "rb") as handle:
+                self.header = handle.readline()
+                self.offset = self.path.stat().st_size if from_end else handle.tell()
+
+    def read_new_rows(self):
+        """
+        Read the rows appended since the last call.
+
+        Returns:
+            tuple: (pd.DataFrame of new rows or None, file mtime in seconds).
+        """
+        if not self.path.exists():
+            return None, None
+        stat = self.path.stat()
+        if stat.st_size < self.offset:
+            # The file was truncated or replaced; start over from its header.
+            self.header, self.offset = None, 0
+        if stat.st_size == self.offset:
+            return None, stat.st_mtime
+
+        with open(self.path, "rb") as handle:
+            if self.header is None:
+                self.header = handle.readline()
+                self.offset = handle.tell()
+            handle.seek(self.offset)
+            chunk = handle.read()
+
+        complete = chunk[: chunk.rfind(b"\n") + 1]
+        if not complete.strip():
+            return None, stat.st_mtime
+        self.offset += len(complete)
+        rows = pd.read_csv(io.BytesIO(self.header + complete))
+        return rows, stat.st_mtime
+
+
+class IngestionStats:
+    def __init__(self):
+        self.batches = 0
+        self.rows_ingested = 0
+        self.rows_rejected = {}
+        self.last_batch_rows = 0
+        self.last_lag_seconds = None
+        self.max_lag_seconds = 0.0
+        self.last_ingest_at = None
+        self.last_error = None
+
+    def reject(self, reason, count):
+        if count:
+            self.rows_rejected[reason] = self.rows_rejected.get(reason, 0) + count
+
+    def as_dict(self):
+        return {
+            "batches": self.batches,
+            "rows_ingested": self.rows_ingested,
+            "rows_rejected": dict(self.rows_rejected),
+            "last_batch_rows": self.last_batch_rows,
+            "last_lag_seconds": self.last_lag_seconds,
+            "max_lag_seconds": self.max_lag_seconds,
+            "last_ingest_at": self.last_ingest_at,
+            "last_error": self.last_error,
+        }
+
+
+class StreamingIngestor:
+    """
+    Tail `orders.csv` and `sales.csv` (plus the dimension files) and append new
+    rows to a star schema in validated micro-batches.
+
+    Orders and sales are joined on `Order.ID`; a row whose counterpart has not
+    arrived yet waits in a pending buffer, for at most `pending_ttl` seconds
+    and among at most `pending_rows` rows per file. Rows dropped from the
+    buffers are logged and counted as rejected. Products are joined on `Product.ID`
+    exactly like `merged_data.csv` was built. The end-to-end lag of a batch is
+    measured from the modification time of the file in which its oldest row
+    first appeared to the moment the batch is visible in the schema.
+
+    The schema is loaded from `merged_data.csv`, which does not hold rows
+    ingested by an earlier process. Orders and sales are therefore read from
+    the start of their files, skipping the orders the schema was loaded with,
+    so rows ingested before a restart are appended again and unmatched rows
+    return to the pending buffers.
+    """
+
+    def __init__(
+        self,
+        schema,
+        data_dir="data",
+        interval=5.0,
+        batch_size=5000,
+        pending_ttl=3600.0,
+        pending_rows=100000,
+    ):
+        data_dir = Path(data_dir)
+        self.schema = schema
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pending_ttl = pending_ttl
+        self.pending_rows = pending_rows
+        self.orders = CsvTail(data_dir / "orders.csv", from_end=False)
+        self.sales = CsvTail(data_dir / "sales.csv", from_end=False)
+        self.loaded_ids = pd.Index(schema.fact["Order.ID"].unique())
+        self.customers = CsvTail(data_dir / "customers.csv")
+        self.products = CsvTail(data_dir / "products.csv")
+        self.pending_orders = pd.DataFrame(columns=ORDER_COLUMNS + ["Arrived"])
+        self.pending_sales = pd.DataFrame(columns=SALES_COLUMNS + ["Arrived"])
+        self.stats = IngestionStats()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="streaming-ingestor", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # The first poll runs at once to catch up on rows from before a restart.
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                self.stats.last_error = str(e)
+            if self._stop.wait(self.interval):
+                break
+
+    def poll(self):
+        """
+        Run one ingestion cycle.
+
+        Returns:
+            int: Number of fact rows appended to the schema.
+        """
+        self._ingest_dimensions()
+
+        orders, orders_mtime = self.orders.read_new_rows()
+        if orders is not None:
+            orders = self._unloaded(self._validate_orders(orders))
+            orders = orders.assign(Arrived=orders_mtime)
+            self.pending_orders = _extend(self.pending_orders, orders)
+        sales, sales_mtime = self.sales.read_new_rows()
+        if sales is not None:
+            sales = self._unloaded(self._validate_sales(sales))
+            sales = sales.assign(Arrived=sales_mtime)
+            self.pending_sales = _extend(self.pending_sales, sales)
+
+        appended = 0
+        while True:
+            delta, arrived = self._next_batch()
+            if delta is None:
+                break
+            if delta.empty:
+                continue
+            self.schema.append(delta)
+            now = time.time()
+            lag = now - arrived
+            self.stats.batches += 1
+            self.stats.rows_ingested += len(delta)
+            self.stats.last_batch_rows = len(delta)
+            self.stats.last_lag_seconds = lag
+            self.stats.max_lag_seconds = max(self.stats.max_lag_seconds, lag)
+            self.stats.last_ingest_at = now
+            appended += len(delta)
+
+        self.pending_orders = self._expire(self.pending_orders, "orders")
+        self.pending_sales = self._expire(self.pending_sales, "sales")
+        return appended
+
+    def _expire(self, pending, name):
+        """
+        Drop pending rows older than `pending_ttl` seconds, then the oldest
+        rows beyond `pending_rows`.
+        """
+        arrived = pending["Arrived"].to_numpy(dtype=np.float64)
+        keep = arrived >= time.time() - self.pending_ttl
+        expired = int((~keep).sum())
+        overflow = max(0, int(keep.sum()) - self.pending_rows)
+        if overflow:
+            live = np.flatnonzero(keep)
+            keep[live[np.argsort(arrived[live], kind="stable")[:overflow]]] = False
+        if keep.all():
+            return pending
+        self.stats.reject(f"{name}: no match within {self.pending_ttl:g} s", expired)
+        self.stats.reject(f"{name}: pending buffer full", overflow)
+        logger.warning(
+            "Dropped %d pending %s rows without a match (%d expired, %d over the "
+            "buffer limit); first Order.IDs: %s",
+            expired + overflow,
+            name,
+            expired,
+            overflow,
+            pending.loc[~keep, "Order.ID"].head(10).tolist(),
+        )
+        return pending[keep]
+
+    def _ingest_dimensions(self):
+        customers, _ = self.customers.read_new_rows()
+        if customers is not None:
+            customers = customers.dropna(subset=["Customer.ID"])
+            known = self.schema.customers["Customer.ID"]
+            customers = customers[~customers["Customer.ID"].isin(known)]
+            self.schema.append_dimension(
+                "Customer.ID", customers[CUSTOMER_ATTRIBUTES].drop_duplicates()
+            )
+        products, _ = self.products.read_new_rows()
+        if products is not None:
+            products = products.dropna(subset=["Product.ID"])
+            known = self.schema.products["Product.ID"]
+            products = products[~products["Product.ID"].isin(known)]
+            self.schema.append_dimension(
+                "Product.ID", products[PRODUCT_ATTRIBUTES].drop_duplicates()
+            )
+
+    def _unloaded(self, rows):
+        # Rows of orders the schema was loaded with are not appended twice.
+        return rows[~rows["Order.ID"].isin(self.loaded_ids)]
+
+    def _validate_orders(self, orders):
+        missing = [c for c in ORDER_COLUMNS if c not in orders.columns]
+        if missing:
+            self.stats.reject("orders: missing columns", len(orders))
+            return orders.iloc[0:0].reindex(columns=ORDER_COLUMNS)
+        orders = orders[ORDER_COLUMNS].copy()
+        orders["Order.ID"] = pd.to_numeric(orders["Order.ID"], errors="coerce")
+        orders["Order.Date"] = pd.to_datetime(orders["Order.Date"], errors="coerce")
+        valid = orders["Order.ID"].notna() & orders["Order.Date"].notna()
+        self.stats.reject("orders: bad id or date", int((~valid).sum()))
+        orders = orders[valid]
+        return orders.assign(**{"Order.ID": orders["Order.ID"].astype(np.int64)})
+
+    def _validate_sales(self, sales):
+        missing = [c for c in SALES_COLUMNS if c not in sales.columns]
+        if missing:
+            self.stats.reject("sales: missing columns", len(sales))
+            return sales.iloc[0:0].reindex(columns=SALES_COLUMNS)
+        sales = sales[SALES_COLUMNS].copy()
+        for column in ["Order.ID", *MONEY_COLUMNS]:
+            sales[column] = pd.to_numeric(sales[column], errors="coerce")
+        valid = (
+            sales[["Order.ID", *MONEY_COLUMNS]].notna().all(axis=1)
+            & sales["Ship.Mode"].notna()
+        )
+        self.stats.reject("sales: bad id or amounts", int((~valid).sum()))
+        sales = sales[valid]
+        return sales.assign(**{"Order.ID": sales["Order.ID"].astype(np.int64)})
+
+    def _next_batch(self):
+        """
+        Join pending orders and sales into at most `batch_size` fact rows.
+
+        Returns:
+            tuple: (fact delta or None, oldest arrival time of the batch).
+        """
+        matched = self.pending_orders["Order.ID"].isin(self.pending_sales["Order.ID"])
+        if not matched.any():
+            return None, None
+        ready_ids = self.pending_orders.loc[matched, "Order.ID"].unique()
+        ready_ids = ready_ids[: self.batch_size]
+
+        orders = self.pending_orders[self.pending_orders["Order.ID"].isin(ready_ids)]
+        sales = self.pending_sales[self.pending_sales["Order.ID"].isin(ready_ids)]
+        self.pending_orders = self.pending_orders[
+            ~self.pending_orders["Order.ID"].isin(ready_ids)
+        ]
+        self.pending_sales = self.pending_sales[
+            ~self.pending_sales["Order.ID"].isin(ready_ids)
+        ]
+        arrived = min(orders["Arrived"].min(), sales["Arrived"].min())
+
+        rows = orders.drop(columns="Arrived").merge(
+            sales.drop(columns="Arrived"), on="Order.ID"
+        )
+        rows["Customer.Code"] = pd.Index(
+            self.schema.customers["Customer.ID"]
+        ).get_indexer(rows["Customer.ID"])
+        unknown = rows["Customer.Code"] < 0
+        self.stats.reject("unknown customer", int(unknown.sum()))
+        rows = rows[~unknown]
+
+        products = self.schema.products["Product.ID"]
+        product_codes = pd.DataFrame(
+            {
+                "Product.ID": products.to_numpy(),
+                "Product.Code": np.arange(len(products)),
+            }
+        )
+        joined = rows.merge(product_codes, on="Product.ID", how="left")
+        unknown = joined["Product.Code"].isna()
+        self.stats.reject("unknown product", int(unknown.sum()))
+        joined = joined[~unknown]
+
+        delta = joined.assign(
+            **{
+                "Order.ID": joined["Order.ID"].astype(np.int64),
+                "Order.Date": pd.to_datetime(joined["Order.Date"]),
+                **{column: joined[column].astype(float) for column in MONEY_COLUMNS},
+                "Customer.Code": joined["Customer.Code"].astype(np.int32),
+                "Product.Code": joined["Product.Code"].astype(np.int32),
+                "Ship.Mode": joined["Ship.Mode"].astype("category"),
+            }
+        )
+        return delta, arrived
+
+
+def start_ingestor(schema, data_dir="data", interval=5.0):
+    """
+    Start a background ingestor for `schema`.
+
+    Parameters:
+        schema (StarSchema): The shared star schema to append to.
+        data_dir (str or Path): Directory containing the tailed CSV files.
+        interval (float): Seconds between polls.
+
+    Returns:
+        StreamingIngestor: The running ingestor.
+    """
+    return StreamingIngestor(
+        schema,
+        data_dir=data_dir,
+        interval=interval,
+        pending_ttl=config.INGEST_PENDING_TTL,
+        pending_rows=config.INGEST_PENDING_ROWS,
+    ).start()
@@ -0,0 +1,773 @@
+import copy
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from app.utils.cache import estimate_size
+
+
+class MaterializedAggregate:
+    """
+    An additive aggregate over the fact table that is kept up to date from
+    appended fact rows instead of being recomputed from scratch.
+
+    The table is indexed by the group-by labels (dimension attributes are
+    decoded), so it stays valid when new dimension rows are appended.
+    """
+
+    def __init__(self, group_by, value_columns, count_column=None):
+        self.group_by = list(group_by)
+        self.value_columns = list(value_columns)
+        self.count_column = count_column
+        self.table = None
+
+    def _partial(self, schema, fact):
+        grouped = fact.groupby(schema.keys(fact, self.group_by))
+        partial = grouped[self.value_columns].sum()
+        if self.count_column:
+            partial[self.count_column] = grouped.size()
+        partial = schema.decode(partial.reset_index(), self.group_by)
+        return partial.set_index(self.group_by)
+
+    def build(self, schema):
+        """
+        Compute the aggregate over the whole fact table.
+
+        Parameters:
+            schema (StarSchema): The loaded star schema.
+        """
+        self.table = self._partial(schema, schema.fact)
+
+    def apply(self, schema, delta):
+        """
+        Fold newly appended fact rows into the aggregate.
+
+        Parameters:
+            schema (StarSchema): The star schema the rows were appended to.
+            delta (pd.DataFrame): The appended fact rows.
+        """
+        partial = self._partial(schema, delta)
+        table = self.table.add(partial, fill_value=0).sort_index()
+        if self.count_column:
+            table[self.count_column] = table[self.count_column].astype(np.int64)
+        self.table = table
+
+    def nbytes(self):
+        """
+        Return the bytes held by the aggregate table.
+        """
+        return estimate_size(self.table)
+
+    def select(self, conditions=None, date_range=None):
+        """
+        Slice the aggregate by label filters and an optional date range.
+
+        Parameters:
+            conditions (dict, optional): Index level -> accepted labels. Empty
+                label lists mean "no filter" like the sidebar multiselects.
+            date_range (tuple, optional): Inclusive (start, end) on "Order.Date".
+
+        Returns:
+            pd.DataFrame: The matching aggregate rows.
+        """
+        table = self.table
+        mask = np.ones(len(table), dtype=bool)
+        for level, values in (conditions or {}).items():
+            if values:
+                mask &= table.index.get_level_values(level).isin(values)
+        if date_range:
+            dates = table.index.get_level_values("Order.Date")
+            mask &= (dates >= pd.Timestamp(date_range[0])) & (
+                dates <= pd.Timestamp(date_range[1])
+            )
+        return table[mask]
+
+
+ORDER_COLUMNS = [
+    "Order.ID",
+    "Customer.Code",
+    "Product.Code",
+    "Order.Date",
+    "Ship.Mode",
+    "Sales",
+    "Lines",
+]
+
+
+class OrderFacts:
+    """
+    Order-level fact table: one row per order and product category with the
+    order value ("Sales"), line count, customer, date and ship mode.
+
+    Every row keeps the code of one of its products, so `StarSchema.filter`
+    selects order rows by country, category and date exactly like fact rows,
+    and order views scale with the number of orders rather than lines.
+    """
+
+    def __init__(self):
+        self.table = None
+
+    def _summarize(self, schema, rows):
+        # `rows` are fact lines with a "Lines" count of 1, possibly mixed with
+        # order rows from the table that they add to.
+        grouped = rows.groupby(
+            ["Order.ID", schema.row_codes(rows, "Category")], sort=False
+        )
+        orders = grouped.agg(
+            **{
+                column: (column, "first")
+                for column in ["Customer.Code", "Product.Code", "Order.Date"]
+            },
+            **{"Ship.Mode": ("Ship.Mode", "first")},
+            Sales=("Sales", "sum"),
+            Lines=("Lines", "sum"),
+        )
+        return orders.reset_index()[ORDER_COLUMNS]
+
+    def build(self, schema):
+        """
+        Summarize the whole fact table by order.
+
+        Parameters:
+            schema (StarSchema): The loaded star schema.
+        """
+        self.table = self._summarize(schema, schema.fact.assign(Lines=1))
+
+    def apply(self, schema, delta):
+        """
+        Fold newly appended fact rows into their orders.
+
+        Lines of orders already in the table are summed into the existing
+        rows; only those orders are summarized again.
+
+        Parameters:
+            schema (StarSchema): The star schema the rows were appended to.
+            delta (pd.DataFrame): The appended fact rows.
+        """
+        table = self.table
+        touched = table["Order.ID"].isin(delta["Order.ID"].unique()).to_numpy()
+        rows = pd.concat(
+            [table[touched], delta.assign(Lines=1)[ORDER_COLUMNS]], ignore_index=True
+        )
+        ship_mode = union_categoricals(
+            [table["Ship.Mode"], delta["Ship.Mode"]], ignore_order=True
+        )
+        rows = rows.assign(
+            **{"Ship.Mode": pd.Categorical(rows["Ship.Mode"], ship_mode.categories)}
+        )
+        table = pd.concat(
+            [table[~touched], self._summarize(schema, rows)], ignore_index=True
+        )
+        self.table = table.assign(
+            **{"Ship.Mode": pd.Categorical(table["Ship.Mode"], ship_mode.categories)}
+        )
+
+    def nbytes(self):
+        """
+        Return the bytes held by the order table.
+        """
+        return estimate_size(self.table)
+
+
+class PrefixSums:
+    """
+    Daily cumulative sums of fact columns per (country, category) segment over
+    a gap-free calendar.
+
+    `sums[column]` has one row per segment and one column per calendar day
+    plus a leading zero, so the total of any date range is two lookups per
+    segment and moving windows are differences of shifted positions. Query
+    cost depends on the number of segments, not on the length of the history.
+    """
+
+    def __init__(self, value_columns, count_column=None):
+        self.value_columns = list(value_columns)
+        self.count_column = count_column
+        self.dates = None
+        self.segments = None
+        self.sums = None
+
+    @property
+    def table(self):
+        return self.sums
+
+    @property
+    def columns(self):
+        return self.value_columns + ([self.count_column] if self.count_column else [])
+
+    def _daily(self, schema, fact):
+        group_by = ["Order.Date", "Country", "Category"]
+        grouped = fact.groupby(schema.keys(fact, group_by))
+        daily = grouped[self.value_columns].sum()
+        if self.count_column:
+            daily[self.count_column] = grouped.size()
+        return schema.decode(daily.reset_index(), group_by)
+
+    def _resize(self, dates, segments):
+        # Old positions keep their sums; new days after the old calendar carry
+        # the last cumulative value forward, new segments and earlier days
+        # start at zero.
+        if self.sums is None:
+            self.dates, self.segments = dates, segments
+            self.sums = {
+                column: np.zeros(
+                    (len(segments), len(dates) + 1),
+                    dtype=np.int64 if column == self.count_column else np.float64,
+                )
+                for column in self.columns
+            }
+            return
+        rows = segments.get_indexer(self.segments)
+        offset = dates.get_loc(self.dates[0])
+        end = offset + len(self.dates) + 1
+        sums = {}
+        for column, old in self.sums.items():
+            new = np.zeros((len(segments), len(dates) + 1), dtype=old.dtype)
+            new[rows, offset:end] = old
+            new[rows, end:] = old[:, -1:]
+            sums[column] = new
+        self.dates, self.segments, self.sums = dates, segments, sums
+
+    def _add(self, schema, fact):
+        daily = self._daily(schema, fact)
+        if daily.empty:
+            return
+        dates = daily["Order.Date"]
+        if self.dates is not None:
+            dates = pd.concat([dates, pd.Series(self.dates[[0, -1]])])
+        segments = pd.MultiIndex.from_frame(daily[["Country", "Category"]])
+        if self.segments is not None:
+            segments = self.segments.append(segments)
+        self._resize(
+            pd.date_range(dates.min(), dates.max(), freq="D"),
+            segments.unique().sort_values(),
+        )
+        rows = self.segments.get_indexer(
+            pd.MultiIndex.from_frame(daily[["Country", "Category"]])
+        )
+        days = self.dates.get_indexer(daily["Order.Date"])
+        sums = {}
+        for column, cumulative in self.sums.items():
+            values = np.zeros(cumulative[:, 1:].shape, dtype=cumulative.dtype)
+            values[rows, days] = daily[column].to_numpy()
+            sums[column] = cumulative + np.pad(
+                np.cumsum(values, axis=1), ((0, 0), (1, 0))
+            )
+        self.sums = sums
+
+    def build(self, schema):
+        """
+        Compute the prefix sums over the whole fact table.
+
+        Parameters:
+            schema (StarSchema): The loaded star schema.
+        """
+        self.dates = self.segments = self.sums = None
+        self._add(schema, schema.fact)
+
+    def apply(self, schema, delta):
+        """
+        Add newly appended fact rows to the prefix sums, extending the
+        calendar and segments when the rows need it.
+
+        Parameters:
+            schema (StarSchema): The star schema the rows were appended to.
+            delta (pd.DataFrame): The appended fact rows.
+        """
+        self._add(schema, delta)
+
+    def nbytes(self):
+        """
+        Return the bytes held by the sums, the calendar and the segments.
+        """
+        return estimate_size([self.sums, self.dates, self.segments])
+
+    def _rows(self, conditions):
+        mask = np.ones(len(self.segments), dtype=bool)
+        for level, values in (conditions or {}).items():
+            if values:
+                mask &= self.segments.get_level_values(level).isin(values)
+        return np.flatnonzero(mask)
+
+    def _bounds(self, date_range):
+        if not date_range:
+            return 0, len(self.dates)
+        return (
+            self.dates.searchsorted(pd.Timestamp(date_range[0])),
+            self.dates.searchsorted(pd.Timestamp(date_range[1]), side="right"),
+        )
+
+    def totals(self, conditions=None, date_range=None):
+        """
+        Sum every column over a filter selection.
+
+        Parameters:
+            conditions (dict, optional): "Country"/"Category" -> accepted labels.
+            date_range (tuple, optional): Inclusive (start, end) dates.
+
+        Returns:
+            dict: Column -> total.
+        """
+        rows = self._rows(conditions)
+        start, end = self._bounds(date_range)
+        return {
+            column: (cumulative[rows, end] - cumulative[rows, start]).sum().item()
+            for column, cumulative in self.sums.items()
+        }
+
+    def cumulative(self, conditions=None, column="Sales"):
+        """
+        Return the calendar-wide cumulative sums of one column, summed over
+        the selected segments (length: calendar days + 1).
+        """
+        return self.sums[column][self._rows(conditions)].sum(axis=0)
+
+    def active_days(self, conditions=None, date_range=None):
+        """
+        Count the days with at least one fact row in a filter selection.
+
+        Days are shared between segments, so this reads the summed counts of
+        every day in the range once instead of two lookups per segment.
+        """
+        start, end = self._bounds(date_range)
+        counts = self.cumulative(conditions, self.count_column)[start : end + 1]
+        return int(np.count_nonzero(np.diff(counts)))
+
+    def moving_averages(
+        self, conditions=None, date_range=None, column="Sales", windows=(7, 30, 90)
+    ):
+        """
+        Daily values of one column with trailing moving averages, for every
+        calendar day in the date range (days without rows count as 0).
+
+        Parameters:
+            conditions (dict, optional): "Country"/"Category" -> accepted labels.
+            date_range (tuple, optional): Inclusive (start, end) dates.
+            column (str): Column to average.
+            windows (tuple): Window lengths in days.
+
+        Returns:
+            pd.DataFrame: "Date", the daily `column` and one "<n>-Day Average"
+            column per window.
+        """
+        cumulative = self.cumulative(conditions, column)
+        start, end = self._bounds(date_range)
+        positions = np.arange(start + 1, end + 1)
+        frame = {
+            "Date": self.dates[start:end],
+            column: cumulative[positions] - cumulative[positions - 1],
+        }
+        for window in windows:
+            # Windows reach back before the range start; only the first days
+            # of the calendar average over fewer days.
+            lower = np.clip(positions - window, 0, None)
+            frame[f"{window}-Day Average"] = (
+                cumulative[positions] - cumulative[lower]
+            ) / (positions - lower)
+        return pd.DataFrame(frame)
+
+    def window_totals(self, conditions=None, end=None, windows=(7, 30, 90)):
+        """
+        Total every column over trailing windows ending at `end` and over the
+        equally long windows just before them.
+
+        Parameters:
+            conditions (dict, optional): "Country"/"Category" -> accepted labels.
+            end (date, optional): Last day of the windows (default: last day).
+            windows (tuple): Window lengths in days.
+
+        Returns:
+            pd.DataFrame: One row per window with "Days" and, per column, the
+            current and "Previous <column>" totals.
+        """
+        rows = self._rows(conditions)
+        stop = (
+            len(self.dates)
+            if end is None
+            else self.dates.searchsorted(pd.Timestamp(end), side="right")
+        )
+        days = np.asarray(windows)
+        positions = np.clip(stop - np.outer([0, 1, 2], days), 0, None)
+        frame = {"Days": days}
+        for column, cumulative in self.sums.items():
+            selected = cumulative[rows][:, positions].sum(axis=0)
+            frame[column] = selected[0] - selected[1]
+            frame[f"Previous {column}"] = selected[1] - selected[2]
+        return pd.DataFrame(frame)
+
+
+HISTORY_COLUMNS = [
+    "Customer.Code",
+    "Order.ID",
+    "Order.Date",
+    "Product.Code",
+    "Sales",
+    "Profit",
+    "Shipping.Cost",
+    "Ship.Mode",
+]
+
+
+class CustomerHistory:
+    """
+    The fact rows physically sorted by customer and order date, with the row
+    range of every customer, their lifetime totals and a prefix index of
+    customer names.
+
+    A customer's history is the contiguous slice
+    `table[offsets[code]:offsets[code + 1]]` and their totals one row of
+    `totals`, so a drill-down costs the same whatever the size of the fact
+    table. Appended rows are merged into place rather than re-sorted.
+    """
+
+    def __init__(self):
+        self.table = None
+        self.offsets = None
+        self.totals = None
+        self.names = None
+        self.ids = None
+        self._sort_keys = None
+        self._ranked = None
+
+    @staticmethod
+    def _keys(rows):
+        # One int64 per row ordering by customer code, then day.
+        days = rows["Order.Date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+        codes = rows["Customer.Code"].to_numpy().astype(np.int64)
+        return (codes << 32) | (days + 2**31)
+
+    def _index_names(self, schema):
+        from app.utils.search import PrefixIndex
+
+        if self.names is None:
+            self.names = PrefixIndex()
+            self.ids = pd.Index([], dtype=object)
+        customers = schema.customers.iloc[self.names.size :]
+        # IDs are unique per customer, so they are matched whole by a hash
+        # lookup instead of filling the prefix index with one word each. The
+        # index is extended on a copy, which pinned schemas do not share.
+        self.names = copy.copy(self.names)
+        self.names.add(customers["Customer.Name"])
+        self.ids = self.ids.append(pd.Index(customers["Customer.ID"]))
+
+    def _summarize(self, schema, orders, customers=None):
+        # Lifetime totals of every customer; order counts are recounted only
+        # for `customers` when given and kept from `orders` otherwise.
+        size = len(schema.customers)
+        codes = self.table["Customer.Code"].to_numpy()
+        self.offsets = np.searchsorted(codes, np.arange(size + 1))
+        if customers is None:
+            orders = self.table.groupby("Customer.Code")["Order.ID"].nunique()
+        else:
+            starts, ends = self.offsets[customers], self.offsets[customers + 1]
+            rows = np.concatenate(
+                [np.arange(start, end) for start, end in zip(starts, ends)]
+            )
+            orders = orders.reindex(np.arange(size), fill_value=0)
+            orders.update(
+                self.table.iloc[rows].groupby("Customer.Code")["Order.ID"].nunique()
+            )
+            orders = orders.astype(np.int64)
+        lines = np.diff(self.offsets)
+        active = lines > 0
+        dates = self.table["Order.Date"].to_numpy()
+        first = np.full(size, np.datetime64("NaT"), dtype=dates.dtype)
+        last = first.copy()
+        first[active] = dates[self.offsets[:-1][active]]
+        last[active] = dates[self.offsets[1:][active] - 1]
+        self.totals = pd.DataFrame(
+            {
+                "Sales": np.bincount(
+                    codes, weights=self.table["Sales"].to_numpy(), minlength=size
+                ),
+                "Profit": np.bincount(
+                    codes, weights=self.table["Profit"].to_numpy(), minlength=size
+                ),
+                "Orders": orders.reindex(np.arange(size), fill_value=0).to_numpy(),
+                "Lines": lines,
+                "First Order": first,
+                "Last Order": last,
+            }
+        )
+        # Sorted lifetime values of the customers with orders, for ranks.
+        self._ranked = {
+            column: np.sort(self.totals[column].to_numpy()[active])
+            for column in ["Last Order", "Lines", "Sales"]
+        }
+
+    def build(self, schema):
+        """
+        Sort the whole fact table by customer and date and index it.
+
+        Parameters:
+            schema (StarSchema): The loaded star schema.
+        """
+        rows = schema.fact[HISTORY_COLUMNS]
+        keys = self._keys(rows)
+        order = np.argsort(keys, kind="stable")
+        self.table = rows.take(order).reset_index(drop=True)
+        self._sort_keys = keys[order]
+        self.names = None
+        self._index_names(schema)
+        self._summarize(schema, None)
+
+    def apply(self, schema, delta):
+        """
+        Merge newly appended fact rows into place and update the totals of
+        the customers they belong to.
+
+        Parameters:
+            schema (StarSchema): The star schema the rows were appended to.
+            delta (pd.DataFrame): The appended fact rows.
+        """
+        rows = delta[HISTORY_COLUMNS]
+        keys = self._keys(rows)
+        order = np.argsort(keys, kind="stable")
+        rows, keys = rows.take(order), keys[order]
+        # Each new row goes after the existing rows of its customer and day.
+        positions = np.searchsorted(self._sort_keys, keys, side="right")
+        positions += np.arange(len(keys))
+        inserted = np.zeros(len(self.table) + len(rows), dtype=bool)
+        inserted[positions] = True
+        take = np.empty(len(inserted), dtype=np.int64)
+        take[~inserted] = np.arange(len(self.table))
+        take[inserted] = len(self.table) + np.arange(len(rows))
+        table = pd.concat([self.table, rows], ignore_index=True).take(take)
+        self.table = table.reset_index(drop=True).assign(
+            **{
+                "Ship.Mode": pd.Categorical(
+                    table["Ship.Mode"], delta["Ship.Mode"].cat.categories
+                )
+            }
+        )
+        self._sort_keys = np.concatenate([self._sort_keys, keys])[take]
+        self._index_names(schema)
+        self._summarize(
+            schema,
+            self.totals["Orders"],
+            np.unique(rows["Customer.Code"].to_numpy()),
+        )
+
+    def nbytes(self):
+        """
+        Return the bytes held by the sorted rows, the row ranges, the totals
+        and ranks and the name index.
+        """
+        names = self.names.nbytes() if self.names is not None else 0
+        return names + estimate_size(
+            [self.table, self.offsets, self.totals, self.ids, self._sort_keys]
+            + [self._ranked]
+        )
+
+    def search(self, query, limit=50):
+        """
+        Find customers by their ID, or by the start of any word of their name.
+
+        Parameters:
+            query (str): A customer ID or words of a name; an empty query
+                matches everyone.
+            limit (int): Most customers returned.
+
+        Returns:
+            np.ndarray: Codes of the matching customers with orders, by
+            descending lifetime sales.
+        """
+        code = self.ids.get_indexer([str(query).strip().upper()])
+        codes = code if code[0] >= 0 else self.names.search(query)
+        codes = codes[codes < len(self.totals)]
+        codes = codes[self.totals["Lines"].to_numpy()[codes] > 0]
+        sales = self.totals["Sales"].to_numpy()[codes]
+        return codes[np.argsort(-sales, kind="stable")[:limit]]
+
+    def history(self, code):
+        """
+        Return a customer's fact rows, oldest first.
+        """
+        return self.table.iloc[self.offsets[code] : self.offsets[code + 1]]
+
+    def profile(self, code):
+        """
+        Return a customer's lifetime totals and RFM position.
+
+        Parameters:
+            code (int): Customer code.
+
+        Returns:
+            dict: The `totals` columns, "Recency" (days before the latest
+            order date), and "Recency Rank", "Frequency Rank" and "Monetary
+            Rank": the share of customers with orders this customer is at
+            least as good as. Like `calculate_rfm`, frequency counts order
+            lines.
+        """
+        totals = self.totals.iloc[code].to_dict()
+        ranked = self._ranked
+        last_order = totals["Last Order"].to_datetime64()
+        ranks = {
+            "Recency Rank": np.searchsorted(
+                ranked["Last Order"], last_order, side="right"
+            ),
+            "Frequency Rank": np.searchsorted(
+                ranked["Lines"], totals["Lines"], side="right"
+            ),
+            "Monetary Rank": np.searchsorted(
+                ranked["Sales"], totals["Sales"], side="right"
+            ),
+        }
+        return {
+            **totals,
+            "Recency": (ranked["Last Order"][-1] - last_order)
+            // np.timedelta64(1, "D"),
+            **{name: rank / len(ranked["Sales"]) for name, rank in ranks.items()},
+        }
+
+
+class ProductSeries:
+    """
+    Daily sales of every product name per country and category, laid out
+    product by product.
+
+    `table` is sorted by product and date, and the rows of product `i` (its
+    position in `products`) are `table[offsets[i]:offsets[i + 1]]`, so a
+    product's trend is one slice however many products there are. `names`
+    is a prefix index of the product names for typeahead search, and
+    `categories` the (product, category) pairs that have sales.
+    """
+
+    def __init__(self):
+        self.table = None
+        self.offsets = None
+        self.products = None
+        self.totals = None
+        self.categories = None
+        self.names = None
+
+    def _daily(self, schema, fact):
+        group_by = ["Product Name", "Order.Date", "Country", "Category"]
+        daily = schema.decode(
+            fact.groupby(schema.keys(fact, group_by))["Sales"].sum().reset_index(),
+            group_by,
+        )
+        new = pd.Index(daily["Product Name"].unique()).difference(self.products)
+        if len(new):
+            self.products = self.products.append(new)
+            self.names = copy.copy(self.names)
+            self.names.add(new)
+        return daily.assign(
+            Product=self.products.get_indexer(daily["Product Name"]).astype(np.int32)
+        )[["Product", "Order.Date", "Country", "Category", "Sales"]]
+
+    def _index(self, table):
+        order = np.argsort(table["Product"].to_numpy(), kind="stable")
+        self.table = table.take(order).reset_index(drop=True)
+        products = self.table["Product"].to_numpy()
+        self.offsets = np.searchsorted(products, np.arange(len(self.products) + 1))
+        self.totals = np.bincount(
+            products,
+            weights=self.table["Sales"].to_numpy(),
+            minlength=len(self.products),
+        )
+        self.categories = self.table[["Product", "Category"]].drop_duplicates()
+
+    def build(self, schema):
+        """
+        Compute the daily series of every product.
+
+        Parameters:
+            schema (StarSchema): The loaded star schema.
+        """
+        from app.utils.search import PrefixIndex
+
+        self.products = pd.Index([], dtype=object)
+        self.names = PrefixIndex()
+        daily = self._daily(schema, schema.fact)
+        self._index(daily.sort_values(["Product", "Order.Date"], kind="stable"))
+
+    def apply(self, schema, delta):
+        """
+        Fold newly appended fact rows into the series of their products.
+
+        Only the touched products are summed again; their rows go after the
+        others and one stable sort on the (already sorted) product runs puts
+        them back in place.
+
+        Parameters:
+            schema (StarSchema): The star schema the rows were appended to.
+            delta (pd.DataFrame): The appended fact rows.
+        """
+        daily = self._daily(schema, delta)
+        touched = np.zeros(len(self.products), dtype=bool)
+        touched[daily["Product"].to_numpy()] = True
+        rows = touched[self.table["Product"].to_numpy()]
+        merged = (
+            pd.concat([self.table[rows], daily])
+            .groupby(["Product", "Order.Date", "Country", "Category"])["Sales"]
+            .sum()
+            .reset_index()
+        )
+        self._index(pd.concat([self.table[~rows], merged], ignore_index=True))
+
+    def nbytes(self):
+        """
+        Return the bytes held by the series, the row ranges, the product
+        labels and totals and the name index.
+        """
+        names = self.names.nbytes() if self.names is not None else 0
+        return names + estimate_size(
+            [self.table, self.offsets, self.products, self.totals, self.categories]
+        )
+
+    def search(self, query, categories=None, limit=50):
+        """
+        Find products with a word starting with each word of the query.
+
+        Parameters:
+            query (str): Search text; an empty query matches every product.
+            categories (list, optional): Only products sold in these
+                categories; empty means all.
+            limit (int): Most products returned.
+
+        Returns:
+            pd.Index: Product names by descending total sales.
+        """
+        positions = self.names.search(query)
+        if categories:
+            in_categories = np.zeros(len(self.products), dtype=bool)
+            selected = self.categories["Category"].isin(categories).to_numpy()
+            in_categories[self.categories["Product"].to_numpy()[selected]] = True
+            positions = positions[in_categories[positions]]
+        ranked = positions[np.argsort(-self.totals[positions], kind="stable")]
+        return self.products[ranked[:limit]]
+
+    def series(self, product, conditions=None, date_range=None):
+        """
+        Daily sales of one product over a filter selection.
+
+        Parameters:
+            product (str): Product name.
+            conditions (dict, optional): "Country"/"Category" -> accepted labels.
+            date_range (tuple, optional): Inclusive (start, end) dates.
+
+        Returns:
+            pd.DataFrame: "Order.Date" and "Sales", one row per day with sales.
+        """
+        position = self.products.get_loc(product)
+        start, end = self.offsets[position], self.offsets[position + 1]
+        dates = self.table["Order.Date"].to_numpy()[start:end]
+        sales = self.table["Sales"].to_numpy()[start:end]
+        # Rows are in date order within a product: the date range is a
+        # sub-slice found by binary search.
+        if date_range:
+            first = np.searchsorted(dates, np.datetime64(pd.Timestamp(date_range[0])))
+            last = np.searchsorted(
+                dates, np.datetime64(pd.Timestamp(date_range[1])), side="right"
+            )
+            start, dates, sales = start + first, dates[first:last], sales[first:last]
+        mask = np.ones(len(dates), dtype=bool)
+        for level, values in (conditions or {}).items():
+            if values:
+                labels = self.table[level].to_numpy()[start : start + len(dates)]
+                mask &= np.isin(labels, values)
+        days, first_rows = np.unique(dates[mask], return_index=True)
+        totals = np.add.reduceat(sales[mask], first_rows) if len(days) else sales[:0]
+        return pd.DataFrame({"Order.Date": days, "Sales": totals})
@@ -0,0 +1,164 @@
+"""
+Memory accounting for the dashboard process: the dataset, materialized
+aggregates, the shared computation cache and resident set size, plus optional
+tracemalloc diffs between reruns.
+
+Operators can dump the report of a running dashboard (through its aggregate
+API) or of a freshly loaded dataset:
+
+    PYTHONPATH=. python -m app.utils.memory --url http://127.0.0.1:8600
+    PYTHONPATH=. python -m app.utils.memory
+"""
+
+import argparse
+import json
+import resource
+import sys
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+from urllib.request import urlopen
+
+from app import config
+from app.utils.cache import computation_cache, estimate_size
+
+
+def process_rss(pid="self"):
+    """
+    Return the resident set size of a process, by default this one.
+
+    Reads /proc where available. Elsewhere this process falls back to the
+    peak RSS reported by `getrusage` and other processes are unknown.
+
+    Parameters:
+        pid (int or str): Process ID, or "self".
+
+    Returns:
+        int: Resident memory in bytes, or None when it cannot be read.
+    """
+    status = Path(f"/proc/{pid}/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    if pid != "self":
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def cache_breakdown(cache=computation_cache):
+    """
+    Group the entries of a computation cache by output or figure name.
+
+    Returns:
+        dict: Name (e.g. "figure:rfm_scatter") -> {"entries", "bytes"}.
+    """
+    groups = defaultdict(lambda: {"entries": 0, "bytes": 0})
+    for key, size in cache.entry_sizes():
+        groups[key[0]]["entries"] += 1
+        groups[key[0]]["bytes"] += size
+    return dict(sorted(groups.items(), key=lambda item: -item[1]["bytes"]))
+
+
+def memory_report(schema):
+    """
+    Report the deep memory usage of the shared dataset and caches.
+
+    Parameters:
+        schema (StarSchema): The shared star schema.
+
+    Returns:
+        dict: Sizes in bytes, JSON-serializable.
+    """
+    from app.api.server import AggregateRequestHandler
+
+    cache = cache_breakdown()
+    return {
+        "rss_bytes": process_rss(),
+        "dataset": {
+            "fact": schema.fact_nbytes(),
+            "customers": estimate_size(schema.customers),
+            "products": estimate_size(schema.products),
+        },
+        "aggregates": {
+            name: aggregate.nbytes() for name, aggregate in schema.aggregates.items()
+        },
+        "computation_cache": cache,
+        "computation_cache_bytes": sum(group["bytes"] for group in cache.values()),
+        "api_response_cache_bytes": AggregateRequestHandler.cache.size_bytes(),
+        "tracemalloc": tracemalloc.is_tracing(),
+    }
+
+
+class AllocationTracker:
+    """
+    Diffs tracemalloc snapshots between reruns to show which source lines
+    allocated the memory.
+    """
+
+    def __init__(self, frames=1):
+        self.frames = frames
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces(
+            [
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ]
+        )
+
+    def top_differences(self, previous, current, limit=10):
+        """
+        Return the source lines whose allocations grew the most.
+
+        Parameters:
+            previous (tracemalloc.Snapshot): Snapshot of the earlier rerun.
+            current (tracemalloc.Snapshot): Snapshot of the later rerun.
+            limit (int): Number of lines to return.
+
+        Returns:
+            list: Dicts with "line", "size_diff" and "count_diff".
+        """
+        return [
+            {
+                "line": str(stat.traceback[0]),
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+            }
+            for stat in current.compare_to(previous, "lineno")[:limit]
+        ]
+
+
+allocation_tracker = AllocationTracker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump dashboard memory usage.")
+    parser.add_argument(
+        "--url", help="Aggregate API of a running dashboard, e.g. http://127.0.0.1:8600"
+    )
+    parser.add_argument("--data-dir", default=config.DATA_DIR)
+    args = parser.parse_args()
+
+    if args.url:
+        with urlopen(args.url.rstrip("/") + "/debug/memory") as response:
+            report = json.load(response)
+    else:
+        from app.utils.star_schema import load_star_schema
+        from app.utils.dataset import register_default_aggregates
+
+        config.configure_pandas()
+        schema = load_star_schema(args.data_dir)
+        register_default_aggregates(schema)
+        report = memory_report(schema)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -31,9 +31,7 @@ def calculate_repeat_purchase_rate(filtered_df):
     Returns:
         float: Repeat purchase rate in percentage.
     """
-    repeat_customers_data = filtered_df.groupby("Customer.Name").filter(
-        lambda x: len(x) > 1
-    )
-    repeat_customers = repeat_customers_data["Customer.Name"].nunique()
-    total_customers = filtered_df["Customer.Name"].nunique()
+    purchases = filtered_df["Customer.Name"].value_counts()
+    repeat_customers = (purchases > 1).sum()
+    total_customers = len(purchases)
     return (repeat_customers / total_customers) * 100
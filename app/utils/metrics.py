@@ -0,0 +1,247 @@
+import functools
+import json
+import sys
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from app import config
+
+QUANTILES = [0.5, 0.95, 0.99]
+
+
+def count_rows(value):
+    """
+    Return the row count of a DataFrame or Series, or None for anything else.
+    """
+    # Every rerun is timed, including the login page, which never imports
+    # pandas; without pandas loaded there can be no DataFrame to count.
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(value, (pd.DataFrame, pd.Series)):
+        return len(value)
+    return None
+
+
+class StageRecord:
+    """
+    One timed stage of a rerun.
+    """
+
+    def __init__(self, stage, depth=0, rows_in=None):
+        self.stage = stage
+        self.depth = depth
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.cache = None
+        self.seconds = 0.0
+
+    def as_dict(self):
+        return {
+            "stage": self.stage,
+            "depth": self.depth,
+            "seconds": self.seconds,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "cache": self.cache,
+        }
+
+
+class StageMetrics:
+    """
+    Wall time, row counts and cache results of the stages of each rerun.
+
+    A rerun is started and finished on its Streamlit script thread; stages
+    timed on other threads (the cache warmer, the API) are not recorded.
+    Finished reruns feed a sliding window of samples per stage for p50, p95
+    and p99, optionally exported as a Prometheus text file and a JSON lines
+    log.
+    """
+
+    def __init__(self, window=1000, prometheus_file="", jsonl_file=""):
+        self.prometheus_file = prometheus_file
+        self.jsonl_file = jsonl_file
+        self._samples = defaultdict(lambda: deque(maxlen=window))
+        self._totals = Counter()
+        self._sums = Counter()
+        self._cache_results = Counter()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start_rerun(self):
+        """
+        Begin recording stages on the calling thread.
+        """
+        self._local.records = []
+        self._local.depth = 0
+        self._local.started = time.perf_counter()
+
+    def _active(self):
+        return getattr(self._local, "records", None) is not None
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """
+        Time a block as one stage of the current rerun.
+
+        Yields a `StageRecord` the caller can fill with `rows_out` and
+        `cache`. Outside a rerun the record is discarded.
+        """
+        if not self._active():
+            yield StageRecord(name, rows_in=rows_in)
+            return
+        record = StageRecord(name, depth=self._local.depth, rows_in=rows_in)
+        self._local.records.append(record)
+        self._local.depth += 1
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - started
+            self._local.depth -= 1
+
+    def timed(self, name=None):
+        """
+        Decorate a function so each call is timed as a stage.
+
+        Rows in and out are taken from the first argument and the return value
+        when they are DataFrames.
+        """
+
+        def decorator(function):
+            stage_name = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self._active():
+                    return function(*args, **kwargs)
+                rows_in = count_rows(args[0]) if args else None
+                with self.stage(stage_name, rows_in=rows_in) as record:
+                    result = function(*args, **kwargs)
+                    record.rows_out = count_rows(result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def finish_rerun(self, tags=None):
+        """
+        Stop recording on the calling thread and publish the rerun's stages.
+
+        Parameters:
+            tags (dict, optional): Context logged with every record, e.g. the
+                active filters.
+
+        Returns:
+            list: The rerun's `StageRecord`s, including a final "rerun" total.
+        """
+        if not self._active():
+            return []
+        records = self._local.records
+        total = StageRecord("rerun")
+        total.seconds = time.perf_counter() - self._local.started
+        records.append(total)
+        self._local.records = None
+
+        with self._lock:
+            for record in records:
+                self._samples[record.stage].append(record.seconds)
+                self._totals[record.stage] += 1
+                self._sums[record.stage] += record.seconds
+                if record.cache:
+                    self._cache_results[(record.stage, record.cache)] += 1
+        if self.prometheus_file:
+            self._write(self.prometheus_file, self.to_prometheus(), mode="w")
+        if self.jsonl_file:
+            timestamp = time.time()
+            lines = "".join(
+                json.dumps({"time": timestamp, **(tags or {}), **record.as_dict()})
+                + "\n"
+                for record in records
+            )
+            self._write(self.jsonl_file, lines, mode="a")
+        return records
+
+    def _write(self, path, text, mode):
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(path, mode) as f:
+                f.write(text)
+        except OSError:
+            pass
+
+    def summary(self):
+        """
+        Summarize the recorded stages.
+
+        Returns:
+            pd.DataFrame: Per stage: calls, p50/p95/p99 milliseconds, cache
+            hits and misses.
+        """
+        import numpy as np
+        import pandas as pd
+
+        with self._lock:
+            rows = [
+                {
+                    "Stage": stage,
+                    "Calls": self._totals[stage],
+                    **{
+                        f"p{int(q * 100)} (ms)": np.quantile(samples, q) * 1000
+                        for q in QUANTILES
+                    },
+                    "Hits": self._cache_results[(stage, "hit")],
+                    "Misses": self._cache_results[(stage, "miss")],
+                }
+                for stage, samples in self._samples.items()
+            ]
+        return pd.DataFrame(rows)
+
+    def to_prometheus(self):
+        """
+        Render the stage metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: The metrics text.
+        """
+        import numpy as np
+
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self._samples.items()}
+            sums = dict(self._sums)
+            totals = dict(self._totals)
+            cache_results = dict(self._cache_results)
+
+        lines = [
+            "# HELP dashboard_stage_seconds Wall time of dashboard rerun stages.",
+            "# TYPE dashboard_stage_seconds summary",
+        ]
+        for stage, values in sorted(samples.items()):
+            for q in QUANTILES:
+                lines.append(
+                    f'dashboard_stage_seconds{{stage="{stage}",quantile="{q}"}} '
+                    f"{np.quantile(values, q):.6f}"
+                )
+            lines.append(
+                f'dashboard_stage_seconds_sum{{stage="{stage}"}} {sums[stage]:.6f}'
+            )
+            lines.append(
+                f'dashboard_stage_seconds_count{{stage="{stage}"}} {totals[stage]}'
+            )
+        lines += [
+            "# HELP dashboard_stage_cache_total Cache results of dashboard stages.",
+            "# TYPE dashboard_stage_cache_total counter",
+        ]
+        for (stage, result), count in sorted(cache_results.items()):
+            lines.append(
+                f'dashboard_stage_cache_total{{stage="{stage}",result="{result}"}} '
+                f"{count}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+stage_metrics = StageMetrics(
+    prometheus_file=config.METRICS_PROMETHEUS_FILE, jsonl_file=config.METRICS_JSONL_FILE
+)
@@ -0,0 +1,191 @@
+import cProfile
+import json
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread at a fixed interval.
+
+    The result is what flamegraphs are drawn from: how often each distinct
+    stack was seen, weighted by the time between samples.
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.frames = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="stack-sampler", daemon=True
+        )
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                self.frames.setdefault(
+                    code, (code.co_name, code.co_filename, code.co_firstlineno)
+                )
+                stack.append(code)
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += now - last
+            last = now
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def to_speedscope(self, name):
+        """
+        Return the samples as a speedscope "sampled" profile.
+
+        Parameters:
+            name (str): Profile name shown by speedscope.
+
+        Returns:
+            dict: JSON-serializable speedscope document.
+        """
+        codes = list(self.frames)
+        index = {code: position for position, code in enumerate(codes)}
+        samples = [[index[code] for code in stack] for stack in self.stacks]
+        weights = list(self.stacks.values())
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {
+                "frames": [
+                    {
+                        "name": self.frames[code][0],
+                        "file": self.frames[code][1],
+                        "line": self.frames[code][2],
+                    }
+                    for code in codes
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+            "name": name,
+            "exporter": "e-commerce-sales-dashboard",
+        }
+
+    def to_collapsed(self):
+        """
+        Return the samples in the collapsed-stack format read by flamegraph.pl
+        and most flamegraph viewers (one "frame;frame;frame microseconds" line
+        per stack).
+        """
+        return "".join(
+            ";".join(_frame_label(code) for code in stack) + f" {int(seconds * 1e6)}\n"
+            for stack, seconds in self.stacks.items()
+        )
+
+
+class RerunProfiler:
+    """
+    Profiles one Streamlit rerun on the calling thread.
+
+    A deterministic profiler (cProfile) gives exact call counts and cumulative
+    times; a stack sampler running alongside gives the flamegraph.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._profile = cProfile.Profile()
+        self._sampler = StackSampler(threading.get_ident(), interval)
+        self._started_at = datetime.now()
+
+    def start(self):
+        self._sampler.start()
+        self._profile.enable()
+        return self
+
+    def stop(self, output_dir, tags, top_n=25):
+        """
+        Stop profiling and write the profile files.
+
+        Parameters:
+            output_dir (str): Directory for the files.
+            tags (dict): Context recorded with the profile, e.g. the active
+                filters and tab.
+            top_n (int): Number of functions in the top list.
+
+        Returns:
+            dict: "files" (list of paths), "top" (DataFrame of the top
+            functions by cumulative time) and "tags".
+        """
+        self._profile.disable()
+        self._sampler.stop()
+
+        stats = pstats.Stats(self._profile)
+        rows = []
+        for (filename, line, function), stat in stats.stats.items():
+            _, calls, own, cumulative, _ = stat
+            rows.append(
+                {
+                    "Function": f"{function} ({Path(filename).name}:{line})",
+                    "Calls": calls,
+                    "Own (s)": own,
+                    "Cumulative (s)": cumulative,
+                }
+            )
+        top = pd.DataFrame(rows)
+        top = top.sort_values("Cumulative (s)", ascending=False).head(top_n)
+
+        label = " ".join(f"{key}={value}" for key, value in tags.items() if value)
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", label).strip("-").lower()[:80]
+        stem = self._started_at.strftime("%Y%m%d-%H%M%S") + (f"-{slug}" if slug else "")
+        target = Path(output_dir)
+        target.mkdir(parents=True, exist_ok=True)
+
+        speedscope = target / f"{stem}.speedscope.json"
+        speedscope.write_text(
+            json.dumps(self._sampler.to_speedscope(f"Dashboard rerun {label}"))
+        )
+        collapsed = target / f"{stem}.collapsed.txt"
+        collapsed.write_text(self._sampler.to_collapsed())
+
+        report = StringIO()
+        report.write(f"Dashboard rerun profile {self._started_at.isoformat()}\n")
+        report.write(json.dumps(tags, default=str) + "\n\n")
+        stats.stream = report
+        stats.sort_stats("cumulative").print_stats(top_n)
+        top_functions = target / f"{stem}.top.txt"
+        top_functions.write_text(report.getvalue())
+
+        return {
+            "files": [str(speedscope), str(collapsed), str(top_functions)],
+            "top": top,
+            "tags": tags,
+        }
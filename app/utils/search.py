@@ -0,0 +1,113 @@
+"""
+Prefix search over labels such as customer or product names, for typeahead
+pickers that keep the full label list on the server.
+
+Labels are split into lower-case words. The distinct words are kept in one
+sorted NumPy array with the items of each word stored contiguously after it
+(a CSR layout), so the items matching a prefix are one range found with two
+binary searches.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def label_words(labels):
+    """
+    Split labels into lower-case words, tokenizing each distinct label once.
+
+    Parameters:
+        labels (pd.Series): Labels, one per item.
+
+    Returns:
+        tuple: (np.ndarray of item positions in `labels`, np.ndarray of words),
+        one entry per word of every label.
+    """
+    codes, uniques = pd.factorize(labels.fillna("").to_numpy())
+    lower = pd.Series(uniques, dtype=object).str.lower()
+    # Most labels of one word (IDs) need no splitting.
+    spaced = lower.str.contains(" ", regex=False).to_numpy()
+    words = lower[spaced].str.split(expand=True).stack()
+    label_codes = np.concatenate(
+        [np.flatnonzero(~spaced), words.index.get_level_values(0).to_numpy()]
+    )
+    pair_words = np.concatenate([lower[~spaced].to_numpy(), words.to_numpy()])
+
+    # Expand each (label, word) pair to every item with that label.
+    order = np.argsort(codes, kind="stable")
+    counts = np.bincount(codes, minlength=len(uniques))
+    firsts = np.cumsum(counts) - counts
+    repeats = counts[label_codes]
+    within = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    items = order[np.repeat(firsts[label_codes], repeats) + within]
+    return items, np.repeat(pair_words, repeats)
+
+
+class PrefixIndex:
+    """
+    Sorted distinct words of item labels, each followed by the items whose
+    label contains it, searchable by word prefix.
+
+    Items are positions in the label sequences passed to `add`, counted from
+    0 across calls, so they line up with dimension codes when the labels do.
+    """
+
+    def __init__(self):
+        self.keys = np.array([], dtype=str)
+        self.starts = np.zeros(1, dtype=np.int64)
+        self.items = np.array([], dtype=np.int64)
+        self.size = 0
+
+    def add(self, *columns):
+        """
+        Index more items; they become items `size`, `size + 1`, ...
+
+        Parameters:
+            *columns (array-like of str): Labels of the new items, e.g. names
+                and IDs; an item matches the words of any of its labels.
+        """
+        columns = [pd.Series(np.asarray(labels, dtype=object)) for labels in columns]
+        if not columns or columns[0].empty:
+            return
+        pairs = [label_words(labels) for labels in columns]
+        items = np.concatenate([items for items, _ in pairs])
+        words = np.concatenate([words for _, words in pairs])
+        word_codes, new_keys = pd.factorize(words)
+        keys = np.union1d(self.keys, np.asarray(new_keys, dtype=str))
+        codes = np.concatenate(
+            [
+                np.repeat(np.searchsorted(keys, self.keys), np.diff(self.starts)),
+                np.searchsorted(keys, np.asarray(new_keys, dtype=str))[word_codes],
+            ]
+        )
+        items = np.concatenate([self.items, items + self.size])
+        order = np.lexsort((items, codes))
+        self.keys, self.items = keys, items[order]
+        self.starts = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+        self.size += len(columns[0])
+
+    def nbytes(self):
+        """
+        Return the bytes held by the word and item arrays.
+        """
+        return self.keys.nbytes + self.starts.nbytes + self.items.nbytes
+
+    def search(self, query):
+        """
+        Find the items with a word starting with each word of the query.
+
+        Parameters:
+            query (str): Search text; case is ignored.
+
+        Returns:
+            np.ndarray: Sorted item positions; every item for an empty query.
+        """
+        matches = None
+        for prefix in str(query).lower().split():
+            first = np.searchsorted(self.keys, prefix)
+            last = np.searchsorted(self.keys, prefix + "\U0010ffff")
+            found = np.unique(self.items[self.starts[first] : self.starts[last]])
+            matches = found if matches is None else np.intersect1d(matches, found)
+        if matches is None:
+            return np.arange(self.size)
+        return matches
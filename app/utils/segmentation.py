@@ -0,0 +1,202 @@
+"""
+Customer segmentation by clustering standardized RFM features with
+scikit-learn's `MiniBatchKMeans`.
+
+The model is registered on the star schema like the materialized aggregates:
+it is fitted on the first request (scikit-learn is only imported then), and
+appended rows refine it with `partial_fit` on the customers they touch.
+
+Features are always the customers' lifetime RFM metrics, with recency counted
+from one reference date fixed at the first fit, so fitting, refining and
+assigning use the same definition. A customer's segment therefore does not
+depend on the filter selection; a view only looks its customers up.
+"""
+
+import copy
+import threading
+
+import numpy as np
+import pandas as pd
+
+from app.utils.cache import estimate_size
+from app.utils.data_processing import calculate_rfm
+
+SEGMENTS = ["Low-Value", "Mid-Value", "High-Value", "Top-Value"]
+
+
+def rfm_features(rfm):
+    """
+    Turn RFM metrics into clustering features: recency, and the logarithms of
+    frequency and monetary value, whose distributions are heavily skewed.
+
+    Parameters:
+        rfm (pd.DataFrame): DataFrame returned by `calculate_rfm`.
+
+    Returns:
+        np.ndarray: (customers, 3) features.
+    """
+    return np.column_stack(
+        [
+            rfm["Recency"].to_numpy(dtype=np.float64),
+            np.log1p(rfm["Frequency"].to_numpy(dtype=np.float64)),
+            np.log1p(rfm["Monetary"].clip(lower=0).to_numpy(dtype=np.float64)),
+        ]
+    )
+
+
+def merge_rfm(rfm, update):
+    """
+    Combine lifetime RFM metrics with those of newer rows measured from the
+    same reference date.
+
+    Parameters:
+        rfm (pd.DataFrame): RFM metrics indexed by customer.
+        update (pd.DataFrame): RFM metrics of newer rows, indexed by customer.
+
+    Returns:
+        pd.DataFrame: RFM metrics of the union of customers.
+    """
+    return (
+        pd.concat([rfm, update])
+        .groupby(level=0, sort=False)
+        .agg({"Recency": "min", "Frequency": "sum", "Monetary": "sum"})
+    )
+
+
+class CustomerSegmentation:
+    """
+    MiniBatchKMeans clusters of standardized lifetime RFM features, named
+    from "Low-Value" to "Top-Value" by how recent, frequent and large the
+    purchases at their centers are.
+
+    The scaler and the recency `reference` date are fixed at the first fit so
+    cluster centers stay comparable between updates. `rfm` holds every
+    customer's lifetime metrics and `assignments` their segments; `version`
+    is the data version the model has seen.
+    """
+
+    def __init__(self, n_segments=len(SEGMENTS), batch_size=4096, seed=0):
+        self.n_segments = n_segments
+        self.batch_size = batch_size
+        self.seed = seed
+        self.scaler = None
+        self.model = None
+        self.reference = None
+        self.rfm = None
+        self.assignments = None
+        self.version = None
+        self._lock = threading.Lock()
+
+    def __copy__(self):
+        # Appends update a copy (see `StarSchema.append`), and `partial_fit`
+        # refines the model in place, so the copy gets its own model and lock.
+        with self._lock:
+            clone = object.__new__(type(self))
+            clone.__dict__.update(self.__dict__)
+            clone.model = copy.deepcopy(self.model)
+        clone._lock = threading.Lock()
+        return clone
+
+    @property
+    def table(self):
+        if self.model is None:
+            return None
+        return pd.DataFrame(
+            self.scaler.inverse_transform(self.model.cluster_centers_),
+            columns=["Recency", "Log Frequency", "Log Monetary"],
+        )
+
+    def nbytes(self):
+        """
+        Return the bytes held by the RFM metrics, the assignments and the
+        cluster centers.
+        """
+        with self._lock:
+            centers = None if self.model is None else self.model.cluster_centers_
+            return estimate_size([self.rfm, self.assignments, centers])
+
+    def build(self, schema):
+        """
+        Forget any fitted model; the next `segments` call fits a new one.
+
+        Parameters:
+            schema (StarSchema): The loaded star schema.
+        """
+        with self._lock:
+            self.scaler = self.model = self.version = None
+            self.reference = self.rfm = self.assignments = None
+
+    def apply(self, schema, delta):
+        """
+        Add newly appended fact rows to the lifetime RFM metrics and refine a
+        fitted model with the customers they touch.
+
+        Parameters:
+            schema (StarSchema): The star schema the rows were appended to.
+            delta (pd.DataFrame): The appended fact rows.
+        """
+        with self._lock:
+            if self.model is None:
+                return
+            update = calculate_rfm(delta, self.reference, schema=schema)
+            update = update.set_index("Customer.Name")
+            self.rfm = merge_rfm(self.rfm, update)
+            features = self.scaler.transform(rfm_features(self.rfm.loc[update.index]))
+            for start in range(0, len(features), self.batch_size):
+                self.model.partial_fit(features[start : start + self.batch_size])
+            self.assignments = self._assign(self.rfm)
+            self.version = schema.version + 1
+
+    def _fit(self, schema):
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.preprocessing import StandardScaler
+
+        fact = schema.fact
+        self.reference = fact["Order.Date"].max()
+        self.rfm = calculate_rfm(fact, self.reference, schema=schema).set_index(
+            "Customer.Name"
+        )
+        features = rfm_features(self.rfm)
+        self.scaler = StandardScaler().fit(features)
+        self.model = MiniBatchKMeans(
+            n_clusters=min(self.n_segments, len(features)),
+            batch_size=self.batch_size,
+            random_state=self.seed,
+            n_init=3,
+        ).fit(self.scaler.transform(features))
+        self.assignments = self._assign(self.rfm)
+        self.version = schema.version
+
+    def _assign(self, rfm):
+        centers = self.model.cluster_centers_
+        # Recent purchases have a low recency, so it counts negatively.
+        value = centers @ np.array([-1.0, 1.0, 1.0])
+        names = np.empty(len(centers), dtype=object)
+        names[np.argsort(value)] = SEGMENTS[-len(centers) :]
+        clusters = self.model.predict(self.scaler.transform(rfm_features(rfm)))
+        return pd.Series(
+            pd.Categorical(names[clusters], categories=SEGMENTS, ordered=True),
+            index=rfm.index,
+        )
+
+    def segments(self, schema, customers):
+        """
+        Look up the segments of customers, fitting the model first if needed.
+
+        Parameters:
+            schema (StarSchema): The star schema the model is fitted on.
+            customers (pd.Series): Customer names.
+
+        Returns:
+            pd.Categorical: The ordered segment of every customer, from their
+            lifetime RFM metrics.
+        """
+        with self._lock:
+            if self.model is None:
+                self._fit(schema)
+            assignments = self.assignments
+        return pd.Categorical(
+            assignments.reindex(customers.to_numpy()).to_numpy(),
+            categories=SEGMENTS,
+            ordered=True,
+        )
@@ -0,0 +1,579 @@
+from contextlib import contextmanager
+import copy
+import itertools
+from pathlib import Path
+import threading
+
+import numpy as np
+import pandas as pd
+
+CUSTOMER_ATTRIBUTES = ["Customer.ID", "Customer.Name", "Country", "City"]
+PRODUCT_ATTRIBUTES = ["Product.ID", "Product Name", "Category", "Sub-Category"]
+MONEY_COLUMNS = ["Sales", "Profit", "Shipping.Cost"]
+FACT_COLUMNS = [
+    "Order.ID",
+    "Customer.Code",
+    "Product.Code",
+    "Order.Date",
+    *MONEY_COLUMNS,
+    "Ship.Mode",
+]
+MERGED_COLUMNS = [
+    "Order.ID",
+    "Customer.ID",
+    "Product.ID",
+    "Order.Date",
+    *MONEY_COLUMNS,
+    "Ship.Mode",
+    "Customer.Name",
+    "Country",
+    "City",
+    "Product Name",
+    "Category",
+    "Sub-Category",
+]
+
+
+def categorical_codes_dtype(categories):
+    """
+    Return the integer dtype pandas uses for the codes of a categorical with
+    this many categories, so wrapping stored codes does not copy them.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if len(categories) < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+class FactBuffer:
+    """
+    The fact columns as NumPy arrays with spare rows at the end.
+
+    An append writes only the new rows into the spare rows, growing the
+    capacity by a quarter when it runs out, so on average its cost grows with
+    the batch rather than with the table. `frame()` wraps the filled rows in a DataFrame without
+    copying them. Rows that were handed out in a frame are never written
+    again, so earlier frames stay valid snapshots.
+    """
+
+    def __init__(self, fact):
+        ship_modes = fact["Ship.Mode"].astype("category")
+        self.ship_modes = ship_modes.cat.categories
+        self.rows = len(fact)
+        self.columns = {
+            column: np.array(fact[column].to_numpy())
+            for column in FACT_COLUMNS
+            if column != "Ship.Mode"
+        }
+        self.columns["Ship.Mode"] = ship_modes.cat.codes.to_numpy().astype(
+            categorical_codes_dtype(self.ship_modes)
+        )
+
+    @property
+    def capacity(self):
+        return len(self.columns["Order.ID"])
+
+    def nbytes(self):
+        """
+        Return the bytes held by the columns, spare rows included.
+        """
+        columns = sum(values.nbytes for values in self.columns.values())
+        return columns + self.ship_modes.memory_usage(deep=True)
+
+    def frame(self):
+        """
+        Return the filled rows as a fact DataFrame sharing the buffer memory.
+        """
+        data = {column: self.columns[column][: self.rows] for column in FACT_COLUMNS}
+        data["Ship.Mode"] = pd.Categorical.from_codes(
+            data["Ship.Mode"], self.ship_modes
+        )
+        return pd.DataFrame(data, copy=False)
+
+    def append(self, delta):
+        """
+        Write fact rows after the filled rows.
+
+        Parameters:
+            delta (pd.DataFrame): New rows in the fact layout.
+        """
+        start, end = self.rows, self.rows + len(delta)
+        ship_modes = delta["Ship.Mode"].astype(object)
+        new_modes = pd.Index(ship_modes.dropna().unique()).difference(self.ship_modes)
+        if len(new_modes):
+            # New modes go after the known ones, so stored codes stay valid.
+            self.ship_modes = self.ship_modes.append(new_modes)
+        if end > self.capacity:
+            self._grow(max(self.capacity + self.capacity // 4, end))
+        codes = self.columns["Ship.Mode"]
+        if codes.dtype != categorical_codes_dtype(self.ship_modes):
+            codes = codes.astype(categorical_codes_dtype(self.ship_modes))
+            self.columns["Ship.Mode"] = codes
+        for column, values in self.columns.items():
+            if column != "Ship.Mode":
+                values[start:end] = delta[column].to_numpy()
+        codes[start:end] = self.ship_modes.get_indexer(ship_modes)
+        self.rows = end
+
+    def _grow(self, capacity):
+        for column, values in self.columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[: self.rows] = values[: self.rows]
+            self.columns[column] = grown
+
+
+class ReadWriteLock:
+    """
+    Lock shared by any number of readers or held by one writer.
+
+    A waiting writer keeps new readers out, so a steady stream of readers
+    cannot starve it; a thread that already reads may read again.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waiting_writers = 0
+        self._local = threading.local()
+
+    @contextmanager
+    def reading(self):
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0:
+            with self._condition:
+                while self._writing or self._waiting_writers:
+                    self._condition.wait()
+                self._readers += 1
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                with self._condition:
+                    self._readers -= 1
+                    if not self._readers:
+                        self._condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._waiting_writers += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._waiting_writers -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class StarSchema:
+    """
+    In-memory star schema: a narrow fact table with int32 surrogate keys into
+    the `customers` and `products` dimension tables.
+
+    Dimension rows are addressed by position, so `Customer.Code` and
+    `Product.Code` in the fact table index straight into the dimension arrays.
+    Group-bys run on integer codes and labels are decoded only on the
+    aggregated result.
+
+    The fact rows live in a `FactBuffer`. Appends publish a new `fact` frame
+    over the grown buffer together with the new `version` as one `snapshot`,
+    so a rerun that already holds a frame keeps a consistent view. Writers
+    never change published state in place: appends update copies of the
+    aggregates and rebind `aggregates`, and dimension appends rebind the
+    dimension tables. `pinned()` therefore only holds the read side of `lock`
+    while it copies those references, and anything that reads aggregates
+    together with the fact table (a rerun, an API request) computes on the
+    pinned copy without blocking appends.
+    """
+
+    # Identifies a schema (and its pinned copies) in computation cache keys.
+    _cache_tokens = itertools.count()
+
+    def __init__(self, fact, customers, products):
+        self.cache_token = next(self._cache_tokens)
+        self.customers = customers
+        self.products = products
+        self.aggregates = {}
+        self.ingestor = None
+        self.lock = ReadWriteLock()
+        self._attribute_codes = {}
+        self._buffer = None
+        self.snapshot = (0, None)
+        if fact is not None:
+            self.fact = fact
+
+    @property
+    def fact(self):
+        return self.snapshot[1]
+
+    @fact.setter
+    def fact(self, fact):
+        self._buffer = FactBuffer(fact)
+        self.snapshot = (self.version, self._buffer.frame())
+
+    @property
+    def version(self):
+        return self.snapshot[0]
+
+    def fact_nbytes(self):
+        """
+        Return the bytes held by the fact rows, including the spare rows the
+        buffer has allocated for appends.
+
+        Returns:
+            int: Size in bytes.
+        """
+        return int(self._buffer.nbytes())
+
+    def pinned(self):
+        """
+        Return a read-only copy of the schema fixed at the current version.
+
+        The copy shares all data with the schema but keeps the fact rows,
+        dimensions and aggregates it was taken with, so it can be read for as
+        long as needed while rows are appended to the schema.
+
+        Returns:
+            StarSchema: The pinned copy.
+        """
+        with self.lock.reading():
+            return copy.copy(self)
+
+    def register_aggregate(self, name, aggregate):
+        """
+        Build an aggregate and keep it updated on every append.
+
+        Parameters:
+            name (str): Registry key, e.g. "daily_sales".
+            aggregate: Object with `build(schema)`, `apply(schema, delta)` and
+                `nbytes()`.
+
+        Returns:
+            The registered aggregate.
+        """
+        with self.lock.writing():
+            aggregate.build(self)
+            self.aggregates = {**self.aggregates, name: aggregate}
+        return aggregate
+
+    def append_dimension(self, attribute, rows):
+        """
+        Append rows to the dimension table holding `attribute`.
+
+        Existing codes stay valid because new rows are added at the end.
+
+        Parameters:
+            attribute (str): Any attribute of the target dimension.
+            rows (pd.DataFrame): New dimension rows.
+        """
+        if rows.empty:
+            return
+        with self.lock.writing():
+            dimension, code_column = self.dimension_for(attribute)
+            dimension = pd.concat([dimension, rows], ignore_index=True)
+            if code_column == "Customer.Code":
+                self.customers = dimension
+            else:
+                self.products = dimension
+            self._attribute_codes = {}
+
+    def append(self, delta):
+        """
+        Append fact rows and apply them to every registered aggregate.
+
+        Each aggregate is updated on a shallow copy, so pinned copies of the
+        schema keep reading the previous one.
+
+        Parameters:
+            delta (pd.DataFrame): New rows in the fact layout.
+        """
+        if delta.empty:
+            return
+        with self.lock.writing():
+            start = self._buffer.rows
+            self._buffer.append(delta[FACT_COLUMNS])
+            fact = self._buffer.frame()
+            delta = fact.iloc[start:]
+            aggregates = {}
+            for name, aggregate in self.aggregates.items():
+                aggregates[name] = copy.copy(aggregate)
+                aggregates[name].apply(self, delta)
+            self.aggregates = aggregates
+            self.snapshot = (self.version + 1, fact)
+
+    def dimension_for(self, attribute):
+        """
+        Return the dimension table and fact code column holding an attribute.
+
+        Parameters:
+            attribute (str): A customer or product attribute, e.g. "Country".
+
+        Returns:
+            tuple: (dimension DataFrame, fact code column name).
+        """
+        if attribute in CUSTOMER_ATTRIBUTES:
+            return self.customers, "Customer.Code"
+        if attribute in PRODUCT_ATTRIBUTES:
+            return self.products, "Product.Code"
+        raise KeyError(f"Unknown dimension attribute: {attribute}")
+
+    def is_attribute(self, column):
+        return column in CUSTOMER_ATTRIBUTES or column in PRODUCT_ATTRIBUTES
+
+    def has_column(self, fact, column):
+        return column in fact.columns or self.is_attribute(column)
+
+    def present_labels(self, fact, attribute):
+        """
+        Return the distinct labels of an attribute that occur in `fact`, in
+        order of first appearance.
+
+        Parameters:
+            fact (pd.DataFrame): Fact rows to inspect.
+            attribute (str): A customer or product attribute.
+
+        Returns:
+            np.ndarray: Distinct attribute labels.
+        """
+        dimension, code_column = self.dimension_for(attribute)
+        codes = fact[code_column].unique()
+        return pd.unique(dimension[attribute].to_numpy()[codes])
+
+    def attribute_codes(self, attribute):
+        """
+        Factorize a dimension attribute once and cache the result.
+
+        Codes are assigned in sorted label order, so grouping on codes yields
+        the same ordering as grouping on the labels themselves.
+
+        Parameters:
+            attribute (str): A customer or product attribute.
+
+        Returns:
+            tuple: (int32 codes per dimension row, pd.Index of labels).
+        """
+        if attribute not in self._attribute_codes:
+            dimension, _ = self.dimension_for(attribute)
+            codes, labels = pd.factorize(dimension[attribute], sort=True)
+            self._attribute_codes[attribute] = (codes.astype(np.int32), labels)
+        return self._attribute_codes[attribute]
+
+    def row_codes(self, fact, attribute):
+        """
+        Return the attribute code of every fact row as a named Series.
+
+        Parameters:
+            fact (pd.DataFrame): Fact rows (the full fact table or a subset).
+            attribute (str): A customer or product attribute.
+
+        Returns:
+            pd.Series: int32 attribute codes aligned to `fact`.
+        """
+        _, code_column = self.dimension_for(attribute)
+        codes, _ = self.attribute_codes(attribute)
+        return pd.Series(
+            codes[fact[code_column].to_numpy()], index=fact.index, name=attribute
+        )
+
+    def labels(self, attribute):
+        return self.attribute_codes(attribute)[1]
+
+    def mask(self, fact, attribute, values):
+        """
+        Build a boolean row mask for `attribute in values` without touching
+        any per-row strings.
+
+        Parameters:
+            fact (pd.DataFrame): Fact rows to test.
+            attribute (str): A customer or product attribute.
+            values (list): Accepted attribute labels.
+
+        Returns:
+            np.ndarray: Boolean mask aligned to `fact`.
+        """
+        dimension, code_column = self.dimension_for(attribute)
+        selected = dimension[attribute].isin(values).to_numpy()
+        return selected[fact[code_column].to_numpy()]
+
+    def filter(
+        self,
+        countries=None,
+        categories=None,
+        start_date=None,
+        end_date=None,
+        fact=None,
+    ):
+        """
+        Select fact rows matching the dashboard filters.
+
+        Parameters:
+            countries (list, optional): Accepted countries; empty means all.
+            categories (list, optional): Accepted categories; empty means all.
+            start_date (date, optional): Inclusive lower bound on "Order.Date".
+            end_date (date, optional): Inclusive upper bound on "Order.Date".
+            fact (pd.DataFrame, optional): Fact snapshot to filter instead of
+                the current fact table.
+
+        Returns:
+            pd.DataFrame: The matching slice of the fact table.
+        """
+        fact = self.fact if fact is None else fact
+        mask = np.ones(len(fact), dtype=bool)
+        if start_date is not None:
+            mask &= (fact["Order.Date"] >= pd.Timestamp(start_date)).to_numpy()
+        if end_date is not None:
+            mask &= (fact["Order.Date"] <= pd.Timestamp(end_date)).to_numpy()
+        if countries:
+            mask &= self.mask(fact, "Country", countries)
+        if categories:
+            mask &= self.mask(fact, "Category", categories)
+        if mask.all():
+            # Nothing filtered out: hand back a lazy copy instead of a full one.
+            return fact.copy(deep=False)
+        return fact.loc[mask]
+
+    def keys(self, fact, group_by):
+        """
+        Translate group-by column names into grouping keys.
+
+        Dimension attributes become int32 code Series; fact columns are passed
+        through unchanged.
+
+        Parameters:
+            fact (pd.DataFrame): Fact rows to group.
+            group_by (str or list): Column(s) to group by.
+
+        Returns:
+            list: Grouping keys usable with `DataFrame.groupby`.
+        """
+        group_by = [group_by] if isinstance(group_by, str) else list(group_by)
+        return [
+            self.row_codes(fact, column) if self.is_attribute(column) else column
+            for column in group_by
+        ]
+
+    def decode(self, frame, columns):
+        """
+        Replace attribute code columns of an aggregated frame with labels.
+
+        Parameters:
+            frame (pd.DataFrame): Aggregated frame with code columns.
+            columns (str or list): Columns that may hold attribute codes.
+
+        Returns:
+            pd.DataFrame: The frame with labels in place of codes.
+        """
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        for column in columns:
+            if self.is_attribute(column) and column in frame.columns:
+                codes = frame[column].to_numpy()
+                if (codes < 0).any():
+                    frame = frame.loc[codes >= 0]
+                    codes = codes[codes >= 0]
+                frame = frame.assign(**{column: self.labels(column).take(codes)})
+        return frame
+
+    def aggregate(self, fact, group_by, value_column, agg_func="sum"):
+        """
+        Aggregate a fact column grouped by fact columns or dimension attributes.
+
+        Parameters:
+            fact (pd.DataFrame): Fact rows to aggregate.
+            group_by (str or list): Column(s) to group by.
+            value_column (str): Fact column to aggregate.
+            agg_func (str): Aggregation function (default is "sum").
+
+        Returns:
+            pd.DataFrame: Aggregated values with labelled group columns.
+        """
+        aggregated = (
+            fact.groupby(self.keys(fact, group_by))[value_column]
+            .agg(agg_func)
+            .reset_index()
+        )
+        return self.decode(aggregated, group_by)
+
+    def join_labels(self, fact, columns):
+        """
+        Join dimension labels onto a (small) set of fact rows for display.
+
+        Parameters:
+            fact (pd.DataFrame): Fact rows to label.
+            columns (list): Dimension attributes to add.
+
+        Returns:
+            pd.DataFrame: A new frame with the requested label columns.
+        """
+        labels = {}
+        for column in columns:
+            dimension, code_column = self.dimension_for(column)
+            labels[column] = dimension[column].to_numpy()[fact[code_column].to_numpy()]
+        return fact.assign(**labels)
+
+    def materialize(self, fact):
+        """
+        Rebuild the wide `merged_data` layout for the given fact rows.
+
+        Parameters:
+            fact (pd.DataFrame): Fact rows to widen.
+
+        Returns:
+            pd.DataFrame: Rows in the original merged column layout.
+        """
+        wide = self.join_labels(fact, CUSTOMER_ATTRIBUTES + PRODUCT_ATTRIBUTES)
+        return wide[MERGED_COLUMNS]
+
+
+def load_star_schema(data_dir="data"):
+    """
+    Build the star schema from the CSV files in `data_dir`.
+
+    The dimension tables come from `customers.csv` and `products.csv`; the fact
+    rows come from `merged_data.csv`, whose label columns are resolved to
+    surrogate keys and then dropped.
+
+    Parameters:
+        data_dir (str or Path): Directory containing the CSV files.
+
+    Returns:
+        StarSchema: The loaded schema.
+    """
+    data_dir = Path(data_dir)
+    customers = pd.read_csv(data_dir / "customers.csv")
+    products = pd.read_csv(data_dir / "products.csv")
+    merged = pd.read_csv(
+        data_dir / "merged_data.csv",
+        usecols=["Order.ID", "Order.Date", *MONEY_COLUMNS, "Ship.Mode"]
+        + ["Customer.ID"]
+        + PRODUCT_ATTRIBUTES,
+    )
+
+    customer_codes = pd.Index(customers["Customer.ID"]).get_indexer(
+        merged["Customer.ID"]
+    )
+    product_codes = pd.MultiIndex.from_frame(products[PRODUCT_ATTRIBUTES]).get_indexer(
+        pd.MultiIndex.from_frame(merged[PRODUCT_ATTRIBUTES])
+    )
+    if (customer_codes < 0).any() or (product_codes < 0).any():
+        raise ValueError(
+            "merged_data.csv references customers or products missing from the dimension files."
+        )
+
+    fact = pd.DataFrame(
+        {
+            "Order.ID": merged["Order.ID"].to_numpy(),
+            "Customer.Code": customer_codes.astype(np.int32),
+            "Product.Code": product_codes.astype(np.int32),
+            "Order.Date": pd.to_datetime(merged["Order.Date"]),
+            **{column: merged[column].to_numpy() for column in MONEY_COLUMNS},
+            "Ship.Mode": merged["Ship.Mode"].astype("category"),
+        }
+    )
+    return StarSchema(fact, customers, products)
@@ -0,0 +1,60 @@
+import json
+import threading
+from collections import Counter
+from pathlib import Path
+
+from app import config
+
+
+class FilterUsage:
+    """
+    Counts how often each country and category is selected in the filters,
+    persisted to a small JSON file so the ranking survives restarts.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.countries = Counter()
+        self.categories = Counter()
+        self._lock = threading.Lock()
+        if self.path.exists():
+            try:
+                saved = json.loads(self.path.read_text())
+                self.countries.update(saved.get("countries", {}))
+                self.categories.update(saved.get("categories", {}))
+            except (OSError, ValueError):
+                pass
+
+    def record(self, countries, categories):
+        """
+        Count one filter selection and save the totals.
+
+        Parameters:
+            countries (list): Selected countries.
+            categories (list): Selected categories.
+        """
+        if not countries and not categories:
+            return
+        with self._lock:
+            self.countries.update(countries)
+            self.categories.update(categories)
+            saved = {
+                "countries": dict(self.countries),
+                "categories": dict(self.categories),
+            }
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.path.write_text(json.dumps(saved, indent=2))
+            except OSError:
+                pass
+
+    def top(self, attribute, n):
+        """
+        Return the `n` most selected values of "Country" or "Category".
+        """
+        counts = self.countries if attribute == "Country" else self.categories
+        with self._lock:
+            return [value for value, _ in counts.most_common(n)]
+
+
+filter_usage = FilterUsage(config.USAGE_FILE)
@@ -0,0 +1,164 @@
+import pandas as pd
+
+from app.utils.cache import computation_cache
+from app.utils.metrics import count_rows, stage_metrics
+
+
+class FilteredView:
+    """
+    The dashboard filters applied to a snapshot of the star schema.
+
+    Tabs ask the view for named outputs and figures; both are cached
+    process-wide (or in `cache` when given) under the schema's cache token,
+    the view's filter key and the data version, so identical filter
+    selections from different sessions (or the cache warmer) share results. The filtered rows themselves are not cached.
+
+    The filtered fact frame and cached outputs are read-only. Derived columns
+    come from `feature()`, which computes each one once per view (the
+    dashboard builds one view per rerun).
+    """
+
+    def __init__(
+        self, schema, countries=None, categories=None, date_range=None, cache=None
+    ):
+        # Outputs read the fact rows and aggregates of one version however
+        # long they take, without holding up appends.
+        self.schema = schema.pinned()
+        self.cache = computation_cache if cache is None else cache
+        self.countries = sorted(countries or [])
+        self.categories = sorted(categories or [])
+        self.date_range = (
+            (pd.Timestamp(date_range[0]), pd.Timestamp(date_range[1]))
+            if date_range
+            else None
+        )
+        self.version, self._snapshot = self.schema.snapshot
+        orders = self.schema.aggregates.get("orders")
+        self._order_snapshot = orders.table if orders is not None else None
+        self._fact = None
+        self._orders = None
+        self._features = {}
+
+    @property
+    def key(self):
+        dates = (
+            tuple(d.isoformat() for d in self.date_range) if self.date_range else None
+        )
+        return (tuple(self.countries), tuple(self.categories), dates)
+
+    @property
+    def fact(self):
+        """
+        The fact rows matching the filters, computed on first access.
+
+        The slice belongs to this view and is not cached: only derived outputs
+        and figures are shared, so cache memory does not grow with copies of
+        the fact table for every filter selection. Its lazy (copy-on-write)
+        copy of the snapshot cannot leak writes into the shared frame.
+        """
+        if self._fact is None:
+            start_date, end_date = self.date_range or (None, None)
+            self._fact = self.schema.filter(
+                self.countries,
+                self.categories,
+                start_date,
+                end_date,
+                fact=self._snapshot,
+            )
+        return self._fact
+
+    @property
+    def orders(self):
+        """
+        The rows of the order-level fact table (see `OrderFacts`) matching the
+        filters, computed on first access like `fact`. Without a registered
+        "orders" aggregate they are summarized from the filtered fact rows.
+        """
+        if self._orders is None:
+            if self._order_snapshot is None:
+                from app.utils.materialized import OrderFacts
+
+                self._orders = OrderFacts()._summarize(
+                    self.schema, self.fact.assign(Lines=1)
+                )
+            else:
+                start_date, end_date = self.date_range or (None, None)
+                self._orders = self.schema.filter(
+                    self.countries,
+                    self.categories,
+                    start_date,
+                    end_date,
+                    fact=self._order_snapshot,
+                )
+        return self._orders
+
+    def feature(self, name):
+        """
+        Return a derived column aligned with `fact`, computing it once per view.
+
+        Parameters:
+            name (str): Feature name registered in `app.tabs.computations.FEATURES`.
+
+        Returns:
+            pd.Series: The derived column.
+        """
+        from app.tabs.computations import FEATURES
+
+        if name not in self._features:
+            self._features[name] = FEATURES[name](self)
+        return self._features[name]
+
+    def output(self, name, **params):
+        """
+        Return a named tab output for this view, computing it on a cache miss.
+
+        Parameters:
+            name (str): Output name registered in `app.tabs.computations.OUTPUTS`.
+            **params: Output parameters, e.g. `value_column="Profit"`.
+
+        Returns:
+            The computed output (usually a DataFrame).
+        """
+        from app.tabs.computations import OUTPUTS
+
+        value = self._cached(
+            f"output:{name}", params, lambda: OUTPUTS[name](self, **params)
+        )
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return value.copy(deep=False)
+        return value
+
+    def figure(self, name, **params):
+        """
+        Return a named figure for this view, building it on a cache miss.
+
+        Parameters:
+            name (str): Figure name registered in `app.tabs.figures.FIGURES`.
+            **params: Figure parameters passed to the builder.
+
+        Returns:
+            plotly.graph_objects.Figure: The figure.
+        """
+        from app.tabs.figures import FIGURES
+
+        return self._cached(
+            f"figure:{name}", params, lambda: FIGURES[name](self, **params)
+        )
+
+    def _cached(self, stage, params, compute):
+        computed = []
+
+        def compute_and_flag():
+            computed.append(True)
+            return compute()
+
+        with stage_metrics.stage(stage) as record:
+            value = self.cache.get_or_compute(
+                (stage, self.key, tuple(sorted(params.items()))),
+                self.version,
+                compute_and_flag,
+                source=self.schema.cache_token,
+            )
+            record.cache = "miss" if computed else "hit"
+            record.rows_out = count_rows(value)
+        return value
@@ -1,9 +1,12 @@
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import networkx as nx
 import pandas as pd
 
+from app.utils.metrics import stage_metrics
 
+
+@stage_metrics.timed()
 def create_bar_chart(data, x, y, title, labels, text=None):
     """
     Create a bar chart using Plotly.
@@ -28,6 +31,7 @@ def create_bar_chart(data, x, y, title, labels, text=None):
     return fig
 
 
+@stage_metrics.timed()
 def create_line_chart(data, x, y, title, labels, color=None, line_width=3):
     """
     Create a line chart using Plotly.
@@ -35,7 +39,7 @@ def create_line_chart(data, x, y, title, labels, color=None, line_width=3):
     Parameters:
         data (pd.DataFrame): DataFrame containing data for the chart.
         x (str): Column name for the x-axis.
-        y (str): Column name for the y-axis.
+        y (str or list): Column name(s) for the y-axis, one line each.
         title (str): Chart title.
         labels (dict): Labels for the axes.
         color (str, optional): Column name for grouping by color.
@@ -64,6 +68,7 @@ def create_line_chart(data, x, y, title, labels, color=None, line_width=3):
     return fig
 
 
+@stage_metrics.timed()
 def create_regional_bar_chart(
     data, x, y, color=None, title=None, labels=None, barmode="group", text=None
 ):
@@ -100,6 +105,7 @@ def create_regional_bar_chart(
     return fig
 
 
+@stage_metrics.timed()
 def create_pie_chart(data, names, title):
     """
     Create a pie chart using Plotly.
@@ -117,6 +123,7 @@ def create_pie_chart(data, names, title):
     return fig
 
 
+@stage_metrics.timed()
 def create_scatter_plot(data, x, y, size, color, title, labels):
     """
     Create a scatter plot using Plotly.
@@ -147,7 +154,8 @@ def create_scatter_plot(data, x, y, size, color, title, labels):
     return fig
 
 
-def create_histogram(data, x, title, labels):
+@stage_metrics.timed()
+def create_histogram(data, x, title, labels, weights=None):
     """
     Create a histogram using Plotly.
 
@@ -156,15 +164,31 @@ def create_histogram(data, x, title, labels):
         x (str): Column name for the x-axis.
         title (str): Chart title.
         labels (dict): Labels for the axes.
+        weights (str, optional): Column counted per row instead of 1.
 
     Returns:
         plotly.graph_objects.Figure: The histogram.
     """
-    fig = px.histogram(data, x=x, title=title, labels=labels, template="plotly_white")
+    if weights is None:
+        fig = px.histogram(
+            data, x=x, title=title, labels=labels, template="plotly_white"
+        )
+    else:
+        fig = px.histogram(
+            data,
+            x=x,
+            y=weights,
+            histfunc="sum",
+            title=title,
+            labels=labels,
+            template="plotly_white",
+        )
+        fig.update_layout(yaxis_title=labels.get("count", weights))
     fig.update_layout(title={"x": 0.5})
     return fig
 
 
+@stage_metrics.timed()
 def create_bar_chart_grouped(data, x, y, title, labels, barmode="group", color=None):
     """
     Create a grouped bar chart using Plotly.
@@ -195,6 +219,7 @@ def create_bar_chart_grouped(data, x, y, title, labels, barmode="group", color=N
     return fig
 
 
+@stage_metrics.timed()
 def create_choropleth_map(
     data, locations, locationmode, color, title, labels, color_scale="Blues"
 ):
@@ -227,8 +252,43 @@ def create_choropleth_map(
     return fig
 
 
+@stage_metrics.timed()
+def create_category_choropleth(data, locations, color, title, labels):
+    """
+    Create a choropleth map colored by a categorical column using Plotly.
+
+    Parameters:
+        data (pd.DataFrame): DataFrame containing data for the map.
+        locations (str): Column with country names.
+        color (str): Categorical column used for the colors.
+        title (str): Map title.
+        labels (dict): Labels for the legend.
+
+    Returns:
+        plotly.graph_objects.Figure: The choropleth map.
+    """
+    fig = px.choropleth(
+        data,
+        locations=locations,
+        locationmode="country names",
+        color=color,
+        title=title,
+        labels=labels,
+        color_discrete_sequence=px.colors.qualitative.Plotly,
+        template="plotly_white",
+    )
+    fig.update_layout(title={"x": 0.5})
+    return fig
+
+
+@stage_metrics.timed()
 def create_forecast_plot(
-    historical_data, forecast_data, x_col="ds", y_col="y", forecast_col="yhat"
+    historical_data,
+    forecast_data,
+    x_col="ds",
+    y_col="y",
+    forecast_col="yhat",
+    title="Sales Forecast",
 ):
     """
     Create a line chart for forecast visualization with historical data.
@@ -239,6 +299,7 @@ def create_forecast_plot(
         x_col (str): Column for the x-axis (date).
         y_col (str): Column for historical sales data.
         forecast_col (str): Column for forecasted sales data.
+        title (str): Chart title.
 
     Returns:
         plotly.graph_objects.Figure: The forecast visualization.
@@ -247,7 +308,7 @@ def create_forecast_plot(
         forecast_data,
         x=x_col,
         y=forecast_col,
-        title="Sales Forecast",
+        title=title,
         labels={x_col: "Date", forecast_col: "Forecasted Sales"},
         template="plotly_white",
     )
@@ -265,6 +326,7 @@ def create_forecast_plot(
     return fig
 
 
+@stage_metrics.timed()
 def create_heatmap(data, x, y, values):
     """
     Create a heatmap using Plotly Express.
@@ -285,6 +347,7 @@ def create_heatmap(data, x, y, values):
     return fig
 
 
+@stage_metrics.timed()
 def create_treemap(data, path, values):
     """
     Create a treemap using Plotly Express.
@@ -305,61 +368,67 @@ def create_treemap(data, path, values):
     return fig
 
 
-def create_network_graph(data, source, target, title):
+@stage_metrics.timed()
+def create_network_graph(edges, positions, source, target, weight, title, names=None):
     """
-    Create a network graph using Plotly and NetworkX.
+    Create a network graph from precomputed node positions.
+
+    Edges and nodes are one WebGL trace each, built from NumPy arrays; edges
+    are drawn as a single line broken by NaN gaps.
 
     Parameters:
-        data (pd.DataFrame): The dataset.
-        source (str): Column for the source nodes (e.g., 'Customer.ID').
-        target (str): Column for the target nodes (e.g., 'Product.ID').
+        edges (pd.DataFrame): One row per edge.
+        positions (pd.DataFrame): "x" and "y" per node, indexed by node.
+        source (str): Edge column with the source nodes.
+        target (str): Edge column with the target nodes.
+        weight (str): Edge column with the edge weights; nodes are colored by
+            the total weight of their edges.
         title (str): Title of the network graph.
-    """
-    # Create a graph from the data
-    G = nx.from_pandas_edgelist(data, source=source, target=target)
-
-    # Get positions for the nodes
-    pos = nx.spring_layout(G)
-
-    # Create edges
-    edge_trace = []
-    for edge in G.edges():
-        x0, y0 = pos[edge[0]]
-        x1, y1 = pos[edge[1]]
-        edge_trace.append(
-            go.Scatter(
-                x=[x0, x1],
-                y=[y0, y1],
-                line=dict(width=0.5, color="#888"),
-                hoverinfo="none",
-                mode="lines",
-            )
-        )
+        names (pd.Series, optional): Hover text per node, indexed by node.
 
-    # Create nodes
-    node_trace = go.Scatter(
-        x=[],
-        y=[],
-        text=[],
-        mode="markers+text",
+    Returns:
+        plotly.graph_objects.Figure: The network graph.
+    """
+    nodes = pd.Index(
+        pd.unique(np.concatenate([edges[source].to_numpy(), edges[target].to_numpy()]))
+    )
+    xy = positions.reindex(nodes)[["x", "y"]].to_numpy()
+    sources = nodes.get_indexer(edges[source])
+    targets = nodes.get_indexer(edges[target])
+    gaps = np.full(len(edges), np.nan)
+    edge_x = np.column_stack([xy[sources, 0], xy[targets, 0], gaps]).ravel()
+    edge_y = np.column_stack([xy[sources, 1], xy[targets, 1], gaps]).ravel()
+    weights = edges[weight].to_numpy(dtype=np.float64)
+    strength = np.bincount(sources, weights, len(nodes)) + np.bincount(
+        targets, weights, len(nodes)
+    )
+    text = nodes.astype(str) if names is None else names.reindex(nodes).fillna("")
+    hover = [f"{label}<br>{value:,.0f}" for label, value in zip(text, strength)]
+
+    edge_trace = go.Scattergl(
+        x=edge_x,
+        y=edge_y,
+        line=dict(width=0.5, color="#888"),
+        hoverinfo="none",
+        mode="lines",
+    )
+    node_trace = go.Scattergl(
+        x=xy[:, 0],
+        y=xy[:, 1],
+        text=hover,
+        mode="markers",
         hoverinfo="text",
         marker=dict(
             showscale=True,
             colorscale="YlGnBu",
-            size=10,
-            colorbar=dict(thickness=15, title="Node Connections"),
+            color=strength,
+            size=8,
+            colorbar=dict(thickness=15, title=weight),
         ),
     )
 
-    for node in G.nodes():
-        x, y = pos[node]
-        node_trace["x"] += (x,)
-        node_trace["y"] += (y,)
-        node_trace["text"] += (node,)
-
-    # Create the figure
     fig = go.Figure(
-        data=edge_trace + [node_trace],
+        data=[edge_trace, node_trace],
         layout=go.Layout(
             title=title,
             showlegend=False,
@@ -367,6 +436,8 @@ def create_network_graph(data, source, target, title):
             margin=dict(b=20, l=5, r=5, t=40),
             xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
             yaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
+            template="plotly_white",
         ),
     )
+    fig.update_layout(title={"x": 0.5})
     return fig
@@ -0,0 +1,199 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app import config
+from app.utils.cache import computation_cache
+from app.utils.usage import filter_usage
+from app.utils.view import FilteredView
+
+# Figures rendered by the tabs with their default settings; building a figure
+# computes (and caches) the outputs behind it.
+WARM_FIGURES = [
+    ("sales_over_time_chart", {}),
+    ("moving_average_chart", {}),
+    ("category_sales_chart", {}),
+    ("country_sales_chart", {}),
+    ("country_sales_map", {}),
+    ("top_products_chart", {"value_column": "Sales"}),
+    ("top_products_chart", {"value_column": "Profit"}),
+    ("category_treemap_chart", {}),
+    ("most_sold_category_map", {}),
+    ("seasonal_sales_chart", {}),
+    ("co_purchase_chart", {"min_orders": 1}),
+    ("top_customers_chart", {}),
+    ("customer_clv_chart", {}),
+    ("rfm_scatter", {}),
+    ("segment_pie", {}),
+    ("sales_heatmap_chart", {}),
+    ("region_sales_chart", {}),
+    ("shipping_costs_chart", {}),
+    ("region_profit_chart", {}),
+    ("region_seasonality_chart", {}),
+    ("anomaly_chart", {}),
+    ("order_frequency_histogram", {}),
+    ("order_value_histogram", {}),
+    # One trace per product: by far the slowest figure, so it goes last.
+    ("regional_preferences_chart", {}),
+]
+WARM_OUTPUTS = [
+    ("sales_kpis", {}),
+    ("trailing_sales", {}),
+    ("sales_anomalies", {}),
+    ("basket_rules", {"level": "Product", "min_support": 0.0001}),
+]
+WARM_FORECAST = ("sales_forecast_chart", {"periods": 30, "granularity": "Daily"})
+
+
+class CacheWarmer:
+    """
+    Precomputes the dashboard for the most likely filter selections so the
+    first sessions after a start hit a warm `computation_cache`.
+
+    Views are warmed on a small thread pool, most important first: the
+    default (unfiltered) view, then single-country and single-category views
+    ranked by recorded filter usage, falling back to sales when nothing has
+    been recorded yet. Warming stops once the cache holds `memory_budget`
+    bytes.
+    """
+
+    def __init__(
+        self, schema, top_n=5, threads=2, memory_budget=256 * 2**20, forecast=True
+    ):
+        self.schema = schema
+        self.top_n = top_n
+        self.threads = threads
+        self.memory_budget = memory_budget
+        self.forecast = forecast
+        self.report = {
+            "status": "pending",
+            "views": 0,
+            "outputs": 0,
+            "figures": 0,
+            "errors": 0,
+            "seconds": 0.0,
+            "cache_mb": 0.0,
+            "stopped_by": None,
+        }
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def plan(self):
+        """
+        Return the views to warm, in priority order.
+
+        Returns:
+            list: (label, FilteredView) pairs.
+        """
+        dates = self.schema.fact["Order.Date"]
+        date_range = (dates.min().normalize(), dates.max().normalize())
+        views = [("default", FilteredView(self.schema, date_range=date_range))]
+        for attribute in ["Country", "Category"]:
+            for value in self._top_values(attribute):
+                filters = {"countries": [value]}
+                if attribute == "Category":
+                    filters = {"categories": [value]}
+                views.append(
+                    (value, FilteredView(self.schema, date_range=date_range, **filters))
+                )
+        return views
+
+    def _top_values(self, attribute):
+        values = filter_usage.top(attribute, self.top_n)
+        if values:
+            return values
+        sales = self.schema.aggregates["daily_sales"].select({}).reset_index()
+        totals = sales.groupby(attribute, observed=True)["Sales"].sum()
+        return list(totals.nlargest(self.top_n).index)
+
+    def _over_budget(self):
+        if computation_cache.size_bytes() >= self.memory_budget:
+            self._stop.set()
+            self.report["stopped_by"] = "memory budget"
+        return self._stop.is_set()
+
+    def _warm_view(self, view, forecast):
+        items = [("output", name, params) for name, params in WARM_OUTPUTS]
+        items += [("figure", name, params) for name, params in WARM_FIGURES]
+        if forecast:
+            items.append(("figure",) + WARM_FORECAST)
+
+        for kind, name, params in items:
+            if self._over_budget():
+                return
+            try:
+                if view.version != self.schema.version:
+                    # Rows were appended since the plan; results of this view
+                    # would be dropped from the cache anyway.
+                    return
+                if kind == "output":
+                    view.output(name, **params)
+                else:
+                    view.figure(name, **params)
+            except Exception:
+                with self._lock:
+                    self.report["errors"] += 1
+                continue
+            with self._lock:
+                self.report[f"{kind}s"] += 1
+        with self._lock:
+            self.report["views"] += 1
+
+    def run(self):
+        """
+        Warm the planned views and fill in `report`.
+        """
+        started = time.perf_counter()
+        self.report["status"] = "running"
+        plan = self.plan()
+        self.report["planned_views"] = [label for label, _ in plan]
+
+        with ThreadPoolExecutor(
+            self.threads, thread_name_prefix="cache-warmer"
+        ) as pool:
+            for position, (_, view) in enumerate(plan):
+                # Forecasts are by far the slowest item; only the default view
+                # gets one.
+                pool.submit(self._warm_view, view, self.forecast and not position)
+
+        self.report["seconds"] = round(time.perf_counter() - started, 2)
+        self.report["cache_mb"] = round(computation_cache.size_bytes() / 2**20, 1)
+        self.report["status"] = "stopped" if self._stop.is_set() else "done"
+        return self.report
+
+    def start(self):
+        threading.Thread(target=self.run, name="cache-warmer", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.report["stopped_by"] = self.report["stopped_by"] or "stop requested"
+
+
+_warmer = None
+_warmer_lock = threading.Lock()
+
+
+def start_cache_warmer(schema):
+    """
+    Start warming the computation cache in the background, once per process.
+
+    Parameters:
+        schema (StarSchema): The shared star schema.
+
+    Returns:
+        CacheWarmer: The running (or finished) warmer.
+    """
+    global _warmer
+    with _warmer_lock:
+        if _warmer is None:
+            _warmer = CacheWarmer(
+                schema,
+                top_n=config.WARM_TOP_N,
+                threads=config.WARM_THREADS,
+                # Warming past the cache budget would only evict warmed entries.
+                memory_budget=min(config.WARM_MEMORY_MB, config.CACHE_MEMORY_MB)
+                * 2**20,
+                forecast=config.WARM_FORECAST,
+            ).start()
+    return _warmer
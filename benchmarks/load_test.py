@@ -0,0 +1,534 @@
+"""
+Concurrent-session load test: simulated analysts drive a local dashboard
+server over Streamlit's websocket protocol, the same way browsers do.
+
+Each session connects, loads the page, logs in through the login form and
+then performs a fixed number of actions separated by think times: filtering
+by country, category or date, using the widgets inside the tabs and asking
+the chatbot. Tabs themselves switch in the browser without a rerun, so a tab
+visit is modelled by the rerun its widgets trigger.
+
+For every number of sessions the harness starts a fresh server, warms it with
+one page load, runs the sessions and reports rerun latency (p50/p95/p99),
+throughput, server memory per session and the server's own stage timings.
+Workloads are generated from `--seed`, so two runs with the same arguments
+replay the same clicks and think times.
+
+    PYTHONPATH=. python -m benchmarks.load_test --sessions 1 5 10 20
+    PYTHONPATH=. python -m benchmarks.load_test --sessions 10 --think 0.5 --actions 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.request import urlopen
+
+import numpy as np
+import pandas as pd
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+from app.utils.memory import process_rss
+from app.utils.metrics import QUANTILES
+from benchmarks.suite import QUESTIONS
+
+WIDGET_TYPES = {
+    "button",
+    "date_input",
+    "multiselect",
+    "radio",
+    "selectbox",
+    "slider",
+    "text_input",
+}
+
+# Relative frequency of each kind of action.
+ACTIONS = {
+    "country": 0.3,
+    "category": 0.15,
+    "dates": 0.1,
+    "tab": 0.3,
+    "chat": 0.15,
+}
+
+# Widgets inside the tabs; each takes the possible values of one visit.
+TAB_WIDGETS = {
+    "Select Analysis Type": "selectbox",
+    "Select a Product": "selectbox",
+    "Select Granularity for Forecast": "radio",
+    "Select Forecast Period (days)": "slider",
+}
+FORECAST_PERIODS = [7, 14, 30, 60, 90]
+YEARS = [2020, 2021, 2022, 2023]
+
+
+class StreamlitClient:
+    """
+    A minimal Streamlit browser: sends reruns with widget states and reads the
+    resulting elements.
+
+    Only the widgets of the latest run are kept, keyed by label, as widget IDs
+    change when a widget's options or defaults do.
+    """
+
+    def __init__(self, connection, timeout):
+        self.connection = connection
+        self.timeout = timeout
+        self.widgets = {}
+        self.states = {}
+
+    @classmethod
+    async def connect(cls, url, timeout=300.0):
+        connection = await websocket_connect(
+            url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream",
+            subprotocols=["streamlit"],
+            max_message_size=1 << 30,
+        )
+        return cls(connection, timeout)
+
+    def close(self):
+        self.connection.close()
+
+    def options(self, label):
+        """
+        Return the options of a selection widget of the latest run.
+        """
+        return list(self.widgets[label][1].options)
+
+    def widget_state(self, label, **value):
+        state = WidgetState(id=self.widgets[label][1].id)
+        for field, data in value.items():
+            if field.endswith("_array_value"):
+                getattr(state, field).data.extend(data)
+            else:
+                setattr(state, field, data)
+        return state
+
+    async def set(self, label, **value):
+        """
+        Change a widget and rerun, e.g. `set("Select Country", int_array_value=[3])`.
+        """
+        state = self.widget_state(label, **value)
+        self.states[state.id] = state
+        return await self.rerun()
+
+    async def click(self, label):
+        return await self.rerun(self.widget_state(label, trigger_value=True))
+
+    async def rerun(self, *triggers):
+        """
+        Run the script and wait for the final run to finish (a script that
+        calls `st.rerun()` runs again before it finishes).
+
+        Returns:
+            int: Exceptions shown by the final run.
+        """
+        message = BackMsg()
+        message.rerun_script.widget_states.widgets.extend(
+            [*self.states.values(), *triggers]
+        )
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+
+        widgets, exceptions = {}, 0
+        while True:
+            payload = await asyncio.wait_for(
+                self.connection.read_message(), self.timeout
+            )
+            if payload is None:
+                raise ConnectionError("The server closed the connection.")
+            forward = ForwardMsg()
+            forward.ParseFromString(payload)
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                widgets, exceptions = {}, 0
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in WIDGET_TYPES:
+                    widget = getattr(element, element_type)
+                    widgets[widget.label] = (element_type, widget)
+                elif element_type == "exception":
+                    exceptions += 1
+            elif (
+                kind == "script_finished"
+                and forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN
+            ):
+                break
+
+        self.widgets = widgets
+        ids = {widget.id for _, widget in widgets.values()}
+        self.states = {id: state for id, state in self.states.items() if id in ids}
+        return exceptions
+
+
+class AnalystSession:
+    """
+    One simulated analyst with a reproducible plan of actions and think times.
+    """
+
+    def __init__(self, index, seed, actions, think, credentials):
+        self.index = index
+        self.rng = np.random.default_rng([seed, index])
+        self.actions = list(
+            self.rng.choice(list(ACTIONS), size=actions, p=list(ACTIONS.values()))
+        )
+        self.think_times = list(self.rng.exponential(think, size=actions))
+        self.seed = seed
+        self.credentials = credentials
+        self.records = []
+        self.error = None
+
+    def popular_choice(self, options, count=1):
+        """
+        Pick `count` distinct option indices, Zipf-like over a shuffle of the
+        options that every session shares, so popular filters are shared
+        between sessions as they are between real analysts.
+        """
+        ranking = np.random.default_rng([self.seed, len(options)]).permutation(
+            len(options)
+        )
+        weights = 1.0 / (ranking + 1)
+        chosen = self.rng.choice(
+            len(options),
+            size=min(count, len(options)),
+            replace=False,
+            p=weights / weights.sum(),
+        )
+        return [int(index) for index in chosen]
+
+    async def timed(self, action, rerun):
+        started = time.perf_counter()
+        exceptions = await rerun
+        finished = time.perf_counter()
+        self.records.append(
+            {
+                "session": self.index,
+                "action": action,
+                "started": started,
+                "seconds": finished - started,
+                "exceptions": exceptions,
+            }
+        )
+
+    async def run(self, url, timeout):
+        try:
+            client = await StreamlitClient.connect(url, timeout)
+        except Exception as error:
+            self.error = f"{type(error).__name__}: {error}"
+            return None
+        try:
+            await self.timed("load", client.rerun())
+            username, password = self.credentials
+            await client.set("Username", string_value=username)
+            await client.set("Password", string_value=password)
+            await self.timed("login", client.click("Login"))
+            for action, think in zip(self.actions, self.think_times):
+                await asyncio.sleep(think)
+                await self.timed(action, getattr(self, action)(client))
+        except Exception as error:
+            self.error = f"{type(error).__name__}: {error}"
+        return client
+
+    def country(self, client):
+        options = client.options("Select Country")
+        count = self.rng.choice([0, 1, 1, 1, 2])
+        return client.set(
+            "Select Country", int_array_value=self.popular_choice(options, count)
+        )
+
+    def category(self, client):
+        options = client.options("Select Product Category")
+        count = self.rng.choice([0, 1, 1])
+        return client.set(
+            "Select Product Category",
+            int_array_value=self.popular_choice(options, count),
+        )
+
+    def dates(self, client):
+        if self.rng.random() < 0.3:
+            first, last = YEARS[0], YEARS[-1]
+        else:
+            first = last = int(self.rng.choice(YEARS))
+        return client.set(
+            "Select Date Range",
+            string_array_value=[f"{first}/01/01", f"{last}/12/31"],
+        )
+
+    def tab(self, client):
+        labels = [label for label in TAB_WIDGETS if label in client.widgets]
+        if not labels:
+            return client.rerun()
+        label = str(self.rng.choice(labels))
+        if TAB_WIDGETS[label] == "slider":
+            value = float(self.rng.choice(FORECAST_PERIODS))
+            return client.set(label, double_array_value=[value])
+        index = self.popular_choice(client.options(label))[0]
+        return client.set(label, int_value=index)
+
+    async def chat(self, client):
+        # Typing the question reruns on its own before "Send" is clicked.
+        question = str(self.rng.choice(QUESTIONS))
+        await self.timed(
+            "chat_input", client.set("Enter your message here:", string_value=question)
+        )
+        return await client.click("Send")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port, log_file, environment):
+    """
+    Start the dashboard with `streamlit run` and wait until it is healthy.
+
+    Returns:
+        subprocess.Popen: The server process.
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "streamlit",
+            "run",
+            "dashboard.py",
+            "--server.headless=true",
+            f"--server.port={port}",
+            "--browser.gatherUsageStats=false",
+        ],
+        env={**os.environ, "PYTHONPATH": os.getcwd(), **environment},
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The dashboard server exited during startup.")
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("The dashboard server did not become healthy in time.")
+
+
+def latency_summary(seconds):
+    """
+    Return the count and p50/p95/p99 of latencies in milliseconds.
+    """
+    if not len(seconds):
+        return {"count": 0}
+    return {
+        "count": len(seconds),
+        **{
+            f"p{int(q * 100)}_ms": float(np.quantile(seconds, q) * 1000)
+            for q in QUANTILES
+        },
+    }
+
+
+def stage_summary(jsonl_file, top=15):
+    """
+    Summarize the stage timings the server logged during the run.
+
+    Returns:
+        list: The `top` stages by total time, with calls and p50/p95/p99.
+    """
+    path = Path(jsonl_file)
+    if not path.exists():
+        return []
+    stages = pd.read_json(path, lines=True)
+    grouped = stages.groupby("stage")["seconds"]
+    summary = pd.DataFrame(
+        {
+            "calls": grouped.size(),
+            "total_s": grouped.sum(),
+            **{f"p{int(q * 100)}_ms": grouped.quantile(q) * 1000 for q in QUANTILES},
+        }
+    )
+    summary = summary.sort_values("total_s", ascending=False).head(top)
+    return summary.reset_index().to_dict("records")
+
+
+async def sample_memory(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(process_rss(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), 1.0)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_sessions(url, sessions, args, pid=None):
+    """
+    Warm the server, then run `sessions` analysts concurrently.
+
+    Returns:
+        dict: Latency, throughput, memory and error figures of the run.
+    """
+    credentials = (args.username, args.password)
+    warmup = AnalystSession(sessions, args.seed, 0, 0, credentials)
+    client = await warmup.run(url, args.timeout)
+    if client is not None:
+        client.close()
+    if warmup.error:
+        raise RuntimeError(f"Warm-up session failed: {warmup.error}")
+    await asyncio.sleep(1)
+    baseline_rss = process_rss(pid) if pid else None
+
+    analysts = [
+        AnalystSession(index, args.seed, args.actions, args.think, credentials)
+        for index in range(sessions)
+    ]
+    stop = asyncio.Event()
+    memory = []
+    sampler = asyncio.create_task(sample_memory(pid, memory, stop)) if pid else None
+
+    async def start(analyst):
+        await asyncio.sleep(args.ramp * analyst.index / max(sessions, 1))
+        return await analyst.run(url, args.timeout)
+
+    started = time.perf_counter()
+    clients = await asyncio.gather(*[start(analyst) for analyst in analysts])
+    elapsed = time.perf_counter() - started
+    connected_rss = process_rss(pid) if pid else None
+    for client in clients:
+        if client is not None:
+            client.close()
+    if sampler:
+        stop.set()
+        await sampler
+
+    records = pd.DataFrame(
+        [record for analyst in analysts for record in analyst.records],
+        columns=["session", "action", "started", "seconds", "exceptions"],
+    )
+    reruns = records[~records["action"].isin(["load", "login"])]
+    result = {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "reruns": len(records),
+        "throughput_per_s": len(records) / elapsed if elapsed else 0.0,
+        "latency": latency_summary(records["seconds"]),
+        "action_latency": latency_summary(reruns["seconds"]),
+        "by_action": {
+            action: latency_summary(group["seconds"])
+            for action, group in records.groupby("action")
+        },
+        "exceptions": int(records["exceptions"].sum()),
+        "session_errors": [
+            {"session": analyst.index, "error": analyst.error}
+            for analyst in analysts
+            if analyst.error
+        ],
+    }
+    if pid:
+        result["memory"] = {
+            "baseline_mb": baseline_rss / 2**20,
+            "peak_mb": max(memory + [connected_rss]) / 2**20,
+            "connected_mb": connected_rss / 2**20,
+            "per_session_mb": (connected_rss - baseline_rss) / 2**20 / sessions,
+        }
+    return result
+
+
+def run_level(sessions, args, output_dir):
+    """
+    Run one concurrency level against a fresh server, or `--url` if given.
+    """
+    if args.url:
+        return asyncio.run(run_sessions(args.url, sessions, args, args.pid))
+
+    port = free_port()
+    stages_file = output_dir / f"stages-{sessions}.jsonl"
+    stages_file.unlink(missing_ok=True)
+    environment = {
+        "DASHBOARD_INGEST_INTERVAL": "0",
+        "DASHBOARD_WARM_ENABLED": "1" if args.warm else "0",
+        "DASHBOARD_METRICS_JSONL_FILE": str(stages_file),
+        "DASHBOARD_DATA_DIR": args.data_dir,
+    }
+    with open(output_dir / f"server-{sessions}.log", "w") as log_file:
+        process = start_server(port, log_file, environment)
+        try:
+            result = asyncio.run(
+                run_sessions(f"http://127.0.0.1:{port}", sessions, args, process.pid)
+            )
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    result["server_stages"] = stage_summary(stages_file)
+    return result
+
+
+def format_level(result):
+    latency = result["latency"]
+    memory = result.get("memory", {})
+    return {
+        "Sessions": result["sessions"],
+        "Reruns": result["reruns"],
+        "Reruns/s": result["throughput_per_s"],
+        "p50 (ms)": latency.get("p50_ms"),
+        "p95 (ms)": latency.get("p95_ms"),
+        "p99 (ms)": latency.get("p99_ms"),
+        "Exceptions": result["exceptions"],
+        "Failed sessions": len(result["session_errors"]),
+        "MB/session": memory.get("per_session_mb"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the dashboard.")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--actions", type=int, default=20, help="Per session.")
+    parser.add_argument(
+        "--think", type=float, default=5.0, help="Mean think time in seconds."
+    )
+    parser.add_argument(
+        "--ramp", type=float, default=10.0, help="Seconds over which sessions start."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=300.0, help="Per rerun.")
+    parser.add_argument("--username", default="user1")
+    parser.add_argument("--password", default="password1")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument(
+        "--warm", action="store_true", help="Enable the cache warmer on the server."
+    )
+    parser.add_argument("--url", help="Test a running server instead of starting one.")
+    parser.add_argument("--pid", type=int, help="Process ID of the --url server.")
+    parser.add_argument(
+        "--output", help="Default: .cache/load_tests/load-<timestamp>.json"
+    )
+    args = parser.parse_args()
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    output = Path(args.output or f".cache/load_tests/load-{stamp}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    levels = []
+    for sessions in args.sessions:
+        print(f"Running {sessions} session(s)...", flush=True)
+        levels.append(run_level(sessions, args, output.parent))
+        report = {"created": stamp, "arguments": vars(args), "levels": levels}
+        output.write_text(json.dumps(report, indent=2, default=str))
+
+    table = pd.DataFrame([format_level(level) for level in levels])
+    print(table.to_string(index=False, float_format="{:.1f}".format))
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Run the benchmark suite on synthetic datasets, save the timings as JSON and
+compare them with a stored baseline.
+
+    PYTHONPATH=. python -m benchmarks.run --scales 1 10
+    PYTHONPATH=. python -m benchmarks.run --scales 1 10 --update-baseline
+
+The exit status is 1 when a benchmark regressed: its median is more than
+`threshold` slower than the baseline median and by more than `min_delta`
+seconds, so millisecond-level noise never fails a run.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# The benchmarks time a static snapshot; keep the dataset loader from
+# starting live ingestion or the cache warmer.
+os.environ.setdefault("DASHBOARD_INGEST_INTERVAL", "0")
+os.environ.setdefault("DASHBOARD_WARM_ENABLED", "0")
+
+import pandas as pd
+
+from app.utils.dataset import clear_datasets
+from benchmarks.startup import import_time_report
+from benchmarks.suite import BENCHMARKS, BenchmarkContext, uncovered_functions
+from benchmarks.synthetic import ensure_dataset
+
+BASELINE_FILE = Path(__file__).with_name("baseline.json")
+
+
+def run_benchmark(benchmark, context, repeat):
+    """
+    Time a benchmark `repeat` times.
+
+    Parameters:
+        benchmark (Benchmark): The benchmark.
+        context (BenchmarkContext): Inputs for the dataset under test.
+        repeat (int): Repetitions unless the benchmark sets its own.
+
+    Returns:
+        dict: "group", "threshold", the per-run "seconds" and their "median"
+        and "min", or "error" when the benchmark raised.
+    """
+    result = {"group": benchmark.group, "threshold": benchmark.threshold}
+    seconds = []
+    try:
+        for _ in range(benchmark.repeat or repeat):
+            arguments = benchmark.setup(context)
+            gc.collect()
+            started = time.perf_counter()
+            benchmark.function(*arguments)
+            seconds.append(time.perf_counter() - started)
+    except Exception as error:
+        result["error"] = f"{type(error).__name__}: {error}"
+        return result
+    result.update(seconds=seconds, median=statistics.median(seconds), min=min(seconds))
+    return result
+
+
+def run_suite(scales, repeat=5, data_root=".cache/benchmarks", groups=None):
+    """
+    Run the suite on a synthetic dataset for each scale.
+
+    Parameters:
+        scales (list): Multiples of the source data size, e.g. [1, 10].
+        repeat (int): Repetitions of each benchmark.
+        data_root (str): Directory for the generated datasets.
+        groups (list, optional): Only run benchmarks of these groups.
+
+    Returns:
+        dict: JSON-serializable results keyed by scale, then benchmark name.
+    """
+    results = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.platform(),
+        "repeat": repeat,
+        "scales": {},
+    }
+    if not groups or "startup" in groups:
+        results["import_time"] = import_time_report()
+        print(format_import_time(results["import_time"]))
+    for scale in scales:
+        data_dir = Path(data_root) / f"x{scale}"
+        dataset = ensure_dataset(data_dir, scale)
+        context = BenchmarkContext(data_dir)
+        timings = {}
+        for benchmark in BENCHMARKS:
+            if groups and benchmark.group not in groups:
+                continue
+            timings[benchmark.name] = run_benchmark(benchmark, context, repeat)
+            print(format_timing(scale, benchmark.name, timings[benchmark.name]))
+        results["scales"][str(scale)] = {"dataset": dataset, "benchmarks": timings}
+        del context
+        clear_datasets()
+    return results
+
+
+def format_timing(scale, name, timing):
+    if "error" in timing:
+        return f"x{scale:<5} {name:<50} {timing['error']}"
+    return f"x{scale:<5} {name:<50} {timing['median'] * 1000:10.1f} ms"
+
+
+def format_import_time(report):
+    lines = [f"import dashboard: {report['total_ms']:.1f} ms"]
+    lines += [
+        f"  {module['module']:<48} {module['cumulative_ms']:10.1f} ms"
+        for module in report["top"]
+    ]
+    heavy = ", ".join(report["heavy_modules_loaded"]) or "none"
+    lines.append(f"  heavy modules loaded at import: {heavy}")
+    return "\n".join(lines)
+
+
+def compare(results, baseline, threshold=0.3, min_delta=0.01):
+    """
+    Compare benchmark medians with a baseline.
+
+    Parameters:
+        results (dict): Output of `run_suite`.
+        baseline (dict): Earlier output of `run_suite`.
+        threshold (float): Allowed relative slowdown; benchmarks can set their
+            own.
+        min_delta (float): Slowdowns below this many seconds never count.
+
+    Returns:
+        pd.DataFrame: One row per benchmark timed in both runs, with the
+        baseline and current medians, their ratio and a status of
+        "regression", "improvement" or "ok".
+    """
+    rows = []
+    for scale, current in results["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if previous is None:
+            continue
+        for name, timing in current["benchmarks"].items():
+            before = previous["benchmarks"].get(name, {})
+            if "median" not in timing or "median" not in before:
+                continue
+            allowed = timing.get("threshold") or threshold
+            ratio = timing["median"] / before["median"]
+            delta = timing["median"] - before["median"]
+            if ratio > 1 + allowed and delta > min_delta:
+                status = "regression"
+            elif ratio < 1 / (1 + allowed) and -delta > min_delta:
+                status = "improvement"
+            else:
+                status = "ok"
+            rows.append(
+                {
+                    "Scale": f"x{scale}",
+                    "Benchmark": name,
+                    "Baseline (ms)": before["median"] * 1000,
+                    "Current (ms)": timing["median"] * 1000,
+                    "Ratio": ratio,
+                    "Status": status,
+                }
+            )
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "Scale",
+            "Benchmark",
+            "Baseline (ms)",
+            "Current (ms)",
+            "Ratio",
+            "Status",
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--groups", nargs="+", help="e.g. load filter tab")
+    parser.add_argument("--data-root", default=".cache/benchmarks")
+    parser.add_argument(
+        "--output", help="Default: .cache/benchmarks/results-<timestamp>.json"
+    )
+    parser.add_argument("--baseline", default=str(BASELINE_FILE))
+    parser.add_argument("--threshold", type=float, default=0.3)
+    parser.add_argument("--min-delta", type=float, default=0.01)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Store these results as the new baseline instead of comparing.",
+    )
+    args = parser.parse_args()
+
+    for name in uncovered_functions():
+        print(f"warning: no benchmark times {name}", file=sys.stderr)
+
+    results = run_suite(args.scales, args.repeat, args.data_root, args.groups)
+    output = Path(
+        args.output
+        or Path(args.data_root)
+        / f"results-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+
+    baseline = Path(args.baseline)
+    if args.update_baseline:
+        baseline.write_text(json.dumps(results, indent=2))
+        print(f"Baseline updated: {baseline}")
+        return
+    if not baseline.exists():
+        print(f"No baseline at {baseline}; run with --update-baseline to store one.")
+        return
+
+    comparison = compare(
+        results, json.loads(baseline.read_text()), args.threshold, args.min_delta
+    )
+    if comparison.empty:
+        print("No benchmarks in common with the baseline.")
+        return
+    print(comparison.to_string(index=False, float_format="{:.2f}".format))
+    regressions = comparison[comparison["Status"] == "regression"]
+    if not regressions.empty:
+        print(f"{len(regressions)} benchmark(s) regressed.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
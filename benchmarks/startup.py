@@ -0,0 +1,80 @@
+"""
+Cold-start measurements, each in a fresh interpreter: importing the dashboard
+script, rendering the login page, and a `python -X importtime` report of what
+the import pulls in.
+"""
+
+import os
+import subprocess
+import sys
+
+# Libraries that must not be imported before the login page renders.
+HEAVY_MODULES = [
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "plotly.express",
+    "scipy",
+    "sklearn",
+    "prophet",
+    "cmdstanpy",
+]
+
+LOGIN_PAGE = """
+from streamlit.testing.v1 import AppTest
+
+app = AppTest.from_file("dashboard.py")
+app.run()
+assert [header.value for header in app.header] == ["Login"], app.exception
+"""
+
+
+def run_python(arguments, data_dir="data"):
+    return subprocess.run(
+        [sys.executable, *arguments],
+        env={**os.environ, "PYTHONPATH": os.getcwd(), "DASHBOARD_DATA_DIR": data_dir},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def cold_import(data_dir="data"):
+    run_python(["-c", "import dashboard"], data_dir)
+
+
+def cold_login_page(data_dir="data"):
+    run_python(["-c", LOGIN_PAGE], data_dir)
+
+
+def import_time_report(top=15):
+    """
+    Import the dashboard under `python -X importtime` in a fresh interpreter.
+
+    Returns:
+        dict: "total_ms", the `top` modules by cumulative import time and the
+        heavy modules the import loaded.
+    """
+    check = "import dashboard, sys; print(' '.join(sorted(sys.modules)))"
+    completed = run_python(["-X", "importtime", "-c", check])
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        modules.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_ms": int(own) / 1000,
+                "cumulative_ms": int(cumulative) / 1000,
+            }
+        )
+    loaded = set(completed.stdout.split())
+    return {
+        "total_ms": sum(
+            module["cumulative_ms"] for module in modules if module["depth"] == 0
+        ),
+        "top": sorted(modules, key=lambda module: -module["cumulative_ms"])[:top],
+        "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in loaded],
+    }
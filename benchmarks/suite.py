@@ -0,0 +1,463 @@
+"""
+The benchmarks: data loading and filtering, every function in
+`app/utils/data_processing.py` and `app/utils/metric_utils.py`, the
+aggregation path of each dashboard tab, the chatbot parser and the
+forecasters.
+
+A benchmark's `setup` runs untimed before every repetition and returns the
+arguments of the timed call; it clears the computation cache (and builds a
+fresh view where needed) so every repetition does the full work.
+"""
+
+import contextlib
+import functools
+import inspect
+import io
+
+import pandas as pd
+
+from app.utils import data_processing, metric_utils
+from app.utils.cache import ComputationCache
+from app.utils.dataset import clear_datasets, get_dataset
+from app.utils.view import FilteredView
+from benchmarks import startup
+
+# Outputs each tab reads, with the parameters its default widgets select. The
+# forecast itself is timed by the "forecast" benchmarks.
+TAB_OUTPUTS = {
+    "Sales Overview": [
+        ("sales_over_time", {}),
+        ("sales_kpis", {}),
+        ("moving_averages", {}),
+        ("trailing_sales", {}),
+        ("sales_anomalies", {}),
+        ("sales_by", {"column": "Category"}),
+        ("sales_by", {"column": "Country"}),
+    ],
+    "Product Performance": [
+        ("top_products", {"value_column": "Sales"}),
+        ("top_products", {"value_column": "Profit"}),
+        ("co_purchase_network", {"min_orders": 1}),
+        ("basket_rules", {"level": "Product", "min_support": 0.0001}),
+        ("category_treemap", {}),
+        ("most_sold_category_by_country", {}),
+        ("seasonal_sales", {}),
+    ],
+    "Customer Insights": [("top_customers", {}), ("customer_rfm", {})],
+    "Sales Forecasting": [("sales_history", {"granularity": "Daily"})],
+    "Regional Analysis": [
+        ("sales_heatmap", {}),
+        ("region_sales", {}),
+        ("shipping_costs", {}),
+        ("regional_product_sales", {}),
+        ("region_profit", {}),
+        ("region_monthly_sales", {}),
+        ("sales_anomalies", {}),
+    ],
+    "Order Analysis": [
+        ("order_frequency", {}),
+        ("order_value", {}),
+        ("order_value_summary", {}),
+    ],
+}
+
+QUESTIONS = [
+    "Show me the sales overview",
+    "Sales in France for Technology in 2022",
+    "Regional analysis for Germany and Spain 2020-2021",
+    "Order analysis from 2021-03-01 to 2021-06-30",
+    "Customer insights for Office Supplies in the United States",
+]
+
+
+class Benchmark:
+    """
+    One timed call.
+
+    `repeat` and `threshold` override the suite-wide repetition count and
+    regression threshold, e.g. for slow or noisy benchmarks.
+    """
+
+    def __init__(self, name, group, function, setup=None, repeat=None, threshold=None):
+        self.name = name
+        self.group = group
+        self.function = function
+        self.setup = setup or (lambda context: ())
+        self.repeat = repeat
+        self.threshold = threshold
+
+
+class BenchmarkContext:
+    """
+    Inputs shared by the benchmarks of one dataset, built on first use.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = str(data_dir)
+
+    @functools.cached_property
+    def schema(self):
+        return get_dataset(self.data_dir)
+
+    @property
+    def fact(self):
+        return self.schema.fact
+
+    @functools.cached_property
+    def wide(self):
+        return self.schema.materialize(self.schema.fact)
+
+    @functools.cached_property
+    def max_date(self):
+        return self.fact["Order.Date"].max()
+
+    @functools.cached_property
+    def months(self):
+        return self.fact["Order.Date"].dt.month
+
+    @functools.cached_property
+    def rfm(self):
+        return data_processing.calculate_rfm(self.fact, self.max_date, self.schema)
+
+    @functools.cached_property
+    def history(self):
+        return data_processing.preprocess_sales_data(self.fact, "Order.Date", "Sales")
+
+    @functools.cached_property
+    def filters(self):
+        """
+        Filter selections for the `filter_data` benchmarks: none, the largest
+        country, and the largest category over the last year.
+        """
+        top_country = (
+            self.schema.aggregate(self.fact, "Country", "Sales")
+            .nlargest(1, "Sales")["Country"]
+            .iloc[0]
+        )
+        top_category = (
+            self.schema.aggregate(self.fact, "Category", "Sales")
+            .nlargest(1, "Sales")["Category"]
+            .iloc[0]
+        )
+        end = self.max_date
+        return {
+            "all": {},
+            "country": {"countries": [top_country]},
+            "category_last_year": {
+                "categories": [top_category],
+                "date_range": (end - pd.DateOffset(years=1), end),
+            },
+        }
+
+
+def context_only(context):
+    return (context,)
+
+
+def fresh_view(context):
+    # A private cache, so every repetition computes the outputs again.
+    view = FilteredView(context.schema, cache=ComputationCache())
+    view.fact
+    return (view,)
+
+
+def load_and_prepare_data(context):
+    from dashboard import load_and_prepare_data
+
+    return load_and_prepare_data(context.data_dir)
+
+
+def filter_data(context, selection):
+    return FilteredView(context.schema, **context.filters[selection]).fact
+
+
+def filtered(selection):
+    """
+    Setup returning the context and the fact rows of a filter selection.
+    """
+
+    def setup(context):
+        return (context, filter_data(context, selection))
+
+    return setup
+
+
+def sketch_query(context, fact, selection, aggregate):
+    """
+    Answer a filter selection from a sketch aggregate: a top-10 ranking, a
+    distinct count, a repeat purchase rate or order value quantiles.
+    """
+    selected = context.filters[selection]
+    sketch = context.schema.aggregates[aggregate]
+    if hasattr(sketch, "top"):
+        query = sketch.top
+    elif hasattr(sketch, "rate"):
+        query = sketch.rate
+    elif hasattr(sketch, "count"):
+        query = sketch.count
+    else:
+        query = sketch.quantiles
+    return query(
+        {
+            "Country": selected.get("countries"),
+            "Category": selected.get("categories"),
+        },
+        date_range=selected.get("date_range"),
+    )
+
+
+def exact_query(context, fact, selection, aggregate):
+    """
+    Answer the same question as `sketch_query` from the filtered rows.
+    """
+    sketch = context.schema.aggregates[aggregate]
+    if hasattr(sketch, "top"):
+        return data_processing.calculate_top_values(
+            fact, sketch.item, "Sales", "Sales", schema=context.schema
+        )
+    if hasattr(sketch, "rate"):
+        return metric_utils.calculate_repeat_purchase_rate(
+            context.schema.join_labels(fact, [sketch.item])
+        )
+    if hasattr(sketch, "quantiles"):
+        order_value = data_processing.calculate_order_value(fact)["Order Value"]
+        return order_value.quantile([0.5, 0.9, 0.99]).to_numpy()
+    if context.schema.is_attribute(sketch.item):
+        return context.schema.row_codes(fact, sketch.item).nunique()
+    return fact[sketch.item].nunique()
+
+
+def sales_windows(context, fact, selection, comparison):
+    """
+    Daily sales of a filter selection, alone or with a comparison window.
+    """
+    view = FilteredView(
+        context.schema, cache=ComputationCache(), **context.filters[selection]
+    )
+    if comparison is None:
+        return view.output("sales_over_time")
+    return view.output("sales_comparison", comparison=comparison)
+
+
+def tab_outputs(view, tab):
+    return [view.output(name, **params) for name, params in TAB_OUTPUTS[tab]]
+
+
+def ask_questions():
+    from app.chatbot.chatbot import ask_question
+
+    # The parser prints a debug trace of every question.
+    with contextlib.redirect_stdout(io.StringIO()):
+        return [ask_question(question) for question in QUESTIONS]
+
+
+def forecast_sales_prophet(history):
+    from scripts.forecasting.sales_forecasting import forecast_sales_prophet
+
+    return forecast_sales_prophet(history, 30)
+
+
+def clear_dataset(context):
+    clear_datasets()
+    return (context,)
+
+
+def with_context(*arguments):
+    """
+    Setup returning the context attributes named in `arguments`.
+    """
+    return lambda context: tuple(getattr(context, name) for name in arguments)
+
+
+def schema_call(function, *arguments, **keywords):
+    """
+    Benchmark a function called on the full fact table with the schema.
+    """
+    return Benchmark(
+        function.__name__,
+        "data_processing",
+        lambda fact, schema: function(fact, *arguments, schema=schema, **keywords),
+        setup=with_context("fact", "schema"),
+    )
+
+
+BENCHMARKS = [
+    *[
+        Benchmark(
+            name,
+            "startup",
+            function,
+            setup=with_context("data_dir"),
+            repeat=3,
+            threshold=0.5,
+        )
+        for name, function in [
+            ("import dashboard", startup.cold_import),
+            ("login page", startup.cold_login_page),
+        ]
+    ],
+    Benchmark(
+        "load_and_prepare_data",
+        "load",
+        load_and_prepare_data,
+        setup=clear_dataset,
+    ),
+    *[
+        Benchmark(
+            f"filter_data[{selection}]",
+            "filter",
+            functools.partial(filter_data, selection=selection),
+            setup=context_only,
+        )
+        for selection in ["all", "country", "category_last_year"]
+    ],
+    *[
+        Benchmark(
+            f"{aggregate}[{selection},{mode}]",
+            "sketch",
+            functools.partial(function, selection=selection, aggregate=aggregate),
+            setup=filtered(selection),
+        )
+        for aggregate in [
+            "top_products",
+            "top_customers",
+            "distinct_orders",
+            "distinct_customers",
+            "repeat_purchases",
+            "order_value_quantiles",
+        ]
+        for selection in ["all", "country", "category_last_year"]
+        for mode, function in [("exact", exact_query), ("sketch", sketch_query)]
+    ],
+    *[
+        Benchmark(
+            f"sales_over_time[{selection},{comparison or 'no comparison'}]",
+            "comparison",
+            functools.partial(
+                sales_windows, selection=selection, comparison=comparison
+            ),
+            setup=filtered(selection),
+        )
+        for selection in ["category_last_year"]
+        for comparison in [None, "Previous period", "Last year"]
+    ],
+    Benchmark(
+        "calculate_rfm",
+        "data_processing",
+        lambda fact, max_date, schema: data_processing.calculate_rfm(
+            fact, max_date, schema=schema
+        ),
+        setup=with_context("fact", "max_date", "schema"),
+    ),
+    Benchmark(
+        "calculate_rfm_segments",
+        "data_processing",
+        data_processing.calculate_rfm_segments,
+        setup=with_context("rfm"),
+    ),
+    Benchmark(
+        "calculate_rfm_segments[approximate]",
+        "data_processing",
+        functools.partial(data_processing.calculate_rfm_segments, approximate=True),
+        setup=with_context("rfm"),
+    ),
+    schema_call(data_processing.calculate_order_frequency),
+    Benchmark(
+        "calculate_order_value",
+        "data_processing",
+        data_processing.calculate_order_value,
+        setup=with_context("fact"),
+    ),
+    schema_call(data_processing.calculate_top_values, "Product Name", "Sales", "Sales"),
+    Benchmark(
+        "add_season_column",
+        "data_processing",
+        lambda fact: data_processing.add_season_column(fact, "Order.Date"),
+        setup=with_context("fact"),
+    ),
+    Benchmark(
+        "month_to_season",
+        "data_processing",
+        data_processing.month_to_season,
+        setup=with_context("months"),
+    ),
+    schema_call(
+        data_processing.calculate_aggregated_values, ["Country", "Category"], "Sales"
+    ),
+    Benchmark(
+        "add_month_column",
+        "data_processing",
+        lambda fact: data_processing.add_month_column(fact, "Order.Date"),
+        setup=with_context("fact"),
+    ),
+    *[
+        Benchmark(
+            f"preprocess_sales_data[{granularity}]",
+            "data_processing",
+            functools.partial(
+                data_processing.preprocess_sales_data,
+                date_column="Order.Date",
+                sales_column="Sales",
+                granularity=granularity,
+            ),
+            setup=with_context("fact"),
+        )
+        for granularity in ["Daily", "Weekly", "Monthly"]
+    ],
+    schema_call(data_processing.aggregate_sales_by_column, "Category", "Sales"),
+    Benchmark(
+        "metric_utils.calculate_rfm",
+        "metric_utils",
+        metric_utils.calculate_rfm,
+        setup=with_context("wide", "max_date"),
+    ),
+    Benchmark(
+        "metric_utils.calculate_repeat_purchase_rate",
+        "metric_utils",
+        metric_utils.calculate_repeat_purchase_rate,
+        setup=with_context("wide"),
+    ),
+    *[
+        Benchmark(
+            f"tab[{tab}]",
+            "tab",
+            functools.partial(tab_outputs, tab=tab),
+            setup=fresh_view,
+        )
+        for tab in TAB_OUTPUTS
+    ],
+    Benchmark("ask_question", "chatbot", ask_questions),
+    Benchmark(
+        "calculate_forecast",
+        "forecast",
+        lambda history: data_processing.calculate_forecast(history, 30, "D"),
+        setup=with_context("history"),
+        repeat=1,
+        threshold=0.5,
+    ),
+    Benchmark(
+        "forecast_sales_prophet",
+        "forecast",
+        forecast_sales_prophet,
+        setup=with_context("history"),
+        repeat=1,
+        threshold=0.5,
+    ),
+]
+
+
+def uncovered_functions():
+    """
+    Return the functions of the benchmarked modules that no benchmark times,
+    so new functions are not silently left out.
+
+    Returns:
+        list: "module.function" names.
+    """
+    covered = {benchmark.name.split("[")[0] for benchmark in BENCHMARKS}
+    missing = []
+    for module, prefix in [(data_processing, ""), (metric_utils, "metric_utils.")]:
+        for name, function in inspect.getmembers(module, inspect.isfunction):
+            if function.__module__ == module.__name__ and prefix + name not in covered:
+                missing.append(f"{module.__name__}.{name}")
+    return missing
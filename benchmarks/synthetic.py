@@ -0,0 +1,191 @@
+"""
+Synthetic datasets with the schema and value distributions of
+`data/merged_data.csv`, at a multiple of its size.
+
+Each 1× block resamples whole orders from the source data, so lines per order,
+the product mix, dates (and with them seasonality), countries, ship modes and
+the joint distribution of sales, profit and shipping cost are kept. Customers
+are replicated `scale` times with suffixed IDs and names, so the number of
+customers grows with the data while each replica keeps its country and city.
+Products are shared by all blocks, as a catalogue grows much slower than its
+orders.
+
+    PYTHONPATH=. python -m benchmarks.synthetic --scale 100
+"""
+
+import argparse
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.utils.star_schema import CUSTOMER_ATTRIBUTES, MERGED_COLUMNS
+
+SCALES = [1, 10, 100, 1000]
+ORDER_COLUMNS = ["Order.ID", "Customer.ID", "Product.ID", "Order.Date"]
+SALES_COLUMNS = ["Order.ID", "Sales", "Profit", "Shipping.Cost", "Ship.Mode"]
+MARKER = "synthetic.json"
+
+
+def replica_labels(labels, replicas, separator):
+    """
+    Suffix labels with their replica number; replica 0 keeps the original.
+
+    Parameters:
+        labels (pd.Series): Original labels.
+        replicas (np.ndarray): Replica number of each label.
+        separator (str): Text between a label and its replica number.
+
+    Returns:
+        pd.Series: The replica labels.
+    """
+    labels = labels.reset_index(drop=True)
+    suffixed = labels + separator + pd.Series(replicas).astype(str)
+    return labels.where(replicas == 0, suffixed)
+
+
+def generate_dataset(output_dir, scale, source_dir="data", seed=0):
+    """
+    Write a synthetic copy of the dashboard's CSV files at `scale` times the
+    size of the source data.
+
+    The files are written one 1× block at a time, so memory use does not grow
+    with the scale.
+
+    Parameters:
+        output_dir (str or Path): Directory for the CSV files.
+        scale (int): Multiple of the source row count to generate.
+        source_dir (str or Path): Directory containing the source CSV files.
+        seed (int): Random seed; the same seed gives the same files.
+
+    Returns:
+        dict: Description of the dataset, also written to `synthetic.json`.
+    """
+    source_dir = Path(source_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = np.random.default_rng(seed)
+
+    merged = pd.read_csv(source_dir / "merged_data.csv")
+    merged = merged.sort_values("Order.ID", kind="stable").reset_index(drop=True)
+    order_starts = np.flatnonzero(
+        np.r_[
+            True,
+            merged["Order.ID"].to_numpy()[1:] != merged["Order.ID"].to_numpy()[:-1],
+        ]
+    )
+    order_lengths = np.diff(np.r_[order_starts, len(merged)])
+    order_count = len(order_starts)
+
+    customers = pd.read_csv(source_dir / "customers.csv")
+    for block in range(scale):
+        replicas = np.full(len(customers), block)
+        customers.assign(
+            **{
+                "Customer.ID": replica_labels(customers["Customer.ID"], replicas, "."),
+                "Customer.Name": replica_labels(
+                    customers["Customer.Name"], replicas, " "
+                ),
+            }
+        )[CUSTOMER_ATTRIBUTES].to_csv(
+            output_dir / "customers.csv",
+            mode="a" if block else "w",
+            header=not block,
+            index=False,
+        )
+    shutil.copyfile(source_dir / "products.csv", output_dir / "products.csv")
+    shutil.copyfile(source_dir / "users.csv", output_dir / "users.csv")
+
+    rows = 0
+    next_order_id = 1
+    for block in range(scale):
+        orders = rng.integers(0, order_count, order_count)
+        lengths = order_lengths[orders]
+        offsets = np.arange(lengths.sum()) - np.repeat(
+            np.cumsum(lengths) - lengths, lengths
+        )
+        lines = merged.take(np.repeat(order_starts[orders], lengths) + offsets)
+        replicas = np.repeat(rng.integers(0, scale, order_count), lengths)
+
+        lines = lines.assign(
+            **{
+                "Order.ID": np.repeat(
+                    np.arange(next_order_id, next_order_id + order_count), lengths
+                ),
+                "Customer.ID": replica_labels(
+                    lines["Customer.ID"], replicas, "."
+                ).to_numpy(),
+                "Customer.Name": replica_labels(
+                    lines["Customer.Name"], replicas, " "
+                ).to_numpy(),
+            }
+        )
+        next_order_id += order_count
+        rows += len(lines)
+
+        mode, header = ("a", False) if block else ("w", True)
+        lines[MERGED_COLUMNS].to_csv(
+            output_dir / "merged_data.csv", mode=mode, header=header, index=False
+        )
+        lines[ORDER_COLUMNS].to_csv(
+            output_dir / "orders.csv", mode=mode, header=header, index=False
+        )
+        lines[SALES_COLUMNS].to_csv(
+            output_dir / "sales.csv", mode=mode, header=header, index=False
+        )
+
+    description = {
+        "scale": scale,
+        "seed": seed,
+        "source": str(source_dir),
+        "rows": rows,
+        "orders": next_order_id - 1,
+        "customers": len(customers) * scale,
+    }
+    (output_dir / MARKER).write_text(json.dumps(description, indent=2))
+    return description
+
+
+def ensure_dataset(output_dir, scale, source_dir="data", seed=0):
+    """
+    Return the synthetic dataset in `output_dir`, generating it unless a
+    dataset with the same scale, seed and source is already there.
+
+    Parameters:
+        output_dir (str or Path): Directory for the CSV files.
+        scale (int): Multiple of the source row count.
+        source_dir (str or Path): Directory containing the source CSV files.
+        seed (int): Random seed.
+
+    Returns:
+        dict: Description of the dataset.
+    """
+    marker = Path(output_dir) / MARKER
+    if marker.exists():
+        description = json.loads(marker.read_text())
+        if (description["scale"], description["seed"], description["source"]) == (
+            scale,
+            seed,
+            str(source_dir),
+        ):
+            return description
+    return generate_dataset(output_dir, scale, source_dir, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic dataset.")
+    parser.add_argument("--scale", type=int, default=1, help=f"e.g. {SCALES}")
+    parser.add_argument("--output", help="Default: .cache/benchmarks/x<scale>")
+    parser.add_argument("--source", default="data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    output = args.output or f".cache/benchmarks/x{args.scale}"
+    description = generate_dataset(output, args.scale, args.source, args.seed)
+    print(json.dumps(description, indent=2))
+
+
+if __name__ == "__main__":
+    main()
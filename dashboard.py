@@ -1,20 +1,26 @@
 # Copyright (c) 2025 Arda Özsap
 # Licensed under the MIT License (see LICENSE for details)
 
+# Only light modules are imported up front so the login page renders without
+# waiting for pandas, Plotly and the rest of the data stack; those are
+# imported where they are first used, and the dataset is loaded in the
+# background while the login page is shown.
 from pathlib import Path
 import sys
-import pandas as pd
+import time
 import streamlit as st
-from app.tabs.sales_overview import render_sales_overview
-from app.tabs.product_performance import render_product_performance
-from app.tabs.customer_insights import render_customer_insights
-from app.tabs.sales_forecasting_tab import render_sales_forecasting
-from app.tabs.regional_analysis import render_regional_analysis
-from app.tabs.login_tab import render_login_tab
-from app.tabs.order_analysis import render_order_analysis
+from app import config
+from app.utils.dataset import dataset_loaded, get_dataset, preload_dataset
+from app.utils.metrics import stage_metrics
+from app.utils.usage import filter_usage
+from app.tabs.login_tab import (
+    log_out,
+    render_login_tab,
+    restore_session,
+    write_session_cookie,
+)
 from app.chatbot.chatbot import ask_question
 
-
 root_dir = Path(__file__).resolve().parent.parent
 sys.path.append(str(root_dir))
 
@@ -25,10 +31,30 @@ def initialize_session_state(defaults):
             st.session_state[key] = value
 
 
-def load_and_prepare_data(file_path):
-    data = pd.read_csv(file_path)
-    data["Order.Date"] = pd.to_datetime(data["Order.Date"]).dt.date
-    return data
+def load_and_prepare_data(data_dir):
+    with stage_metrics.stage("load_and_prepare_data") as record:
+        record.cache = "hit" if dataset_loaded(data_dir) else "miss"
+        schema = get_dataset(data_dir)
+        record.rows_out = len(schema.fact)
+    return schema
+
+
+def start_background_services(schema):
+    """
+    Start the in-process API and the cache warmer; both calls are idempotent.
+
+    Returns:
+        CacheWarmer or None: The warmer, when enabled.
+    """
+    if config.API_PORT:
+        from app.api.server import start_api_server
+
+        start_api_server(config.API_HOST, config.API_PORT, config.DATA_DIR)
+    if config.WARM_ENABLED:
+        from app.utils.warmer import start_cache_warmer
+
+        return start_cache_warmer(schema)
+    return None
 
 
 def render_sidebar_profile():
@@ -38,13 +64,62 @@ def render_sidebar_profile():
         st.write(f"**Role**: {st.session_state['role']}")
 
 
+def render_sidebar_data_status(schema):
+    ingestor = schema.ingestor
+    if ingestor is None:
+        return
+    stats = ingestor.stats
+    if stats.last_ingest_at is None:
+        st.sidebar.caption(f"🔄 Live data: {len(schema.fact):,} rows, no new rows yet")
+    else:
+        age = time.time() - stats.last_ingest_at
+        st.sidebar.caption(
+            f"🔄 Live data: {len(schema.fact):,} rows "
+            f"(+{stats.rows_ingested:,} ingested, last {age:.0f}s ago, "
+            f"lag {stats.last_lag_seconds:.1f}s)"
+        )
+
+
+def render_sidebar_cache_status(warmer):
+    if warmer is None or st.session_state["role"] != "admin":
+        return
+    report = warmer.report
+    with st.sidebar.expander("🔥 Cache Warm-up", expanded=False):
+        st.write(f"**Status**: {report['status']}")
+        st.write(
+            f"**Warmed**: {report['views']} views, {report['outputs']} outputs, "
+            f"{report['figures']} figures"
+        )
+        st.write(f"**Time**: {report['seconds']:.1f}s")
+        st.write(f"**Cache size**: {report['cache_mb']:.1f} MB")
+        if report["stopped_by"]:
+            st.write(f"**Stopped by**: {report['stopped_by']}")
+        if report["errors"]:
+            st.write(f"**Errors**: {report['errors']}")
+
+
+def render_sidebar_copy_report():
+    from app.utils.copy_tracking import copy_counter
+
+    if not copy_counter.installed:
+        st.sidebar.caption("🧪 Copy counting is not supported on this pandas release.")
+        return
+    copies = copy_counter.snapshot()
+    st.sidebar.caption(
+        f"🧪 DataFrame copies this rerun: {copies['copies']:,} "
+        f"({copies['bytes'] / 2**20:,.1f} MB)"
+    )
+
+
 def render_sidebar_filters_and_chatbot():
     with st.sidebar.expander("🔍 Filters", expanded=True):
         chat_input = st.text_input("Enter your message here:")
         send_button = st.button("Send")
 
         if send_button and chat_input:
-            process_chatbot_input(ask_question(chat_input))
+            with stage_metrics.stage("ask_question"):
+                data = ask_question(chat_input)
+            process_chatbot_input(data)
 
         render_manual_filters()
 
@@ -52,16 +127,14 @@ def render_sidebar_filters_and_chatbot():
 def process_chatbot_input(data):
     if data.country:
         st.session_state.country_filter = [
-            c for c in data.country if c in merged_df["Country"].unique()
+            c for c in data.country if c in available_countries
         ]
     else:
         st.session_state.country_filter = []
 
     if data.product_category:
         st.session_state.category_filter = [
-            cat
-            for cat in data.product_category
-            if cat in merged_df["Category"].unique()
+            cat for cat in data.product_category if cat in available_categories
         ]
     else:
         st.session_state.category_filter = []
@@ -80,23 +153,21 @@ def process_chatbot_input(data):
 
 def render_manual_filters():
     valid_country_defaults = [
-        c for c in st.session_state.country_filter if c in merged_df["Country"].unique()
+        c for c in st.session_state.country_filter if c in available_countries
     ]
     country_filter = st.multiselect(
         "Select Country",
-        merged_df["Country"].unique(),
+        available_countries,
         default=valid_country_defaults,
     )
     st.session_state.country_filter = country_filter
 
     valid_category_defaults = [
-        cat
-        for cat in st.session_state.category_filter
-        if cat in merged_df["Category"].unique()
+        cat for cat in st.session_state.category_filter if cat in available_categories
     ]
     category_filter = st.multiselect(
         "Select Product Category",
-        merged_df["Category"].unique(),
+        available_categories,
         default=valid_category_defaults,
     )
     st.session_state.category_filter = category_filter
@@ -111,32 +182,43 @@ def render_manual_filters():
     if len(date_range_input) == 2:
         st.session_state.date_range = list(date_range_input)
 
+    # Names match `app.tabs.computations.comparison_window`.
+    st.selectbox(
+        "Compare With", ["None", "Previous period", "Last year"], key="comparison"
+    )
+
+
+def filter_data(schema):
+    from app.utils.view import FilteredView
 
-def filter_data(data):
     start_date, end_date = st.session_state.date_range
 
     if start_date == end_date:
         st.warning("Start date and end date cannot be the same.")
         st.stop()
 
-    filtered = data.loc[
-        (
-            data["Country"].isin(st.session_state.country_filter)
-            if st.session_state.country_filter
-            else True
-        )
-        & (
-            data["Category"].isin(st.session_state.category_filter)
-            if st.session_state.category_filter
-            else True
+    with stage_metrics.stage("filter_data", rows_in=len(schema.fact)) as record:
+        view = FilteredView(
+            schema,
+            countries=st.session_state.country_filter,
+            categories=st.session_state.category_filter,
+            date_range=(start_date, end_date),
         )
-        & (data["Order.Date"] >= start_date)
-        & (data["Order.Date"] <= end_date)
-    ]
-    return filtered
+        record.rows_out = len(view.fact)
+    if st.session_state.get("recorded_filter_key") != view.key:
+        st.session_state["recorded_filter_key"] = view.key
+        filter_usage.record(view.countries, view.categories)
+    return view
+
 
+def render_tabs(view):
+    from app.tabs.sales_overview import render_sales_overview
+    from app.tabs.product_performance import render_product_performance
+    from app.tabs.customer_insights import render_customer_insights
+    from app.tabs.sales_forecasting_tab import render_sales_forecasting
+    from app.tabs.regional_analysis import render_regional_analysis
+    from app.tabs.order_analysis import render_order_analysis
 
-def render_tabs(filtered_df):
     tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
         [
             "Sales Overview",
@@ -149,22 +231,150 @@ def render_tabs(filtered_df):
     )
 
     with tab1:
-        render_sales_overview(filtered_df)
+        render_tab(render_sales_overview, view)
 
     with tab2:
-        render_product_performance(filtered_df)
+        render_tab(render_product_performance, view)
 
     with tab3:
-        render_customer_insights(filtered_df)
+        render_tab(render_customer_insights, view)
 
     with tab4:
-        render_sales_forecasting(filtered_df)
+        render_tab(render_sales_forecasting, view)
 
     with tab5:
-        render_regional_analysis(filtered_df)
+        render_tab(render_regional_analysis, view)
 
     with tab6:
-        render_order_analysis(filtered_df)
+        render_tab(render_order_analysis, view)
+
+
+def render_tab(render, view):
+    with stage_metrics.stage(render.__name__, rows_in=len(view.fact)):
+        render(view)
+
+
+def render_sidebar_metrics(records):
+    import pandas as pd
+
+    with st.sidebar.expander("⏱️ Performance", expanded=False):
+        st.write("**This rerun**")
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Stage": ["  " * r.depth + r.stage for r in records],
+                    "ms": [r.seconds * 1000 for r in records],
+                    "Rows in": [r.rows_in for r in records],
+                    "Rows out": [r.rows_out for r in records],
+                    "Cache": [r.cache for r in records],
+                }
+            ),
+            hide_index=True,
+        )
+        st.write("**All reruns**")
+        st.dataframe(stage_metrics.summary(), hide_index=True)
+
+
+def rerun_tags():
+    """
+    Context of the current rerun, logged with its stage records and profile.
+    """
+    return {
+        "countries": st.session_state.country_filter,
+        "categories": st.session_state.category_filter,
+        "date_range": [str(d) for d in st.session_state.date_range],
+        "tab": st.session_state.get("active_tab"),
+    }
+
+
+def start_requested_profiler():
+    requested = st.session_state.pop("profile_next_rerun", False)
+    if st.query_params.get("profile") == "1":
+        del st.query_params["profile"]
+        requested = True
+    if (
+        requested
+        and st.session_state["logged_in"]
+        and st.session_state["role"] == "admin"
+    ):
+        from app.utils.profiling import RerunProfiler
+
+        return RerunProfiler().start()
+    return None
+
+
+def render_sidebar_profiling():
+    with st.sidebar.expander("🔬 Profiling", expanded=False):
+        if st.button("Profile next rerun"):
+            st.session_state["profile_next_rerun"] = True
+            st.rerun()
+
+        profile = st.session_state.get("last_profile")
+        if profile is None:
+            st.caption("Append `?profile=1` to the URL to profile a page load.")
+            return
+        st.write(f"**Tags**: {profile['tags']}")
+        for path in profile["files"]:
+            with open(path, "rb") as f:
+                st.download_button(Path(path).name, f.read(), file_name=Path(path).name)
+        st.dataframe(profile["top"], hide_index=True)
+
+
+def render_sidebar_memory(schema):
+    import pandas as pd
+    from app.utils.cache import estimate_size
+    from app.utils.memory import allocation_tracker, memory_report
+
+    report = memory_report(schema)
+    with st.sidebar.expander("🧠 Memory", expanded=False):
+        st.write(f"**Process RSS**: {report['rss_bytes'] / 2**20:,.1f} MB")
+        st.write(
+            f"**This session's state**: "
+            f"{estimate_size(dict(st.session_state)) / 2**20:,.2f} MB"
+        )
+        st.write(
+            f"**API response cache**: "
+            f"{report['api_response_cache_bytes'] / 2**20:,.2f} MB"
+        )
+        sizes = {**report["dataset"], **report["aggregates"]}
+        st.dataframe(
+            pd.DataFrame(
+                {"Table": list(sizes), "MB": [b / 2**20 for b in sizes.values()]}
+            ),
+            hide_index=True,
+        )
+        st.write(
+            f"**Computation cache**: "
+            f"{report['computation_cache_bytes'] / 2**20:,.1f} MB"
+        )
+        st.dataframe(
+            pd.DataFrame(
+                [
+                    {
+                        "Entry": name,
+                        "Entries": group["entries"],
+                        "MB": group["bytes"] / 2**20,
+                    }
+                    for name, group in report["computation_cache"].items()
+                ]
+            ),
+            hide_index=True,
+        )
+
+        if config.TRACEMALLOC:
+            snapshot = allocation_tracker.snapshot()
+            previous = st.session_state.get("tracemalloc_snapshot")
+            st.session_state["tracemalloc_snapshot"] = snapshot
+            if previous is None:
+                st.caption("Allocation diff appears from the next rerun on.")
+            else:
+                st.write("**Top allocating lines since the last rerun**")
+                st.dataframe(
+                    pd.DataFrame(
+                        allocation_tracker.top_differences(previous, snapshot)
+                    ),
+                    hide_index=True,
+                )
 
 
 def render_logout_button():
@@ -173,7 +383,7 @@ def render_logout_button():
     """
     st.sidebar.write("---")
     if st.sidebar.button("Logout"):
-        st.session_state["logged_in"] = False
+        log_out()
         st.rerun()
 
 
@@ -187,24 +397,68 @@ if __name__ == "__main__":
         "country_filter": [],
         "category_filter": [],
         "date_range": [],
+        "comparison": "None",
         "trigger_rerun": False,
     }
     initialize_session_state(session_state_defaults)
 
-    merged_df = load_and_prepare_data("data/merged_data.csv")
-    dataset_min_date = merged_df["Order.Date"].min()
-    dataset_max_date = merged_df["Order.Date"].max()
-
-    st.title("E-Commerce Sales Dashboard")
-
-    if not st.session_state["logged_in"]:
-        render_login_tab()
-    else:
-        render_sidebar_profile()
-        render_sidebar_filters_and_chatbot()
-        render_logout_button()
-        filtered_df = filter_data(merged_df)
-        if filtered_df.empty:
-            st.warning("No data found for the selected filters.")
+    if config.DEBUG_COPIES:
+        from app.utils.copy_tracking import copy_counter
+
+        copy_counter.install()
+        copy_counter.reset()
+    if config.TRACEMALLOC:
+        from app.utils.memory import allocation_tracker
+
+        allocation_tracker.start()
+    profiler = start_requested_profiler()
+    stage_metrics.start_rerun()
+
+    # st.stop() and st.rerun() end the script with an exception, and every
+    # session state access raises it again, so the finally block below reads
+    # the tags collected here and at the end of the rerun.
+    tags = rerun_tags()
+    try:
+        st.title("E-Commerce Sales Dashboard")
+
+        if not st.session_state["logged_in"]:
+            restore_session()
+        write_session_cookie()
+        if not st.session_state["logged_in"]:
+            preload_dataset(config.DATA_DIR, on_loaded=start_background_services)
+            render_login_tab()
         else:
-            render_tabs(filtered_df)
+            schema = load_and_prepare_data(config.DATA_DIR)
+            warmer = start_background_services(schema)
+            # The rerun reads one version of the fact rows and aggregates,
+            # while rows keep being appended to the shared schema.
+            schema = schema.pinned()
+            available_countries = schema.present_labels(schema.fact, "Country")
+            available_categories = schema.present_labels(schema.fact, "Category")
+            dataset_min_date = schema.fact["Order.Date"].min().date()
+            dataset_max_date = schema.fact["Order.Date"].max().date()
+
+            render_sidebar_profile()
+            render_sidebar_data_status(schema)
+            render_sidebar_cache_status(warmer)
+            render_sidebar_filters_and_chatbot()
+            render_logout_button()
+            view = filter_data(schema)
+            if view.fact.empty:
+                st.warning("No data found for the selected filters.")
+            else:
+                render_tabs(view)
+
+            if config.DEBUG_COPIES:
+                render_sidebar_copy_report()
+        tags = rerun_tags()
+    finally:
+        records = stage_metrics.finish_rerun(tags)
+        if profiler is not None:
+            profile = profiler.stop(config.PROFILE_DIR, tags)
+    if profiler is not None:
+        st.session_state["last_profile"] = profile
+    if st.session_state["logged_in"] and st.session_state["role"] == "admin":
+        render_sidebar_metrics(records)
+        render_sidebar_profiling()
+        render_sidebar_memory(schema)
@@ -1,6 +1,3 @@
-from prophet import Prophet
-
-
 def forecast_sales_prophet(data, periods=30):
     """
     Forecast future sales using the Prophet model.
@@ -12,6 +9,8 @@ def forecast_sales_prophet(data, periods=30):
     Returns:
         pd.DataFrame: A DataFrame with the forecasted sales.
     """
+    from prophet import Prophet
+
     model = Prophet()
     model.fit(data)
 
@@ -0,0 +1,236 @@
+"""
+Headless weekly report pack: evaluates the dashboard tab outputs for many
+country x category filter combinations in a process pool and writes every
+aggregate as Parquet and every figure as static HTML.
+
+Usage:
+    PYTHONPATH=. python -m scripts.reports.generate_reports --output-dir reports
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import time
+from itertools import product
+from pathlib import Path
+
+import pandas as pd
+
+from app import config
+from app.utils.dataset import register_default_aggregates
+from app.utils.star_schema import load_star_schema
+from app.utils.view import FilteredView
+
+ALL = "All"
+
+# Set in the parent before the pool forks so workers share its pages.
+_schema = None
+
+
+def load_report_dataset(data_dir):
+    """
+    Load a static snapshot of the dataset; reports don't need live ingestion.
+    """
+    config.configure_pandas()
+    schema = load_star_schema(data_dir)
+    register_default_aggregates(schema)
+    return schema
+
+
+def _init_worker(data_dir):
+    global _schema
+    if _schema is None:
+        _schema = load_report_dataset(data_dir)
+
+
+# (file name, output name, output parameters, figure name, figure parameters)
+REPORT_OUTPUTS = [
+    ("sales_kpis", "sales_kpis", {}, None, {}),
+    ("sales_over_time", "sales_over_time", {}, "sales_over_time_chart", {}),
+    (
+        "sales_by_category",
+        "sales_by",
+        {"column": "Category"},
+        "category_sales_chart",
+        {},
+    ),
+    ("sales_by_country", "sales_by", {"column": "Country"}, "country_sales_chart", {}),
+    (
+        "top_products",
+        "top_products",
+        {"value_column": "Sales"},
+        "top_products_chart",
+        {"value_column": "Sales"},
+    ),
+    (
+        "top_profitable_products",
+        "top_products",
+        {"value_column": "Profit"},
+        "top_products_chart",
+        {"value_column": "Profit"},
+    ),
+    ("category_treemap", "category_treemap", {}, "category_treemap_chart", {}),
+    ("seasonal_sales", "seasonal_sales", {}, "seasonal_sales_chart", {}),
+    ("top_customers", "top_customers", {}, "top_customers_chart", {}),
+    ("customer_rfm", "customer_rfm", {}, "segment_pie", {}),
+    ("sales_heatmap", "sales_heatmap", {}, "sales_heatmap_chart", {}),
+    ("region_sales", "region_sales", {}, "region_sales_chart", {}),
+    ("shipping_costs", "shipping_costs", {}, "shipping_costs_chart", {}),
+    ("region_profit", "region_profit", {}, "region_profit_chart", {}),
+    (
+        "region_monthly_sales",
+        "region_monthly_sales",
+        {},
+        "region_seasonality_chart",
+        {},
+    ),
+    ("order_frequency", "order_frequency", {}, "order_frequency_histogram", {}),
+    ("order_value", "order_value", {}, "order_value_histogram", {}),
+]
+
+
+def build_outputs(schema, country, category, date_range, with_figures=True):
+    """
+    Compute the tab outputs for one filter combination.
+
+    Parameters:
+        schema (StarSchema): The loaded star schema.
+        country (str): A country, or "All".
+        category (str): A category, or "All".
+        date_range (tuple): Inclusive (start, end) dates.
+        with_figures (bool): Whether to build Plotly figures as well.
+
+    Returns:
+        dict: File name -> (DataFrame, figure or None). Empty if the
+        combination matches no rows.
+    """
+    view = FilteredView(
+        schema,
+        countries=[] if country == ALL else [country],
+        categories=[] if category == ALL else [category],
+        date_range=date_range,
+    )
+    if view.fact.empty:
+        return {}
+
+    outputs = {}
+    for file_name, output_name, params, figure_name, figure_params in REPORT_OUTPUTS:
+        frame = view.output(output_name, **params)
+        if isinstance(frame, dict):
+            frame = pd.DataFrame([frame])
+        if "Segment" in frame:
+            frame = frame.astype({"Segment": str})
+        figure = None
+        if with_figures and figure_name:
+            figure = view.figure(figure_name, **figure_params)
+        outputs[file_name] = (frame, figure)
+    return outputs
+
+
+def slugify(value):
+    return re.sub(r"[^A-Za-z0-9]+", "-", value).strip("-").lower()
+
+
+def run_combination(task):
+    """
+    Compute and write the outputs of one combination inside a worker.
+
+    Parameters:
+        task (tuple): (country, category, date_range, output_dir, with_figures).
+
+    Returns:
+        dict: Timing record for the combination.
+    """
+    country, category, date_range, output_dir, with_figures = task
+    started = time.perf_counter()
+    outputs = build_outputs(_schema, country, category, date_range, with_figures)
+    computed = time.perf_counter()
+
+    target = Path(output_dir) / f"{slugify(country)}__{slugify(category)}"
+    if outputs:
+        target.mkdir(parents=True, exist_ok=True)
+    for name, (frame, figure) in outputs.items():
+        frame.to_parquet(target / f"{name}.parquet", index=False)
+        if figure is not None:
+            figure.write_html(target / f"{name}.html", include_plotlyjs="cdn")
+    finished = time.perf_counter()
+
+    return {
+        "country": country,
+        "category": category,
+        "outputs": len(outputs),
+        "compute_seconds": computed - started,
+        "write_seconds": finished - computed,
+        "total_seconds": finished - started,
+        "worker": os.getpid(),
+    }
+
+
+def main():
+    global _schema
+
+    parser = argparse.ArgumentParser(description="Generate the headless report pack.")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--data-dir", default=config.DATA_DIR)
+    parser.add_argument("--countries", nargs="*", help="Defaults to every country.")
+    parser.add_argument("--categories", nargs="*", help="Defaults to every category.")
+    parser.add_argument("--start", help="Start date (defaults to the first order).")
+    parser.add_argument("--end", help="End date (defaults to the last order).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--no-figures", action="store_true")
+    args = parser.parse_args()
+
+    loaded = time.perf_counter()
+    _schema = load_report_dataset(args.data_dir)
+    load_seconds = time.perf_counter() - loaded
+
+    dates = _schema.fact["Order.Date"]
+    date_range = (
+        pd.Timestamp(args.start) if args.start else dates.min(),
+        pd.Timestamp(args.end) if args.end else dates.max(),
+    )
+    countries = [ALL] + (
+        args.countries or sorted(_schema.present_labels(_schema.fact, "Country"))
+    )
+    categories = [ALL] + (
+        args.categories or sorted(_schema.present_labels(_schema.fact, "Category"))
+    )
+    tasks = [
+        (country, category, date_range, args.output_dir, not args.no_figures)
+        for country, category in product(countries, categories)
+    ]
+
+    # Fork where available so workers inherit the loaded dataset instead of
+    # re-reading the CSVs.
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    started = time.perf_counter()
+    with context.Pool(
+        args.workers, initializer=_init_worker, initargs=(args.data_dir,)
+    ) as pool:
+        timings = pool.map(run_combination, tasks, chunksize=4)
+    elapsed = time.perf_counter() - started
+
+    timings = pd.DataFrame(timings)
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timings.to_csv(output_dir / "timings.csv", index=False)
+    summary = {
+        "combinations": len(tasks),
+        "non_empty_combinations": int((timings["outputs"] > 0).sum()),
+        "workers": args.workers,
+        "load_seconds": load_seconds,
+        "wall_seconds": elapsed,
+        "combinations_per_second": len(tasks) / elapsed,
+        "p50_seconds": timings["total_seconds"].quantile(0.5),
+        "p95_seconds": timings["total_seconds"].quantile(0.95),
+        "max_seconds": timings["total_seconds"].max(),
+    }
+    (output_dir / "summary.json").write_text(json.dumps(summary, indent=2))
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
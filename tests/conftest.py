@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import config
+from app.utils.star_schema import (
+    CUSTOMER_ATTRIBUTES,
+    FACT_COLUMNS,
+    MONEY_COLUMNS,
+    PRODUCT_ATTRIBUTES,
+    StarSchema,
+)
+
+config.configure_pandas()
+
+LINE_DEFAULTS = {
+    "Customer.Name": "Customer",
+    "Country": "Germany",
+    "City": "Berlin",
+    "Product Name": "Product",
+    "Category": "Technology",
+    "Sub-Category": "Phones",
+    "Order.Date": "2023-01-01",
+    "Sales": 10.0,
+    "Profit": 1.0,
+    "Shipping.Cost": 0.5,
+    "Ship.Mode": "Standard Class",
+}
+
+
+def merged_lines(lines):
+    """
+    Fill in the merged-data columns a test does not care about.
+
+    Parameters:
+        lines (list of dict): Order lines with at least "Order.ID",
+            "Customer.ID" and "Product.ID".
+
+    Returns:
+        pd.DataFrame: The lines in the merged layout.
+    """
+    frame = pd.DataFrame([{**LINE_DEFAULTS, **line} for line in lines])
+    frame["Order.Date"] = pd.to_datetime(frame["Order.Date"])
+    return frame
+
+
+def fact_rows(schema, merged):
+    """
+    Resolve merged lines to fact rows of `schema`, whose dimensions must
+    already hold their customers and products.
+    """
+    customer_codes = pd.Index(schema.customers["Customer.ID"]).get_indexer(
+        merged["Customer.ID"]
+    )
+    product_codes = pd.MultiIndex.from_frame(
+        schema.products[PRODUCT_ATTRIBUTES]
+    ).get_indexer(pd.MultiIndex.from_frame(merged[PRODUCT_ATTRIBUTES]))
+    assert (customer_codes >= 0).all() and (product_codes >= 0).all()
+    return pd.DataFrame(
+        {
+            "Order.ID": merged["Order.ID"].to_numpy(),
+            "Customer.Code": customer_codes.astype(np.int32),
+            "Product.Code": product_codes.astype(np.int32),
+            "Order.Date": merged["Order.Date"].to_numpy(),
+            **{column: merged[column].to_numpy() for column in MONEY_COLUMNS},
+            "Ship.Mode": merged["Ship.Mode"].astype("category"),
+        }
+    )[FACT_COLUMNS]
+
+
+def build_schema(lines):
+    """
+    Build a star schema from order lines, with one dimension row per distinct
+    customer and per distinct product attribute combination.
+    """
+    merged = merged_lines(lines)
+    customers = merged[CUSTOMER_ATTRIBUTES].drop_duplicates("Customer.ID")
+    products = merged[PRODUCT_ATTRIBUTES].drop_duplicates()
+    schema = StarSchema(
+        None, customers.reset_index(drop=True), products.reset_index(drop=True)
+    )
+    schema.fact = fact_rows(schema, merged)
+    return schema
+
+
+@pytest.fixture
+def make_schema():
+    return build_schema
+
+
+@pytest.fixture(scope="session")
+def bundled_schema():
+    """The star schema of the bundled data, without aggregates."""
+    from app.utils.star_schema import load_star_schema
+
+    return load_star_schema("data")
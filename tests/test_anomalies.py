@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.anomalies import detect_anomalies, period_totals, robust_scores
+from app.utils.materialized import PrefixSums
+from app.utils.view import FilteredView
+
+START = pd.Timestamp("2023-01-01")
+SEGMENTS = [
+    ("Germany", "Technology"),
+    ("Germany", "Furniture"),
+    ("France", "Technology"),
+    ("France", "Furniture"),
+]
+SPIKE_WEEK = 12
+DROP_WEEK = 15
+
+
+@pytest.fixture
+def steady_sales(make_schema):
+    """
+    20 weeks of noisy daily sales in four segments, with one spike in German
+    technology and one week without French furniture sales.
+    """
+    rng = np.random.default_rng(0)
+    lines = []
+    for day in range(140):
+        for segment, (country, category) in enumerate(SEGMENTS):
+            if (country, category) == ("France", "Furniture") and day // 7 == DROP_WEEK:
+                continue
+            sales = float(rng.normal(100, 10))
+            if segment == 0 and day == 7 * SPIKE_WEEK + 3:
+                sales += 3000
+            lines.append(
+                {
+                    "Order.ID": len(lines),
+                    "Customer.ID": country,
+                    "Country": country,
+                    "Product.ID": category,
+                    "Category": category,
+                    "Order.Date": START + pd.Timedelta(days=day),
+                    "Sales": sales,
+                }
+            )
+    schema = make_schema(lines)
+    schema.register_aggregate(
+        "prefix_sums", PrefixSums(["Sales", "Profit"], count_column="Lines")
+    )
+    return schema
+
+
+def week_ending(week):
+    return START + pd.Timedelta(days=7 * week + 6)
+
+
+def test_period_totals_sum_whole_periods_ending_on_the_last_day():
+    daily = np.arange(1, 11, dtype=float)[None, :]
+    cumulative = np.pad(np.cumsum(daily, axis=1), ((0, 0), (1, 0)))
+
+    ends, totals = period_totals(cumulative, period=3)
+
+    assert ends.tolist() == [3, 6, 9]
+    # The first day does not fill a period and is dropped.
+    assert totals.tolist() == [[2 + 3 + 4, 5 + 6 + 7, 8 + 9 + 10]]
+
+
+def test_robust_scores_match_a_per_window_median():
+    rng = np.random.default_rng(1)
+    values = rng.poisson(50, size=(3, 20)).astype(float)
+    median, scores = robust_scores(values, window=5)
+
+    roots = np.sqrt(values)
+    for series in range(3):
+        for period in range(15):
+            baseline = roots[series, period : period + 5]
+            center = np.median(baseline)
+            scale = max(1.4826 * np.median(np.abs(baseline - center)), 0.25 * center)
+            assert median[series, period] == pytest.approx(center**2)
+            assert scores[series, period] == pytest.approx(
+                (roots[series, period + 5] - center) / scale
+            )
+
+
+def test_detect_anomalies_flags_the_spike_and_the_missing_week(steady_sales):
+    anomalies = detect_anomalies(steady_sales.aggregates["prefix_sums"])
+
+    flagged = anomalies[["Week Ending", "Country", "Category"]]
+    assert flagged.values.tolist() == [
+        [week_ending(DROP_WEEK), "France", "Furniture"],
+        [week_ending(SPIKE_WEEK), "Germany", "Technology"],
+    ]
+    drop, spike = anomalies.to_dict("records")
+    assert drop["Sales"] == 0 and drop["Change"] == -1
+    assert spike["Sales"] > 3000 and spike["Score"] > 3.5
+
+
+def test_sales_anomalies_follow_the_view_filters(steady_sales):
+    everything = FilteredView(steady_sales).output("sales_anomalies")
+    assert len(everything) == 2
+
+    german = FilteredView(steady_sales, countries=["Germany"]).output("sales_anomalies")
+    assert german["Week Ending"].tolist() == [week_ending(SPIKE_WEEK)]
+    before_drop = FilteredView(
+        steady_sales, date_range=(START, week_ending(DROP_WEEK - 1))
+    ).output("sales_anomalies")
+    assert before_drop["Country"].tolist() == ["Germany"]
@@ -0,0 +1,82 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from app import config
+from app.api.server import AggregateRequestHandler, ResponseCache
+from app.utils.dataset import get_dataset
+from app.utils.view import FilteredView
+
+
+@pytest.fixture(scope="module")
+def api():
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(config, "INGEST_INTERVAL", 0)
+        monkeypatch.setattr(AggregateRequestHandler, "cache", ResponseCache())
+        server = ThreadingHTTPServer(("127.0.0.1", 0), AggregateRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+        server.server_close()
+
+
+def get(url, headers=None):
+    request = urllib.request.Request(url, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers.get("ETag"), response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers.get("ETag"), e.read()
+
+
+def test_sales_by_country_matches_the_merged_data(api):
+    status, _, body = get(f"{api}/sales-by-country?country=France&start=2023-01-01")
+    merged = pd.read_csv("data/merged_data.csv", parse_dates=["Order.Date"])
+    selected = merged[
+        (merged["Country"] == "France") & (merged["Order.Date"] >= "2023-01-01")
+    ]
+
+    assert status == 200
+    assert json.loads(body) == [
+        {"Country": "France", "Sales": pytest.approx(selected["Sales"].sum())}
+    ]
+
+
+def test_repeated_requests_are_answered_from_the_etag(api):
+    status, etag, _ = get(f"{api}/top-products?n=3")
+    health = json.loads(get(f"{api}/health")[2])
+
+    assert status == 200
+    assert etag.startswith(f'"{health["version"]}-')
+    assert get(f"{api}/top-products?n=3", {"If-None-Match": etag})[0] == 304
+    assert get(f"{api}/top-products?n=4", {"If-None-Match": etag})[0] == 200
+
+
+def test_bad_requests_are_rejected(api):
+    assert get(f"{api}/top-products?by=Quantity")[0] == 400
+    assert get(f"{api}/sales-by-country?start=garbage")[0] == 400
+    assert get(f"{api}/no-such-endpoint")[0] == 404
+
+
+def test_endpoints_return_the_dashboard_outputs(api):
+    view = FilteredView(
+        get_dataset(config.DATA_DIR),
+        countries=["France"],
+        date_range=("2022-01-01", "2022-12-31"),
+    )
+    query = "country=France&start=2022-01-01&end=2022-12-31"
+
+    products = json.loads(get(f"{api}/top-products?by=Profit&{query}")[2])
+    expected = view.output("top_products", value_column="Profit")
+    assert [row["Product Name"] for row in products] == list(expected["Product Name"])
+    segments = pd.DataFrame(json.loads(get(f"{api}/rfm-segments?{query}")[2]))
+    expected = view.output("customer_rfm").set_index("Customer.Name")["Segment"]
+    assert (
+        segments.set_index("Customer.Name")["Segment"]
+        == expected.reindex(segments["Customer.Name"]).astype(str)
+    ).all()
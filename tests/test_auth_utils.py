@@ -0,0 +1,47 @@
+import os
+
+import bcrypt
+
+from app.utils.auth_utils import SessionTokens, UserStore, check_credentials
+
+
+def write_users(path, users):
+    with open(path, "w", newline="") as file:
+        file.write("username,password,role,name,surname\n")
+        for username, password in users:
+            hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=4))
+            file.write(f"{username},{hashed.decode()},user,Jane,Smith\n")
+
+
+def test_user_store_reloads_only_when_the_file_changes(tmp_path):
+    path = tmp_path / "users.csv"
+    write_users(path, [("jane", "secret")])
+    users = UserStore(str(path))
+    assert users.get("jane")["name"] == "Jane"
+    assert users.get("john") is None
+
+    write_users(path, [("jane", "secret"), ("john", "hunter2")])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert users.get("john") is not None
+
+
+def test_check_credentials(tmp_path):
+    path = tmp_path / "users.csv"
+    write_users(path, [("jane", "secret")])
+    users = UserStore(str(path))
+    assert check_credentials("jane", "secret", users)["username"] == "jane"
+    assert check_credentials("jane", "wrong", users) is None
+    assert check_credentials("nobody", "secret", users) is None
+
+
+def test_session_tokens_resolve_until_revoked_or_expired():
+    tokens = SessionTokens(ttl=60)
+    token = tokens.issue("jane")
+    assert tokens.resolve(token) == "jane"
+    assert tokens.resolve("not-a-token") is None
+    tokens.revoke(token)
+    assert tokens.resolve(token) is None
+
+    expiring = SessionTokens(ttl=0)
+    assert expiring.resolve(expiring.issue("jane")) is None
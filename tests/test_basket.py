@@ -0,0 +1,59 @@
+import pandas as pd
+
+from app.utils.basket import association_rules, basket_matrix
+
+
+def order_lines(order_id, *products):
+    return [
+        {"Order.ID": order_id, "Customer.ID": "A", "Product.ID": product_id, **labels}
+        for product_id, labels in products
+    ]
+
+
+PHONE = ("P1", {"Product Name": "Phone", "Sub-Category": "Phones"})
+PHONE_RELISTED = ("P1", {"Product Name": "Phone, Relisted", "Sub-Category": "Cases"})
+CASE = ("P2", {"Product Name": "Case", "Sub-Category": "Cases"})
+
+
+def test_repeated_product_rows_make_no_rules(make_schema):
+    schema = make_schema(
+        order_lines(1, PHONE, PHONE_RELISTED) + order_lines(2, PHONE, PHONE_RELISTED)
+    )
+    for level in ["Product", "Sub-Category"]:
+        matrix, labels = basket_matrix(schema.fact, schema, level)
+        assert matrix.sum() == 2
+        assert association_rules(matrix, labels, min_support=0).empty
+
+
+def test_rules_from_distinct_products(make_schema):
+    lines = []
+    for order_id in range(1, 4):
+        lines += order_lines(order_id, PHONE, CASE, CASE)
+    lines += order_lines(4, PHONE)
+    schema = make_schema(lines)
+    matrix, labels = basket_matrix(schema.fact, schema)
+    rules = association_rules(matrix, labels, min_support=0.5)
+    rules = rules.set_index(["Antecedent", "Consequent"])
+    assert rules["Orders"].to_dict() == {("Phone", "Case"): 3, ("Case", "Phone"): 3}
+    assert rules.loc[("Phone", "Case"), "Confidence"] == 0.75
+    assert rules.loc[("Case", "Phone"), "Confidence"] == 1.0
+    assert rules.loc[("Case", "Phone"), "Lift"] == 1.0
+    assert rules.loc[("Phone", "Case"), "Support"] == 0.75
+
+
+def test_min_orders_floor(make_schema):
+    lines = []
+    for order_id in range(1, 3):
+        lines += order_lines(order_id, PHONE, CASE)
+    schema = make_schema(lines)
+    matrix, labels = basket_matrix(schema.fact, schema)
+    assert len(association_rules(matrix, labels, min_support=0.0001)) == 2
+    assert association_rules(matrix, labels, min_support=0.0001, min_orders=3).empty
+
+
+def test_bundled_data_has_no_rules(bundled_schema):
+    for level in ["Product", "Sub-Category"]:
+        matrix, labels = basket_matrix(bundled_schema.fact, bundled_schema, level)
+        assert matrix.sum() == bundled_schema.fact["Order.ID"].nunique()
+        rules = association_rules(matrix, labels, min_support=0.0001)
+        assert isinstance(rules, pd.DataFrame) and rules.empty
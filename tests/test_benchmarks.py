@@ -0,0 +1,49 @@
+from app.utils.star_schema import load_star_schema
+from benchmarks.run import compare
+from benchmarks.suite import uncovered_functions
+from benchmarks.synthetic import generate_dataset
+
+
+def test_synthetic_data_scales_orders_and_customers(tmp_path, bundled_schema):
+    description = generate_dataset(tmp_path / "a", scale=2)
+    again = generate_dataset(tmp_path / "b", scale=2)
+    schema = load_star_schema(tmp_path / "a")
+    source_orders = bundled_schema.fact["Order.ID"].nunique()
+
+    assert description["orders"] == 2 * source_orders
+    assert description["customers"] == 2 * len(bundled_schema.customers)
+    assert len(schema.fact) == description["rows"]
+    assert schema.fact["Order.ID"].nunique() == description["orders"]
+    assert (tmp_path / "a" / "orders.csv").read_bytes() == (
+        tmp_path / "b" / "orders.csv"
+    ).read_bytes()
+    assert again == description
+
+
+def test_compare_flags_regressions_beyond_threshold_and_noise():
+    def timings(**medians):
+        return {
+            "scales": {
+                "1": {
+                    "benchmarks": {
+                        name: {"median": median, "threshold": None}
+                        for name, median in medians.items()
+                    }
+                }
+            }
+        }
+
+    baseline = timings(slow=1.0, fast=1.0, noisy=0.001, steady=1.0)
+    current = timings(slow=1.5, fast=0.5, noisy=0.005, steady=1.1)
+    statuses = compare(current, baseline).set_index("Benchmark")["Status"]
+
+    assert statuses.to_dict() == {
+        "slow": "regression",
+        "fast": "improvement",
+        "noisy": "ok",
+        "steady": "ok",
+    }
+
+
+def test_every_data_function_is_benchmarked():
+    assert uncovered_functions() == []
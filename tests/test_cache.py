@@ -0,0 +1,70 @@
+import numpy as np
+
+from app.utils.cache import ComputationCache, computation_cache
+from app.utils.view import FilteredView
+
+
+def array(kilobytes):
+    return np.zeros(kilobytes * 128)
+
+
+def test_evicts_least_recently_used_by_bytes():
+    cache = ComputationCache(max_bytes=3 * 1024)
+    for name in "abc":
+        cache.get_or_compute(name, 0, lambda: array(1))
+    cache.get_or_compute("a", 0, lambda: array(1))  # a is now most recent
+    cache.get_or_compute("d", 0, lambda: array(1))
+    assert cache.size_bytes() == 3 * 1024
+    assert not cache.contains("b", 0)
+    assert all(cache.contains(name, 0) for name in "acd")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_value_larger_than_budget_is_not_cached():
+    cache = ComputationCache(max_bytes=1024)
+    cache.get_or_compute("small", 0, lambda: array(1))
+    value = cache.get_or_compute("large", 0, lambda: array(2))
+    assert len(value) == 256
+    assert not cache.contains("large", 0)
+    assert cache.contains("small", 0)
+
+
+def test_newer_version_drops_older_entries():
+    cache = ComputationCache()
+    cache.get_or_compute("a", 0, lambda: array(1))
+    cache.get_or_compute("a", 1, lambda: array(2))
+    assert not cache.contains("a", 0)
+    assert cache.size_bytes() == 2 * 1024
+    assert [key for key, _ in cache.entry_sizes()] == ["a"]
+
+
+def test_views_cache_outputs_but_not_fact_rows(make_schema):
+    schema = make_schema(
+        [
+            {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1"},
+            {"Order.ID": 2, "Customer.ID": "B", "Product.ID": "P2"},
+        ]
+    )
+    cache = ComputationCache()
+    view = FilteredView(schema, countries=["Germany"], cache=cache)
+    assert len(view.fact) == 2
+    view.output("sales_heatmap")
+    stages = {key[0] for key, _ in cache.entry_sizes()}
+    assert stages == {"output:sales_heatmap"}
+
+
+def test_schemas_at_the_same_version_do_not_share_entries(make_schema):
+    first = make_schema([{"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1"}])
+    second = make_schema(
+        [{"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1", "Sales": 99.0}]
+    )
+    assert first.version == second.version
+
+    for schema, sales in [(first, 10.0), (second, 99.0), (first, 10.0)]:
+        heatmap = FilteredView(schema).output("sales_heatmap")
+        assert heatmap["Sales"].tolist() == [sales]
+    assert computation_cache.contains(
+        ("output:sales_heatmap", ((), (), None), ()),
+        first.version,
+        source=first.cache_token,
+    )
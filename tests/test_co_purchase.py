@@ -0,0 +1,46 @@
+from app.tabs.computations import co_purchase_network
+from app.utils.co_purchase import co_purchase_edges, co_purchase_matrix
+from app.utils.view import FilteredView
+
+
+def test_single_product_order_has_no_edges(make_schema):
+    # One product listed under two names joins to two lines of one order.
+    schema = make_schema(
+        [
+            {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1"},
+            {
+                "Order.ID": 1,
+                "Customer.ID": "A",
+                "Product.ID": "P1",
+                "Product Name": "Product, Other Name",
+            },
+        ]
+    )
+    matrix, labels = co_purchase_matrix(schema.fact, schema)
+    assert list(labels) == ["P1"]
+    assert matrix.nnz == 0
+    assert co_purchase_edges(matrix).empty
+
+
+def test_edges_count_distinct_orders_by_product_id(make_schema):
+    lines = [
+        {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1"},
+        {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P2"},
+        {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P2"},
+        {"Order.ID": 2, "Customer.ID": "B", "Product.ID": "P1"},
+        {
+            "Order.ID": 2,
+            "Customer.ID": "B",
+            "Product.ID": "P2",
+            "Product Name": "Product, Other Name",
+        },
+        {"Order.ID": 3, "Customer.ID": "B", "Product.ID": "P3"},
+    ]
+    network = co_purchase_network(FilteredView(make_schema(lines)))
+    assert network[["Source", "Target", "Orders"]].values.tolist() == [["P1", "P2", 2]]
+    assert network["Source Product"].tolist() == ["Product"]
+
+
+def test_bundled_orders_have_one_product_each(bundled_schema):
+    matrix, _ = co_purchase_matrix(bundled_schema.fact, bundled_schema)
+    assert matrix.nnz == 0
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.tabs.computations import comparison_window
+from app.utils.materialized import MaterializedAggregate
+from app.utils.view import FilteredView
+
+
+@pytest.fixture
+def two_years(make_schema):
+    """Daily lines over 2022 and 2023 in two countries, with daily sales."""
+    rng = np.random.default_rng(0)
+    days = pd.date_range("2022-01-01", "2023-12-31", freq="D")
+    schema = make_schema(
+        [
+            {
+                "Order.ID": line,
+                "Customer.ID": f"C{line % 2}",
+                "Country": ["Germany", "France"][line % 2],
+                "Product.ID": "P1",
+                "Order.Date": day,
+                "Sales": float(rng.integers(1, 100)),
+            }
+            for line, day in enumerate(days.repeat(2))
+        ]
+    )
+    schema.register_aggregate(
+        "daily_sales",
+        MaterializedAggregate(
+            ["Order.Date", "Country", "Category"],
+            ["Sales", "Profit"],
+            count_column="Lines",
+        ),
+    )
+    return schema
+
+
+def test_comparison_windows():
+    date_range = (pd.Timestamp("2023-03-01"), pd.Timestamp("2023-03-10"))
+
+    assert comparison_window(date_range, "Previous period") == (
+        (pd.Timestamp("2023-02-19"), pd.Timestamp("2023-02-28")),
+        pd.Timedelta(days=10),
+    )
+    window, offset = comparison_window(date_range, "Last year")
+    assert window == (pd.Timestamp("2022-03-01"), pd.Timestamp("2022-03-10"))
+    assert date_range[0] - offset == window[0]
+    with pytest.raises(ValueError):
+        comparison_window(date_range, "Next week")
+
+
+@pytest.mark.parametrize(
+    "date_range, comparison",
+    [
+        (("2023-03-01", "2023-03-31"), "Previous period"),
+        (("2023-02-01", "2023-02-28"), "Last year"),
+        (("2022-06-01", "2023-01-31"), "Previous period"),
+        # Longer than a year, so both windows hold 2022-01-15 to 2022-01-31.
+        (("2022-01-15", "2023-01-31"), "Last year"),
+    ],
+)
+def test_sales_comparison_matches_both_windows(two_years, date_range, comparison):
+    view = FilteredView(two_years, countries=["France"], date_range=date_range)
+    sales = view.output("sales_comparison", comparison=comparison)
+    wide = two_years.materialize(two_years.fact)
+    daily = wide[wide["Country"] == "France"].groupby("Order.Date")["Sales"].sum()
+
+    window, offset = comparison_window(view.date_range, comparison)
+    for name, (start, end) in [("Current", view.date_range), (comparison, window)]:
+        rows = sales[sales["Window"] == name]
+        expected = daily[start:end]
+        assert rows["Order Date"].tolist() == expected.index.tolist()
+        np.testing.assert_allclose(rows["Sales"], expected.to_numpy())
+    shifted = sales[sales["Window"] == comparison]
+    assert (shifted["Date"] == shifted["Order Date"] + offset).all()
+
+    kpis = view.output("comparison_kpis", comparison=comparison)
+    assert kpis.index.tolist() == ["Current", comparison]
+    assert kpis.loc["Current", "Total Sales"] == pytest.approx(
+        daily[view.date_range[0] : view.date_range[1]].sum()
+    )
+    assert kpis.loc[comparison, "Total Sales"] == pytest.approx(
+        daily[window[0] : window[1]].sum()
+    )
+    assert kpis.loc[comparison, "Order Lines"] == len(daily[window[0] : window[1]])
+
+
+def test_sales_comparison_needs_a_date_range(two_years):
+    view = FilteredView(two_years)
+    assert view.output("sales_comparison", comparison="Last year") is None
+    assert view.output("comparison_kpis", comparison="Last year") is None
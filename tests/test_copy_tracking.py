@@ -0,0 +1,88 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pandas.core.internals.blocks import Block
+from pandas.core.internals.managers import BlockManager
+
+from app.utils import copy_tracking
+from app.utils.copy_tracking import CopyCounter, pandas_supported
+
+
+@pytest.fixture(autouse=True)
+def restore_pandas_internals(monkeypatch):
+    # Installing a counter wraps these for the whole process.
+    monkeypatch.setattr(Block, "copy", Block.copy)
+    monkeypatch.setattr(
+        BlockManager, "_iset_split_block", BlockManager._iset_split_block
+    )
+
+
+def test_counts_deep_copies_on_a_supported_pandas(monkeypatch):
+    monkeypatch.setattr(copy_tracking, "pandas_supported", lambda: True)
+    counter = CopyCounter()
+    frame = pd.DataFrame({"a": range(1000), "b": 1.0})
+
+    assert counter.install()
+    counter.reset()
+    frame.copy()
+    assert counter.snapshot() == {"copies": 2, "bytes": 16000}
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        lambda frame: frame.__setitem__("a", 0.5),
+        lambda frame: frame.loc.__setitem__((slice(0, 9), "a"), 5),
+    ],
+    ids=["replace column", "set values"],
+)
+def test_counts_the_block_split_before_a_shared_write(monkeypatch, write):
+    monkeypatch.setattr(copy_tracking, "pandas_supported", lambda: True)
+    counter = CopyCounter()
+    assert counter.install()
+
+    with pd.option_context("mode.copy_on_write", True):
+        frame = pd.DataFrame({column: range(1000) for column in "abc"})
+        shared = frame[:]
+        counter.reset()
+        write(frame)
+
+    # The whole int64 block of three columns is split, whichever column is
+    # written and whether or not pandas passes the new values along.
+    assert counter.snapshot() == {"copies": 1, "bytes": 3 * 8000}
+    assert shared["a"].iloc[0] == 0
+
+
+def test_stays_off_on_other_pandas_releases(monkeypatch):
+    original = Block.copy
+    monkeypatch.setattr(copy_tracking, "pandas_supported", lambda: False)
+    counter = CopyCounter()
+
+    assert not counter.install()
+    assert not counter.installed
+    assert Block.copy is original
+
+
+def test_pandas_version_check():
+    assert pandas_supported("2.1.1")
+    assert pandas_supported("2.2.3")
+    assert not pandas_supported("3.0.0")
+    assert not pandas_supported("2.0.3")
+
+
+def test_importing_the_schema_leaves_pandas_options_alone():
+    code = (
+        "import pandas as pd, app.utils.star_schema, app.utils.copy_tracking; "
+        "print(pd.get_option('mode.copy_on_write'))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,35 @@
+import datetime
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from app import config
+from app.utils.metrics import stage_metrics
+
+
+@pytest.fixture
+def dashboard(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "INGEST_INTERVAL", 0)
+    monkeypatch.setattr(config, "WARM_ENABLED", False)
+    monkeypatch.setattr(config, "API_PORT", 0)
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    app = AppTest.from_file("dashboard.py", default_timeout=120)
+    app.session_state["logged_in"] = True
+    app.session_state["role"] = "admin"
+    return app
+
+
+def test_stopped_rerun_still_records_metrics_and_profile(dashboard, tmp_path):
+    day = datetime.date(2023, 1, 1)
+    dashboard.session_state["date_range"] = [day, day]
+    dashboard.session_state["profile_next_rerun"] = True
+    reruns = stage_metrics._totals["rerun"]
+
+    dashboard.run()
+
+    assert not dashboard.exception
+    assert [w.value for w in dashboard.warning] == [
+        "Start date and end date cannot be the same."
+    ]
+    assert stage_metrics._totals["rerun"] == reruns + 1
+    assert list(tmp_path.iterdir())
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_report_pack_covers_every_combination(tmp_path):
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "scripts.reports.generate_reports",
+            "--output-dir",
+            str(tmp_path),
+            "--countries",
+            "France",
+            "Atlantis",
+            "--categories",
+            "Technology",
+            "--workers",
+            "2",
+            "--no-figures",
+        ],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        check=True,
+        capture_output=True,
+    )
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    timings = pd.read_csv(tmp_path / "timings.csv")
+    merged = pd.read_csv(ROOT / "data/merged_data.csv")
+    france = merged[merged["Country"] == "France"]
+    report = pd.read_parquet(tmp_path / "france__all" / "sales_by_category.parquet")
+
+    # (All, France, Atlantis) x (All, Technology); Atlantis has no rows.
+    assert summary["combinations"] == 6
+    assert summary["non_empty_combinations"] == 4
+    assert len(timings) == 6
+    assert not (tmp_path / "atlantis__all").exists()
+    assert not list(tmp_path.glob("*/*.html"))
+    pd.testing.assert_series_equal(
+        report.set_index("Category")["Total Sales"],
+        france.groupby("Category")["Sales"].sum(),
+        check_names=False,
+    )
@@ -0,0 +1,105 @@
+import os
+import shutil
+import time
+
+import pandas as pd
+import pytest
+
+from app.utils.ingestion import StreamingIngestor
+from app.utils.star_schema import load_star_schema
+
+LINES = [{"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1"}]
+
+HEADERS = {
+    "orders.csv": "Order.ID,Customer.ID,Product.ID,Order.Date\n",
+    "sales.csv": "Order.ID,Sales,Profit,Shipping.Cost,Ship.Mode\n",
+    "customers.csv": "Customer.ID,Customer.Name,Country,City\n",
+    "products.csv": "Product.ID,Product Name,Category,Sub-Category\n",
+}
+
+
+@pytest.fixture
+def ingest(tmp_path, make_schema):
+    for name, header in HEADERS.items():
+        (tmp_path / name).write_text(header)
+    schema = make_schema(LINES)
+    ingestor = StreamingIngestor(schema, tmp_path, pending_ttl=60, pending_rows=2)
+
+    def write(name, *rows):
+        with open(tmp_path / name, "a") as handle:
+            handle.writelines(row + "\n" for row in rows)
+
+    return schema, ingestor, write
+
+
+def test_matched_orders_and_sales_are_appended(ingest):
+    schema, ingestor, write = ingest
+    write("orders.csv", "2,A,P1,2023-02-01", "3,Z,P1,2023-02-01")
+    write("sales.csv", "2,50.0,5.0,1.0,First Class", "3,1,1,1,First Class")
+
+    assert ingestor.poll() == 1
+    assert schema.version == 1
+    assert schema.fact["Order.ID"].tolist() == [1, 2]
+    assert schema.fact["Ship.Mode"].tolist() == ["Standard Class", "First Class"]
+    assert ingestor.stats.rows_rejected == {"unknown customer": 1}
+
+
+def test_known_dimension_rows_are_not_appended_again(ingest):
+    schema, ingestor, write = ingest
+    write("customers.csv", "A,Customer,Germany,Berlin", "B,New,France,Paris")
+    write(
+        "products.csv",
+        "P1,Product,Technology,Phones",
+        "P1,Product,Technology,Phones",
+        "P2,New,Furniture,Chairs",
+    )
+    ingestor.poll()
+
+    assert schema.customers["Customer.ID"].tolist() == ["A", "B"]
+    assert schema.products["Product.ID"].tolist() == ["P1", "P2"]
+
+
+def test_unmatched_rows_expire_and_overflow_is_capped(ingest):
+    schema, ingestor, write = ingest
+    write("orders.csv", "7,A,P1,2023-02-01")
+    stale = time.time() - 120
+    os.utime(ingestor.orders.path, (stale, stale))
+    write("sales.csv", "4,1,1,1,First Class", "5,1,1,1,First Class")
+    write("sales.csv", "6,1,1,1,First Class")
+
+    assert ingestor.poll() == 0
+    assert ingestor.pending_orders.empty
+    assert ingestor.pending_sales["Order.ID"].tolist() == [5, 6]
+    assert ingestor.stats.rows_rejected == {
+        "orders: no match within 60 s": 1,
+        "sales: pending buffer full": 1,
+    }
+    assert len(schema.fact) == 1
+
+
+def test_rows_ingested_before_a_restart_are_appended_again(tmp_path):
+    shutil.copytree("data", tmp_path, dirs_exist_ok=True)
+    schema = load_star_schema(tmp_path)
+    loaded = len(schema.fact)
+    ingestor = StreamingIngestor(schema, tmp_path)
+    assert ingestor.poll() == 0
+    with open(tmp_path / "orders.csv", "a") as handle:
+        handle.write("999001,LS-172304,OFF-PA-10002005,2023-12-30\n")
+        handle.write("999002,LS-172304,OFF-PA-10002005,2023-12-31\n")
+    with open(tmp_path / "sales.csv", "a") as handle:
+        handle.write("999001,100.0,10.0,1.0,First Class\n")
+    appended = ingestor.poll()
+    assert appended > 0
+
+    restarted = load_star_schema(tmp_path)
+    assert len(restarted.fact) == loaded
+    ingestor = StreamingIngestor(restarted, tmp_path)
+
+    assert ingestor.poll() == appended
+    pd.testing.assert_frame_equal(
+        restarted.fact.iloc[loaded:].reset_index(drop=True),
+        schema.fact.iloc[loaded:].reset_index(drop=True),
+        check_categorical=False,
+    )
+    assert ingestor.pending_orders["Order.ID"].tolist() == [999002]
+    assert ingestor.stats.rows_rejected == {}
@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.load_test import AnalystSession, latency_summary
+
+ROOT = Path(__file__).resolve().parents[1]
+CREDENTIALS = ("user1", "password1")
+
+
+def test_session_plans_replay_from_the_seed():
+    first, again, other = (
+        AnalystSession(index, seed=7, actions=20, think=1.0, credentials=CREDENTIALS)
+        for index in [0, 0, 1]
+    )
+
+    assert first.actions == again.actions
+    assert first.think_times == again.think_times
+    assert first.actions != other.actions
+    # Every session ranks the options the same way, so popular ones are shared.
+    favourites = []
+    for session in [first, other]:
+        picks = [session.popular_choice(list(range(10)))[0] for _ in range(200)]
+        favourites.append(max(set(picks), key=picks.count))
+    assert favourites[0] == favourites[1]
+
+
+def test_latency_summary():
+    assert latency_summary([]) == {"count": 0}
+    summary = latency_summary([0.1] * 99 + [1.0])
+    assert summary["count"] == 100
+    assert summary["p50_ms"] == 100.0
+    assert summary["p99_ms"] > 100.0
+
+
+def test_sessions_log_in_and_rerun_without_exceptions(tmp_path):
+    output = tmp_path / "load.json"
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.load_test",
+            "--sessions",
+            "1",
+            "--actions",
+            "2",
+            "--think",
+            "0.1",
+            "--ramp",
+            "0",
+            "--output",
+            str(output),
+        ],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": str(ROOT)},
+        check=True,
+        capture_output=True,
+        timeout=300,
+    )
+    (level,) = json.loads(output.read_text())["levels"]
+
+    assert level["session_errors"] == []
+    assert level["exceptions"] == 0
+    # Page load, login and the two actions (a chat question reruns twice).
+    assert level["reruns"] >= 4
+    assert {stage["stage"] for stage in level["server_stages"]} >= {"rerun"}
@@ -0,0 +1,417 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.materialized import (
+    CustomerHistory,
+    OrderFacts,
+    PrefixSums,
+    ProductSeries,
+)
+from tests.conftest import build_schema, fact_rows, merged_lines
+
+PRODUCTS = [("P1", "Technology"), ("P2", "Furniture"), ("P3", "Office Supplies")]
+
+
+def order_lines(orders, seed=0):
+    """
+    One to three lines per order, in two countries, over three categories and
+    the first quarter of 2023.
+    """
+    rng = np.random.default_rng(seed)
+    lines = []
+    for order in range(orders):
+        customer = int(rng.integers(0, 20))
+        date = pd.Timestamp("2023-01-01") + pd.Timedelta(days=int(rng.integers(90)))
+        for _ in range(rng.integers(1, 4)):
+            product, category = PRODUCTS[rng.integers(len(PRODUCTS))]
+            lines.append(
+                {
+                    "Order.ID": order,
+                    "Customer.ID": f"C{customer}",
+                    "Country": ["Germany", "France"][customer % 2],
+                    "Product.ID": product,
+                    "Category": category,
+                    "Order.Date": date,
+                    "Sales": float(rng.integers(1, 100)),
+                    "Profit": float(rng.integers(-10, 30)),
+                }
+            )
+    return lines
+
+
+def appended_schema(lines, kept, aggregates, batch=50):
+    """
+    Build a schema from the first `kept` lines, register `aggregates` and
+    append the remaining lines in batches.
+    """
+    schema = build_schema(lines)
+    schema.fact = schema.fact.iloc[:kept]
+    for name, aggregate in aggregates.items():
+        schema.register_aggregate(name, aggregate)
+    for start in range(kept, len(lines), batch):
+        schema.append(fact_rows(schema, merged_lines(lines[start : start + batch])))
+    return schema
+
+
+def exact_orders(schema):
+    wide = schema.materialize(schema.fact)
+    return (
+        wide.groupby(["Order.ID", "Category"])
+        .agg(Sales=("Sales", "sum"), Lines=("Sales", "size"))
+        .reset_index()
+    )
+
+
+def order_table(schema, orders):
+    table = schema.join_labels(orders.table, ["Category"])
+    return (
+        table[["Order.ID", "Category", "Sales", "Lines"]]
+        .sort_values(["Order.ID", "Category"])
+        .reset_index(drop=True)
+    )
+
+
+def test_order_facts_sum_lines_per_order_and_category(make_schema):
+    schema = make_schema(order_lines(200))
+    orders = OrderFacts()
+    orders.build(schema)
+
+    pd.testing.assert_frame_equal(
+        order_table(schema, orders), exact_orders(schema), check_dtype=False
+    )
+    assert orders.table["Lines"].sum() == len(schema.fact)
+
+
+def test_order_facts_fold_appended_lines_into_their_orders():
+    lines = order_lines(200)
+    # The split falls inside an order, so its remaining lines are appended.
+    kept = next(
+        i
+        for i in range(300, len(lines))
+        if lines[i]["Order.ID"] == lines[i - 1]["Order.ID"]
+    )
+    schema = appended_schema(lines, kept, {"orders": OrderFacts()})
+    orders = schema.aggregates["orders"]
+
+    rebuilt = OrderFacts()
+    rebuilt.build(schema)
+    pd.testing.assert_frame_equal(
+        order_table(schema, orders), order_table(schema, rebuilt), check_dtype=False
+    )
+    pd.testing.assert_frame_equal(
+        order_table(schema, orders), exact_orders(schema), check_dtype=False
+    )
+
+
+def selected_lines(schema, conditions=None, date_range=None):
+    wide = schema.materialize(schema.fact)
+    for level, values in (conditions or {}).items():
+        wide = wide[wide[level].isin(values)]
+    if date_range:
+        wide = wide[wide["Order.Date"].between(*date_range)]
+    return wide
+
+
+def test_prefix_sums_total_any_selection_exactly(make_schema):
+    schema = make_schema(order_lines(300))
+    sums = PrefixSums(["Sales", "Profit"], count_column="Lines")
+    sums.build(schema)
+
+    for conditions, date_range in [
+        (None, None),
+        ({"Country": ["France"]}, None),
+        ({"Category": ["Furniture", "Technology"]}, ("2023-01-15", "2023-02-20")),
+        (
+            {"Country": ["Germany"], "Category": ["Furniture"]},
+            ("2023-03-01", "2023-12-31"),
+        ),
+        ({}, ("2022-12-01", "2022-12-31")),
+    ]:
+        rows = selected_lines(schema, conditions, date_range)
+        totals = sums.totals(conditions, date_range)
+        assert totals["Sales"] == pytest.approx(rows["Sales"].sum())
+        assert totals["Profit"] == pytest.approx(rows["Profit"].sum())
+        assert totals["Lines"] == len(rows)
+        assert sums.active_days(conditions, date_range) == rows["Order.Date"].nunique()
+
+
+@pytest.mark.parametrize(
+    "conditions",
+    [
+        None,
+        {"Country": ["France"]},
+        {"Country": ["Germany"], "Category": ["Furniture"]},
+    ],
+)
+def test_prefix_sum_windows_match_rolling_sums(make_schema, conditions):
+    schema = make_schema(order_lines(300))
+    sums = PrefixSums(["Sales", "Profit"], count_column="Lines")
+    sums.build(schema)
+    rows = selected_lines(schema, conditions)
+    daily = (
+        rows.groupby("Order.Date")["Sales"].sum().reindex(sums.dates, fill_value=0.0)
+    )
+
+    date_range = ("2023-02-01", "2023-03-15")
+    averages = sums.moving_averages(conditions, date_range, windows=(7, 30))
+    expected = pd.DataFrame(
+        {
+            "Sales": daily,
+            "7-Day Average": daily.rolling(7, min_periods=1).mean(),
+            "30-Day Average": daily.rolling(30, min_periods=1).mean(),
+        }
+    ).loc[date_range[0] : date_range[1]]
+    assert averages["Date"].tolist() == expected.index.tolist()
+    np.testing.assert_allclose(
+        averages[["Sales", "7-Day Average", "30-Day Average"]].to_numpy(),
+        expected.to_numpy(),
+    )
+
+    windows = sums.window_totals(conditions, end="2023-03-15", windows=(7, 30))
+    end = pd.Timestamp("2023-03-15")
+    for window in windows.to_dict("records"):
+        days = pd.Timedelta(days=window["Days"])
+        current = daily[end - days + pd.Timedelta(days=1) : end].sum()
+        before = daily[end - 2 * days + pd.Timedelta(days=1) : end - days].sum()
+        assert window["Sales"] == pytest.approx(current)
+        assert window["Previous Sales"] == pytest.approx(before)
+
+
+def test_prefix_sums_extend_calendar_and_segments_on_append():
+    lines = order_lines(200)
+    kept = len(lines)
+    # Later days, and a new country and category, arrive only in appends.
+    lines += [
+        {**line, "Order.ID": 1000 + i, "Order.Date": f"2023-04-{i % 28 + 1:02d}"}
+        for i, line in enumerate(lines[:60])
+    ]
+    lines.append(
+        {
+            "Order.ID": 2000,
+            "Customer.ID": "S1",
+            "Country": "Spain",
+            "Product.ID": "P4",
+            "Category": "Books",
+            "Order.Date": "2023-05-02",
+            "Sales": 7.0,
+        }
+    )
+    schema = appended_schema(
+        lines,
+        kept,
+        {"prefix_sums": PrefixSums(["Sales", "Profit"], count_column="Lines")},
+        batch=25,
+    )
+    sums = schema.aggregates["prefix_sums"]
+
+    rebuilt = PrefixSums(["Sales", "Profit"], count_column="Lines")
+    rebuilt.build(schema)
+    assert sums.dates.equals(rebuilt.dates)
+    assert sums.segments.equals(rebuilt.segments)
+    for column in sums.columns:
+        np.testing.assert_allclose(sums.sums[column], rebuilt.sums[column])
+    assert sums.totals({"Country": ["Spain"]}) == {
+        "Sales": 7.0,
+        "Profit": 1.0,
+        "Lines": 1,
+    }
+
+
+CUSTOMERS = {
+    "AL-100": "Ada Lovelace",
+    "AT-200": "Alan Turing",
+    "GH-300": "Grace Hopper",
+    "AB-400": "Ada Byron",
+}
+
+
+def customer_history_lines(lines, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = list(CUSTOMERS)
+    return [
+        {
+            "Order.ID": line // 2,
+            "Customer.ID": ids[line // 2 % len(ids)],
+            "Customer.Name": CUSTOMERS[ids[line // 2 % len(ids)]],
+            "Product.ID": f"P{line % 3}",
+            "Product Name": f"Product {line % 3}",
+            "Order.Date": pd.Timestamp("2023-01-01")
+            + pd.Timedelta(days=int(rng.integers(365))),
+            "Sales": float(rng.integers(1, 100)),
+            "Profit": float(rng.integers(-10, 30)),
+        }
+        for line in range(lines)
+    ]
+
+
+def assert_matches_fact(schema, history):
+    wide = schema.materialize(schema.fact).assign(
+        **{"Customer.Code": schema.fact["Customer.Code"]}
+    )
+    lifetime = wide.groupby("Customer.Code").agg(
+        Sales=("Sales", "sum"),
+        Orders=("Order.ID", "nunique"),
+        Lines=("Sales", "size"),
+        Last=("Order.Date", "max"),
+    )
+    for code, customer in lifetime.iterrows():
+        rows = history.history(code)
+        assert (rows["Customer.Code"] == code).all()
+        assert rows["Order.Date"].is_monotonic_increasing
+        assert sorted(rows["Order.ID"]) == sorted(
+            wide.loc[wide["Customer.Code"] == code, "Order.ID"]
+        )
+        profile = history.profile(code)
+        assert profile["Sales"] == pytest.approx(customer["Sales"])
+        assert profile["Orders"] == customer["Orders"]
+        assert profile["Lines"] == customer["Lines"]
+        assert profile["Last Order"] == customer["Last"]
+        assert profile["Recency"] == (lifetime["Last"].max() - customer["Last"]).days
+        assert profile["Monetary Rank"] == pytest.approx(
+            (lifetime["Sales"] <= customer["Sales"]).mean()
+        )
+
+
+def test_customer_history_slices_and_profiles_every_customer(make_schema):
+    schema = make_schema(customer_history_lines(400))
+    history = CustomerHistory()
+    history.build(schema)
+
+    assert_matches_fact(schema, history)
+    assert len(history.table) == len(schema.fact)
+
+
+def test_customer_search_matches_ids_and_name_prefixes(make_schema):
+    schema = make_schema(customer_history_lines(400))
+    history = CustomerHistory()
+    history.build(schema)
+    ids = schema.customers["Customer.ID"]
+
+    def found(query, limit=50):
+        return ids.iloc[history.search(query, limit)].tolist()
+
+    assert found("gh-300") == ["GH-300"]
+    assert sorted(found("ada")) == ["AB-400", "AL-100"]
+    assert found("a lo") == ["AL-100"]
+    assert found("turing hopper") == []
+    sales = history.totals["Sales"]
+    assert found("", limit=2) == ids.iloc[sales.nlargest(2).index].tolist()
+
+
+def test_customer_history_merges_appended_rows_and_customers():
+    lines = customer_history_lines(400)
+    schema = build_schema(lines[:300])
+    schema.register_aggregate("customer_history", CustomerHistory())
+    schema.append_dimension(
+        "Customer.ID",
+        pd.DataFrame(
+            [
+                {
+                    "Customer.ID": "KJ-500",
+                    "Customer.Name": "Katherine Johnson",
+                    "Country": "Germany",
+                    "City": "Berlin",
+                }
+            ]
+        ),
+    )
+    lines += [
+        {**line, "Order.ID": 1000 + i, "Customer.ID": "KJ-500"}
+        for i, line in enumerate(lines[:5])
+    ]
+    for start in range(300, len(lines), 40):
+        schema.append(fact_rows(schema, merged_lines(lines[start : start + 40])))
+
+    history = schema.aggregates["customer_history"]
+    rebuilt = CustomerHistory()
+    rebuilt.build(schema)
+    pd.testing.assert_frame_equal(history.totals, rebuilt.totals)
+    assert_matches_fact(schema, history)
+    assert schema.customers["Customer.ID"].iloc[history.search("kath")].tolist() == [
+        "KJ-500"
+    ]
+
+
+def product_series_lines(lines, seed=0):
+    rng = np.random.default_rng(seed)
+    names = ["Red Chair", "Red Lamp", "Blue Chair", "Desk Phone"]
+    return [
+        {
+            "Order.ID": line,
+            "Customer.ID": f"C{line % 2}",
+            "Country": ["Germany", "France"][line % 2],
+            "Product.ID": f"P{product}",
+            "Product Name": names[product],
+            "Category": "Technology" if product == 3 else "Furniture",
+            "Order.Date": pd.Timestamp("2023-01-01")
+            + pd.Timedelta(days=int(rng.integers(60))),
+            "Sales": float(rng.integers(1, 100)),
+        }
+        for line, product in enumerate(rng.integers(0, 4, lines))
+    ]
+
+
+def assert_series_match(schema, series, product, conditions=None, date_range=None):
+    rows = selected_lines(schema, conditions, date_range)
+    expected = (
+        rows[rows["Product Name"] == product].groupby("Order.Date")["Sales"].sum()
+    )
+    actual = series.series(product, conditions, date_range)
+    assert actual["Order.Date"].tolist() == expected.index.tolist()
+    np.testing.assert_allclose(actual["Sales"], expected.to_numpy())
+
+
+def test_product_series_match_daily_sums_of_any_selection(make_schema):
+    schema = make_schema(product_series_lines(500))
+    series = ProductSeries()
+    series.build(schema)
+
+    for conditions, date_range in [
+        (None, None),
+        ({"Country": ["France"]}, None),
+        ({"Country": ["Germany"]}, ("2023-01-10", "2023-02-05")),
+        ({"Category": ["Technology"]}, ("2023-02-01", "2023-03-31")),
+    ]:
+        for product in ["Red Chair", "Desk Phone"]:
+            assert_series_match(schema, series, product, conditions, date_range)
+
+
+def test_product_search_ranks_prefix_matches_by_sales(make_schema):
+    schema = make_schema(product_series_lines(500))
+    series = ProductSeries()
+    series.build(schema)
+    totals = schema.materialize(schema.fact).groupby("Product Name")["Sales"].sum()
+
+    chairs = totals[["Red Chair", "Blue Chair"]].sort_values(ascending=False)
+    assert series.search("chai").tolist() == chairs.index.tolist()
+    assert series.search("RED ch").tolist() == ["Red Chair"]
+    assert series.search("", categories=["Technology"]).tolist() == ["Desk Phone"]
+    assert series.search("", limit=1).tolist() == [totals.idxmax()]
+    assert series.search("green").empty
+
+
+def test_product_series_fold_appended_rows_and_products():
+    lines = product_series_lines(500)
+    lines.append(
+        {
+            **lines[0],
+            "Order.ID": 1000,
+            "Product.ID": "P9",
+            "Product Name": "Green Sofa",
+            "Order.Date": pd.Timestamp("2023-04-01"),
+        }
+    )
+    schema = appended_schema(lines, 400, {"product_series": ProductSeries()}, 30)
+    series = schema.aggregates["product_series"]
+
+    rebuilt = ProductSeries()
+    rebuilt.build(schema)
+    np.testing.assert_allclose(
+        series.totals[series.products.get_indexer(rebuilt.products)],
+        rebuilt.totals,
+    )
+    for product in ["Red Chair", "Blue Chair", "Green Sofa"]:
+        assert_series_match(schema, series, product, {"Country": ["France"]})
+    assert_series_match(schema, series, "Green Sofa")
+    assert series.search("gre").tolist() == ["Green Sofa"]
@@ -0,0 +1,114 @@
+import json
+import tracemalloc
+
+import numpy as np
+import plotly.graph_objects as go
+
+from app.utils.cache import estimate_size
+from app.utils.materialized import CustomerHistory, MaterializedAggregate
+from app.utils.memory import AllocationTracker, memory_report
+from app.utils.segmentation import CustomerSegmentation
+from app.utils.star_schema import FACT_COLUMNS
+from app.utils.view import FilteredView
+from tests.conftest import fact_rows, merged_lines
+
+LINES = [
+    {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1"},
+    {"Order.ID": 2, "Customer.ID": "B", "Product.ID": "P2", "Country": "France"},
+]
+
+
+def test_report_accounts_for_dataset_aggregates_and_cache(make_schema):
+    schema = make_schema(LINES)
+    daily = schema.register_aggregate(
+        "daily", MaterializedAggregate(["Order.Date"], ["Sales"])
+    )
+    FilteredView(schema, countries=["France"]).output("sales_heatmap")
+
+    report = json.loads(json.dumps(memory_report(schema)))
+
+    assert report["rss_bytes"] > 0
+    assert report["dataset"]["fact"] == schema.fact_nbytes()
+    assert report["aggregates"] == {"daily": estimate_size(daily.table)}
+    # The process-wide cache also holds entries of other schemas.
+    assert report["computation_cache"]["output:sales_heatmap"]["entries"] >= 1
+    assert report["computation_cache_bytes"] > 0
+
+
+def test_fact_size_counts_the_rows_reserved_for_appends(make_schema):
+    lines = [
+        {"Order.ID": order, "Customer.ID": "A", "Product.ID": "P1"}
+        for order in range(8)
+    ]
+    schema = make_schema(lines)
+    # Ship modes are stored as their categorical codes.
+    columns = schema.fact.assign(**{"Ship.Mode": schema.fact["Ship.Mode"].cat.codes})
+    row_bytes = sum(columns[column].to_numpy().itemsize for column in FACT_COLUMNS)
+    schema.append(fact_rows(schema, merged_lines([{**lines[0], "Order.ID": 8}])))
+
+    # Growing from 8 rows reserves a quarter more: 10 rows for 9 filled ones.
+    assert len(schema.fact) == 9
+    categories = schema.fact["Ship.Mode"].cat.categories
+    assert schema.fact_nbytes() == 10 * row_bytes + categories.memory_usage(deep=True)
+
+
+def test_aggregate_sizes_cover_all_of_their_arrays(make_schema):
+    lines = [
+        {
+            "Order.ID": order,
+            "Customer.ID": customer,
+            "Customer.Name": f"Customer {customer}",
+            "Product.ID": "P1",
+            "Sales": 10.0 * (order + 1),
+        }
+        for order, customer in enumerate("ABCDEF")
+    ]
+    schema = make_schema(lines)
+    history = schema.register_aggregate("customer_history", CustomerHistory())
+    segmentation = schema.register_aggregate("segments", CustomerSegmentation())
+    empty = segmentation.nbytes()
+    segmentation.segments(schema, schema.customers["Customer.Name"])
+
+    assert history.nbytes() >= (
+        estimate_size([history.table, history.offsets, history.totals])
+        + history._sort_keys.nbytes
+        + history.names.nbytes()
+    )
+    centers = segmentation.model.cluster_centers_
+    assert segmentation.nbytes() == estimate_size(
+        [segmentation.rfm, segmentation.assignments, centers]
+    )
+    assert segmentation.nbytes() > empty
+    report = memory_report(schema)
+    assert report["aggregates"] == {
+        "customer_history": history.nbytes(),
+        "segments": segmentation.nbytes(),
+    }
+
+
+def test_figures_are_sized_by_their_trace_arrays():
+    x = np.arange(10_000, dtype=np.float64)
+    small = go.Figure(go.Scatter(x=x[:10], y=x[:10]))
+    large = go.Figure(go.Scatter(x=x, y=x), layout={"title": "Sales " * 1000})
+
+    assert estimate_size(large) - estimate_size(small) >= 2 * 8 * (10_000 - 10)
+    # The layout is not counted.
+    assert estimate_size(large) < 2 * x.nbytes + 4096
+
+
+def test_allocation_diff_points_at_the_allocating_line():
+    tracker = AllocationTracker()
+    was_tracing = tracemalloc.is_tracing()
+    tracker.start()
+    try:
+        before = tracker.snapshot()
+        kept = [bytearray(8000) for _ in range(200)]
+        after = tracker.snapshot()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    top = tracker.top_differences(before, after, limit=1)[0]
+    assert "test_memory.py" in top["line"]
+    assert top["size_diff"] >= 200 * 8000
+    assert len(kept) == 200
@@ -0,0 +1,56 @@
+import json
+import threading
+
+import pandas as pd
+
+from app.utils.metrics import StageMetrics
+
+
+def test_rerun_records_nested_stages_rows_and_cache_results(tmp_path):
+    metrics = StageMetrics(
+        prometheus_file=tmp_path / "metrics.prom", jsonl_file=tmp_path / "stages.jsonl"
+    )
+
+    @metrics.timed()
+    def double(frame):
+        return pd.concat([frame, frame])
+
+    metrics.start_rerun()
+    with metrics.stage("load", rows_in=3) as record:
+        record.cache = "miss"
+        double(pd.DataFrame({"a": [1, 2, 3]}))
+    records = metrics.finish_rerun({"countries": ["France"]})
+
+    assert [(r.stage, r.depth, r.rows_in, r.rows_out) for r in records] == [
+        ("load", 0, 3, None),
+        ("double", 1, 3, 6),
+        ("rerun", 0, None, None),
+    ]
+    assert records[0].seconds >= records[1].seconds
+    lines = [json.loads(line) for line in open(tmp_path / "stages.jsonl")]
+    assert [line["stage"] for line in lines] == ["load", "double", "rerun"]
+    assert {line["countries"][0] for line in lines} == {"France"}
+    prometheus = (tmp_path / "metrics.prom").read_text()
+    assert 'dashboard_stage_seconds_count{stage="double"} 1' in prometheus
+    assert 'dashboard_stage_cache_total{stage="load",result="miss"} 1' in prometheus
+
+
+def test_stages_outside_a_rerun_are_not_recorded():
+    metrics = StageMetrics()
+    metrics.start_rerun()
+
+    def other_thread():
+        with metrics.stage("warm"):
+            pass
+
+    thread = threading.Thread(target=other_thread)
+    thread.start()
+    thread.join()
+    with metrics.stage("filter_data"):
+        pass
+    metrics.finish_rerun()
+
+    summary = metrics.summary().set_index("Stage")
+    assert list(summary.index) == ["filter_data", "rerun"]
+    assert summary.loc["filter_data", "Calls"] == 1
+    assert metrics.finish_rerun() == []
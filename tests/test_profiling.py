@@ -0,0 +1,79 @@
+import json
+import time
+from pathlib import Path
+
+import pytest
+
+from app.utils.profiling import RerunProfiler
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += 1
+    return total
+
+
+@pytest.fixture
+def profile(tmp_path):
+    profiler = RerunProfiler(interval=0.001).start()
+    for _ in range(3):
+        spin(0.05)
+    return profiler.stop(tmp_path, {"tab": "Sales Overview", "countries": []})
+
+
+def test_cprofile_stats_count_the_profiled_calls(profile):
+    top = profile["top"]
+    spins = top[top["Function"].str.startswith("spin (test_profiling.py:")]
+
+    assert len(spins) == 1
+    assert spins["Calls"].iloc[0] == 3
+    assert spins["Cumulative (s)"].iloc[0] >= 0.15
+    assert top["Cumulative (s)"].is_monotonic_decreasing
+    assert profile["tags"] == {"tab": "Sales Overview", "countries": []}
+
+
+def test_files_are_named_after_the_non_empty_tags(profile, tmp_path):
+    files = [Path(path) for path in profile["files"]]
+
+    assert all(path.parent == tmp_path and path.exists() for path in files)
+    assert [path.name.split("-tab-sales-overview")[1] for path in files] == [
+        ".speedscope.json",
+        ".collapsed.txt",
+        ".top.txt",
+    ]
+    report = files[2].read_text()
+    assert '"tab": "Sales Overview"' in report
+    assert "spin" in report
+
+
+def test_speedscope_profile_holds_the_sampled_stacks(profile):
+    document = json.loads(Path(profile["files"][0]).read_text())
+
+    assert document["$schema"] == "https://www.speedscope.app/file-format-schema.json"
+    assert set(document) == {"$schema", "shared", "profiles", "name", "exporter"}
+    frames = document["shared"]["frames"]
+    assert all(set(frame) == {"name", "file", "line"} for frame in frames)
+    (sampled,) = document["profiles"]
+    assert sampled["type"] == "sampled"
+    assert sampled["unit"] == "seconds"
+    assert len(sampled["samples"]) == len(sampled["weights"]) >= 1
+    assert sampled["endValue"] == pytest.approx(sum(sampled["weights"]))
+    # Samples are stacks of frame indices, outermost first.
+    stacks = [
+        [frames[index]["name"] for index in stack] for stack in sampled["samples"]
+    ]
+    assert any(stack[-1] == "spin" for stack in stacks)
+    spin_frame = next(frame for frame in frames if frame["name"] == "spin")
+    assert spin_frame["file"] == __file__
+    assert spin_frame["line"] == spin.__code__.co_firstlineno
+
+
+def test_collapsed_stacks_end_in_the_sampled_function(profile):
+    lines = Path(profile["files"][1]).read_text().splitlines()
+    stacks = dict(line.rsplit(" ", 1) for line in lines)
+
+    assert stacks and all(int(microseconds) >= 0 for microseconds in stacks.values())
+    label = f"spin (test_profiling.py:{spin.__code__.co_firstlineno})"
+    assert any(stack.endswith(f";{label}") for stack in stacks)
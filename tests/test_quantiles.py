@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.data_processing import calculate_order_value, calculate_rfm_segments
+from app.utils.sketches import OrderValueQuantiles, digest_quantiles
+
+QUANTILES = [0.5, 0.9, 0.99]
+
+
+def rank_errors(values, estimates, quantiles):
+    ranks = np.searchsorted(np.sort(values), estimates) / len(values)
+    return np.abs(ranks - np.asarray(quantiles))
+
+
+def test_digest_quantiles_are_within_one_percent_of_rank():
+    values = np.random.default_rng(0).lognormal(4, 1.2, 100000)
+
+    estimates = digest_quantiles(values, QUANTILES)
+
+    assert rank_errors(values, estimates, QUANTILES).max() < 0.01
+
+
+def test_approximate_rfm_segments_cut_near_the_quartiles():
+    rng = np.random.default_rng(1)
+    rfm = pd.DataFrame(
+        {
+            "Recency": rng.integers(0, 365, 20000),
+            "Frequency": rng.integers(1, 20, 20000),
+            "Monetary": rng.gamma(2, 300, 20000),
+        }
+    )
+
+    shares = (
+        calculate_rfm_segments(rfm, approximate=True)["Segment"]
+        .value_counts(normalize=True)
+        .sort_index()
+    )
+
+    assert shares.to_numpy() == pytest.approx([0.25] * 4, abs=0.01)
+
+
+def test_order_value_digest_answers_category_filters(bundled_schema):
+    sketch = OrderValueQuantiles("Sales")
+    sketch.build(bundled_schema)
+    fact = bundled_schema.fact
+
+    for categories in [[], ["Technology"]]:
+        selected = bundled_schema.filter(categories=categories)
+        values = calculate_order_value(selected)["Order Value"].to_numpy()
+        estimates = sketch.quantiles({"Category": categories}, quantiles=QUANTILES)
+        assert rank_errors(values, estimates, QUANTILES).max() < 0.01
+    assert sketch.quantiles({"Category": ["Technology", "Furniture"]}) is None
+    assert sketch.centroids()["Weight"].sum() == fact["Order.ID"].nunique()
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.tabs.computations import customer_rfm
+from app.utils.data_processing import calculate_rfm
+from app.utils.segmentation import SEGMENTS, CustomerSegmentation
+from app.utils.view import FilteredView
+from tests.conftest import fact_rows, merged_lines
+
+pytest.importorskip("sklearn")
+
+
+def random_lines(rng, count, first_order=0):
+    dates = pd.Timestamp("2022-01-01") + pd.to_timedelta(
+        rng.integers(0, 730, count), unit="D"
+    )
+    customers = rng.integers(0, 60, count)
+    return [
+        {
+            "Order.ID": first_order + line,
+            "Customer.ID": f"C{customer}",
+            "Customer.Name": f"Customer {customer}",
+            "Country": ["Germany", "France"][customer % 2],
+            "Product.ID": "P1",
+            "Order.Date": date,
+            "Sales": float(rng.lognormal(4, 1)),
+        }
+        for line, (customer, date) in enumerate(zip(customers, dates))
+    ]
+
+
+@pytest.fixture
+def schema(make_schema):
+    schema = make_schema(random_lines(np.random.default_rng(0), 600))
+    schema.register_aggregate("customer_segments", CustomerSegmentation(seed=0))
+    return schema
+
+
+def test_segments_do_not_depend_on_filters(schema):
+    everyone = customer_rfm(FilteredView(schema)).set_index("Customer.Name")
+    assert set(everyone["Segment"].unique()) <= set(SEGMENTS)
+    assert everyone["Segment"].nunique() > 1
+    for filters in [
+        {"countries": ["Germany"]},
+        {"date_range": ("2023-06-01", "2023-06-30")},
+    ]:
+        view = customer_rfm(FilteredView(schema, **filters))
+        expected = everyone["Segment"].reindex(view["Customer.Name"])
+        assert (view["Segment"].to_numpy() == expected.to_numpy()).all()
+
+
+def test_append_keeps_lifetime_metrics_from_one_reference(schema):
+    segmentation = schema.aggregates["customer_segments"]
+    segmentation.segments(schema, pd.Series(["Customer 0"]))
+    reference = segmentation.reference
+
+    lines = random_lines(np.random.default_rng(1), 50, first_order=10_000)
+    schema.append(fact_rows(schema, merged_lines(lines)))
+
+    # The append refined a copy; readers of the previous version keep theirs.
+    assert segmentation.version == 0
+    segmentation = schema.aggregates["customer_segments"]
+    assert segmentation.reference == reference
+    assert segmentation.version == schema.version
+    expected = calculate_rfm(schema.fact, reference, schema=schema)
+    expected = expected.set_index("Customer.Name").sort_index()
+    pd.testing.assert_frame_equal(
+        segmentation.rfm.sort_index(), expected, check_dtype=False
+    )
+    assert segmentation.assignments.index.equals(segmentation.rfm.index)
@@ -0,0 +1,157 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.metric_utils import calculate_repeat_purchase_rate
+from app.utils.sketches import DistinctCount, HeavyHitters, RepeatPurchases
+from tests.conftest import build_schema, fact_rows, merged_lines
+
+
+def customer_lines(customers, repeat_every, seed=0):
+    """
+    One line for every customer plus a second line for every `repeat_every`-th
+    one, spread over two countries and a few days.
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.concatenate([np.arange(customers), np.arange(0, customers, repeat_every)])
+    return [
+        {
+            "Order.ID": line,
+            "Customer.ID": f"C{customer}",
+            "Customer.Name": f"Customer {customer}",
+            "Country": ["Germany", "France"][customer % 2],
+            "Product.ID": "P1",
+            "Order.Date": f"2023-01-{rng.integers(1, 29):02d}",
+        }
+        for line, customer in enumerate(ids)
+    ]
+
+
+@pytest.fixture(scope="module")
+def many_customers():
+    return build_schema(customer_lines(20000, repeat_every=4))
+
+
+def test_distinct_count_is_within_its_error_bound(many_customers):
+    sketch = DistinctCount("Customer.ID")
+    sketch.build(many_customers)
+
+    estimate = sketch.count()
+    assert abs(estimate / 20000 - 1) < 3 * sketch.relative_error
+    assert sketch.count({"Country": ["France"]}) == pytest.approx(10000, rel=0.05)
+
+
+def test_repeat_rate_is_within_its_error_bound(many_customers):
+    sketch = RepeatPurchases(capacity=1024)
+    sketch.build(many_customers)
+
+    error = sketch.standard_error()
+    assert error == pytest.approx(50 / 32)
+    assert abs(sketch.rate() - 25.0) < 3 * error
+    # Every fourth customer id is even, so all repeat customers are German.
+    german = {"Country": ["Germany"]}
+    assert sketch.standard_error(german) == error
+    assert abs(sketch.rate(german) - 50.0) < 3 * error
+
+
+def test_repeat_rate_is_exact_below_capacity_and_after_appends(make_schema):
+    schema = make_schema(customer_lines(300, repeat_every=3))
+    sketch = RepeatPurchases()
+    sketch.build(schema)
+    later = merged_lines(
+        [
+            {
+                "Order.ID": 1000,
+                "Customer.ID": "C1",
+                "Customer.Name": "Customer 1",
+                "Country": "France",
+                "Product.ID": "P1",
+                "Order.Date": "2023-02-01",
+            }
+        ]
+    )
+    delta = fact_rows(schema, later)
+    schema.append(delta)
+    sketch.apply(schema, delta)
+
+    exact = calculate_repeat_purchase_rate(
+        schema.join_labels(schema.fact, ["Customer.Name"])
+    )
+    assert sketch.estimate() == (pytest.approx(exact), 0.0)
+    assert (
+        sketch.rate({}, (pd.Timestamp("2023-02-01"), pd.Timestamp("2023-02-28"))) == 0.0
+    )
+
+
+@pytest.mark.parametrize("capacity, exact", [(300, True), (299, False)])
+def test_repeat_rate_has_no_error_when_the_sample_holds_every_customer(
+    make_schema, capacity, exact
+):
+    schema = make_schema(customer_lines(300, repeat_every=3))
+    sketch = RepeatPurchases(capacity=capacity)
+    sketch.build(schema)
+
+    error = sketch.standard_error()
+    assert error == (0.0 if exact else pytest.approx(50 / np.sqrt(capacity)))
+    # A filter can bring a selection under the capacity.
+    assert sketch.standard_error({"Country": ["France"]}) == 0.0
+
+
+def product_lines(count, seed=0):
+    """
+    Order lines over 200 products with Zipf-like sales, on random days and in
+    two countries.
+    """
+    rng = np.random.default_rng(seed)
+    products = rng.zipf(1.5, count) % 200
+    return [
+        {
+            "Order.ID": line,
+            "Customer.ID": f"C{line % 2}",
+            "Country": ["Germany", "France"][line % 2],
+            "Product.ID": f"P{product}",
+            "Product Name": f"Product {product}",
+            "Order.Date": f"2023-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}",
+            "Sales": float(rng.integers(1, 100)),
+        }
+        for line, product in enumerate(products)
+    ]
+
+
+def test_heavy_hitters_fall_short_by_at_most_the_error_bound(make_schema):
+    schema = make_schema(product_lines(5000))
+    sketch = HeavyHitters("Product Name", "Sales", capacity=8)
+    sketch.build(schema)
+    date_range = (pd.Timestamp("2023-02-10"), pd.Timestamp("2023-11-20"))
+
+    top = sketch.top({"Country": ["France"]}, date_range, top_n=5)
+    wide = schema.materialize(schema.fact)
+    selected = wide[
+        (wide["Country"] == "France") & wide["Order.Date"].between(*date_range)
+    ]
+    exact = selected.groupby("Product Name")["Sales"].sum()
+    bound = top.attrs["error_bound"]
+
+    assert 0 < bound <= 3 * selected["Sales"].sum() / (8 + 1)
+    shortfall = exact[top["Product Name"]].to_numpy() - top["Sales"].to_numpy()
+    assert (shortfall >= -1e-9).all() and (shortfall <= bound + 1e-9).all()
+    assert list(top["Product Name"][:3]) == list(exact.nlargest(3).index)
+
+
+def test_heavy_hitters_keep_their_bound_across_appends(make_schema):
+    lines = product_lines(3500)
+    schema = make_schema(lines)
+    schema.fact = schema.fact.iloc[:3000]
+    sketch = HeavyHitters("Product Name", "Sales", capacity=8)
+    sketch.build(schema)
+    for start in range(3000, 3500, 100):
+        delta = fact_rows(schema, merged_lines(lines[start : start + 100]))
+        schema.append(delta)
+        sketch.apply(schema, delta)
+
+    top = sketch.top(top_n=5)
+    exact = schema.materialize(schema.fact).groupby("Product Name")["Sales"].sum()
+    shortfall = exact[top["Product Name"]].to_numpy() - top["Sales"].to_numpy()
+    assert (shortfall >= -1e-9).all()
+    assert (shortfall <= top.attrs["error_bound"] + 1e-9).all()
+    assert list(top["Product Name"][:3]) == list(exact.nlargest(3).index)
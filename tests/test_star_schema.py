@@ -0,0 +1,164 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.utils.materialized import MaterializedAggregate
+from app.utils.star_schema import MERGED_COLUMNS, FactBuffer, ReadWriteLock
+from tests.conftest import fact_rows, merged_lines
+
+LINES = [
+    {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1", "Sales": 10.0},
+    {"Order.ID": 2, "Customer.ID": "B", "Product.ID": "P2", "Sales": 20.0},
+]
+
+
+def test_bundled_data_round_trips_through_surrogate_keys(bundled_schema):
+    fact = bundled_schema.fact
+    merged = pd.read_csv("data/merged_data.csv", parse_dates=["Order.Date"])
+
+    assert fact["Customer.Code"].dtype == np.int32
+    assert fact["Product.Code"].dtype == np.int32
+    pd.testing.assert_frame_equal(
+        bundled_schema.materialize(fact).astype({"Ship.Mode": object}),
+        merged[MERGED_COLUMNS],
+    )
+
+
+def test_filters_and_group_bys_run_on_codes_and_decode_labels(make_schema):
+    schema = make_schema(
+        [
+            {"Order.ID": 1, "Customer.ID": "A", "Product.ID": "P1", "Sales": 1.0},
+            {
+                "Order.ID": 2,
+                "Customer.ID": "B",
+                "Country": "France",
+                "Product.ID": "P2",
+                "Category": "Furniture",
+                "Order.Date": "2023-02-01",
+                "Sales": 2.0,
+            },
+            {
+                "Order.ID": 3,
+                "Customer.ID": "C",
+                "Country": "Austria",
+                "Product.ID": "P1",
+                "Sales": 4.0,
+            },
+        ]
+    )
+
+    totals = schema.aggregate(schema.fact, "Country", "Sales")
+    assert totals.to_dict("list") == {
+        "Country": ["Austria", "France", "Germany"],
+        "Sales": [4.0, 2.0, 1.0],
+    }
+    assert schema.filter(countries=["France", "Germany"])["Order.ID"].tolist() == [
+        1,
+        2,
+    ]
+    assert schema.filter(categories=["Technology"], end_date="2023-01-31")[
+        "Order.ID"
+    ].tolist() == [1, 3]
+
+
+def test_appended_dimension_rows_keep_existing_codes(make_schema):
+    schema = make_schema(LINES)
+    before = schema.materialize(schema.fact)
+    schema.row_codes(schema.fact, "Country")
+    schema.append_dimension(
+        "Country",
+        pd.DataFrame(
+            [
+                {
+                    "Customer.ID": "Z",
+                    "Customer.Name": "Zed",
+                    "Country": "Belgium",
+                    "City": "Ghent",
+                }
+            ]
+        ),
+    )
+
+    pd.testing.assert_frame_equal(schema.materialize(schema.fact), before)
+    assert list(schema.labels("Country")) == ["Belgium", "Germany"]
+    assert schema.row_codes(schema.fact, "Country").tolist() == [1, 1]
+
+
+def test_fact_buffer_appends_without_touching_earlier_frames(make_schema):
+    schema = make_schema(LINES)
+    buffer = FactBuffer(schema.fact)
+    first = buffer.frame()
+    delta = schema.fact.assign(
+        **{"Sales": [30.0, 40.0], "Ship.Mode": pd.Categorical(["Same Day"] * 2)}
+    )
+    for _ in range(3):
+        buffer.append(delta)
+    second = buffer.frame()
+
+    assert len(first) == 2 and first["Sales"].tolist() == [10.0, 20.0]
+    assert len(second) == 8 and buffer.capacity >= 8
+    assert second["Sales"].tolist() == [10.0, 20.0] + [30.0, 40.0] * 3
+    assert second["Ship.Mode"].tolist() == ["Standard Class"] * 2 + ["Same Day"] * 6
+    assert list(second.columns) == list(first.columns)
+    assert second["Sales"].dtype == first["Sales"].dtype
+
+
+def test_pinned_copies_keep_their_version_while_appends_go_on(make_schema):
+    schema = make_schema(LINES)
+    schema.register_aggregate(
+        "daily_sales", MaterializedAggregate(["Order.Date"], ["Sales"])
+    )
+    pinned = schema.pinned()
+    # Nothing holds the lock while the pinned copy is read.
+    appender = threading.Thread(
+        target=schema.append, args=(fact_rows(schema, merged_lines(LINES)),)
+    )
+    appender.start()
+    appender.join(timeout=5)
+
+    assert not appender.is_alive()
+    assert (pinned.version, len(pinned.fact)) == (0, 2)
+    assert pinned.aggregates["daily_sales"].table["Sales"].sum() == 30.0
+    assert schema.snapshot[0] == schema.version == 1
+    assert len(schema.snapshot[1]) == len(schema.fact) == 4
+    assert schema.aggregates["daily_sales"].table["Sales"].sum() == 60.0
+
+
+def test_writer_waits_for_readers_and_blocks_new_ones():
+    lock = ReadWriteLock()
+    events = []
+    reading = threading.Event()
+    release = threading.Event()
+
+    def reader():
+        with lock.reading():
+            reading.set()
+            release.wait()
+            # A thread that already reads may read again while a writer waits.
+            with lock.reading():
+                events.append("reader")
+
+    def writer():
+        with lock.writing():
+            events.append("writer")
+
+    def late_reader():
+        with lock.reading():
+            events.append("late reader")
+
+    threads = [threading.Thread(target=reader)]
+    threads[0].start()
+    reading.wait()
+    threads.append(threading.Thread(target=writer))
+    threads[1].start()
+    time.sleep(0.05)
+    threads.append(threading.Thread(target=late_reader))
+    threads[2].start()
+    time.sleep(0.05)
+    assert events == []
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert events == ["reader", "writer", "late reader"]
@@ -0,0 +1,5 @@
+from benchmarks.startup import import_time_report
+
+
+def test_dashboard_import_loads_no_heavy_library():
+    assert import_time_report()["heavy_modules_loaded"] == []